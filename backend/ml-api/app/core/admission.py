@@ -0,0 +1,256 @@
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, Optional
+import asyncio
+import contextvars
+import logging
+import math
+import threading
+import time
+
+from app.core.config import (
+    ADMISSION_BULK_QUEUE,
+    ADMISSION_BULK_SLICE_ROWS,
+    ADMISSION_BULK_WEIGHT,
+    ADMISSION_ENABLED,
+    ADMISSION_INTERACTIVE_QUEUE,
+    ADMISSION_INTERACTIVE_WEIGHT,
+    ADMISSION_WORKERS,
+)
+from app.core.tracing import current_trace
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+_WAIT_SAMPLES = 1000
+_MAX_RETRY_AFTER = 30
+
+# Set on a worker thread while it runs a bulk task (see checkpoint())
+_local = threading.local()
+
+
+class AdmissionRejected(Exception):
+    """The lane's queue is full; the caller should retry after retry_after seconds."""
+
+    def __init__(self, lane: str, retry_after: int):
+        super().__init__(f"The {lane} queue is full, retry in {retry_after}s")
+        self.lane = lane
+        self.retry_after = retry_after
+
+
+class _Task:
+    __slots__ = ("fn", "context", "future", "enqueued_at", "lane")
+
+    def __init__(self, lane: str, fn: Callable[[], Any]):
+        self.lane = lane
+        self.fn = fn
+        # Run in the submitter's context so tracing spans land on its request
+        self.context = contextvars.copy_context()
+        self.future: Future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class _Lane:
+    def __init__(self, name: str, capacity: int, weight: int):
+        self.name = name
+        self.capacity = max(1, capacity)
+        self.weight = max(1, weight)
+        self.queue: Deque[_Task] = deque()
+        self.admitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.running = 0
+        self.interleaved = 0
+        self.waits: Deque[float] = deque(maxlen=_WAIT_SAMPLES)
+        self.service_ewma: Optional[float] = None
+
+    def describe(self) -> Dict[str, Any]:
+        waits = sorted(self.waits)
+
+        def pct(q: float) -> Optional[float]:
+            if not waits:
+                return None
+            return round(waits[min(len(waits) - 1, int(q * len(waits)))] * 1000, 2)
+
+        return {
+            "depth": len(self.queue),
+            "capacity": self.capacity,
+            "weight": self.weight,
+            "running": self.running,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "run_between_bulk_slices": self.interleaved,
+            "wait_ms": {"p50": pct(0.5), "p95": pct(0.95), "p99": pct(0.99), "max": pct(1.0)},
+            "mean_service_ms": round(self.service_ewma * 1000, 2) if self.service_ewma is not None else None,
+        }
+
+
+class AdmissionController:
+    """
+    Bounded, weighted scheduling of inference work off the event loop.
+
+    Interactive requests (single predictions) and bulk requests (batches,
+    rankings) wait in separate bounded queues. Worker threads pick the next
+    task by weighted round robin, so bulk work cannot starve interactive
+    work, and a full queue is answered immediately with AdmissionRejected
+    instead of piling up latency.
+
+    Bulk scoring is sliced: between slices the predictor calls checkpoint(),
+    which runs waiting interactive tasks on the same thread before the bulk
+    request continues.
+    """
+
+    def __init__(self, workers: int, interactive_queue: int, bulk_queue: int,
+                 interactive_weight: int, bulk_weight: int):
+        self.lanes = {
+            INTERACTIVE: _Lane(INTERACTIVE, interactive_queue, interactive_weight),
+            BULK: _Lane(BULK, bulk_queue, bulk_weight),
+        }
+        self._cond = threading.Condition()
+        self._credits = {name: lane.weight for name, lane in self.lanes.items()}
+        self._threads = [
+            threading.Thread(target=self._run, name=f"inference-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _retry_after(self, lane: _Lane) -> int:
+        service = lane.service_ewma if lane.service_ewma is not None else 1.0
+        estimate = math.ceil(len(lane.queue) * service / max(1, len(self._threads)))
+        return max(1, min(_MAX_RETRY_AFTER, estimate))
+
+    def submit(self, lane_name: str, fn: Callable[[], Any]) -> Future:
+        """Queue fn on a lane; raises AdmissionRejected when the lane is full."""
+        lane = self.lanes[lane_name]
+        task = _Task(lane_name, fn)
+        with self._cond:
+            if len(lane.queue) >= lane.capacity:
+                lane.rejected += 1
+                raise AdmissionRejected(lane_name, self._retry_after(lane))
+            lane.queue.append(task)
+            lane.admitted += 1
+            self._cond.notify()
+        return task.future
+
+    async def run(self, lane_name: str, fn: Callable[[], Any]) -> Any:
+        """Submit fn and await its result without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(lane_name, fn))
+
+    def _next_locked(self) -> Optional[_Task]:
+        """Weighted round robin: each lane spends its credits before the other gets a turn."""
+        ready = [name for name, lane in self.lanes.items() if lane.queue]
+        if not ready:
+            return None
+        if len(ready) == 1:
+            name = ready[0]
+        else:
+            name = next((n for n in (INTERACTIVE, BULK) if self._credits[n] > 0), None)
+            if name is None:
+                self._credits = {n: lane.weight for n, lane in self.lanes.items()}
+                name = INTERACTIVE
+            self._credits[name] -= 1
+        return self.lanes[name].queue.popleft()
+
+    def _execute(self, task: _Task) -> None:
+        lane = self.lanes[task.lane]
+        if not task.future.set_running_or_notify_cancel():
+            return
+        start = time.perf_counter()
+        wait = start - task.enqueued_at
+        with self._cond:
+            lane.running += 1
+            lane.waits.append(wait)
+        previous = getattr(_local, "bulk", False)
+        _local.bulk = task.lane == BULK
+        try:
+            task.future.set_result(task.context.run(_timed, task.fn, wait))
+        except BaseException as e:
+            task.future.set_exception(e)
+        finally:
+            _local.bulk = previous
+            service = time.perf_counter() - start
+            with self._cond:
+                lane.running -= 1
+                lane.completed += 1
+                lane.service_ewma = service if lane.service_ewma is None else 0.8 * lane.service_ewma + 0.2 * service
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                task = self._next_locked()
+                while task is None:
+                    self._cond.wait()
+                    task = self._next_locked()
+            self._execute(task)
+
+    def checkpoint(self) -> None:
+        """Between bulk slices: run the interactive tasks waiting right now, up to the lane weight."""
+        if not getattr(_local, "bulk", False):
+            return
+        lane = self.lanes[INTERACTIVE]
+        for _ in range(lane.weight):
+            with self._cond:
+                if not lane.queue:
+                    return
+                task = lane.queue.popleft()
+                lane.interleaved += 1
+            self._execute(task)
+
+    def describe(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "enabled": True,
+                "workers": len(self._threads),
+                "bulk_slice_rows": ADMISSION_BULK_SLICE_ROWS,
+                "lanes": {name: lane.describe() for name, lane in self.lanes.items()},
+            }
+
+
+def _timed(fn: Callable[[], Any], wait: float) -> Any:
+    """Run a task, recording its time in the queue as a span of the request's trace."""
+    trace = current_trace()
+    if trace is not None:
+        now = time.time_ns()
+        trace.add_span("queue", now - int(wait * 1e9), now)
+    return fn()
+
+
+_controller: Optional[AdmissionController] = None
+_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> Optional[AdmissionController]:
+    """
+    Admission controller for this worker, started on first use.
+
+    Returns:
+        AdmissionController, or None when ADMISSION_ENABLED is false
+    """
+    global _controller
+    if not ADMISSION_ENABLED:
+        return None
+    with _controller_lock:
+        if _controller is None:
+            _controller = AdmissionController(
+                workers=ADMISSION_WORKERS,
+                interactive_queue=ADMISSION_INTERACTIVE_QUEUE,
+                bulk_queue=ADMISSION_BULK_QUEUE,
+                interactive_weight=ADMISSION_INTERACTIVE_WEIGHT,
+                bulk_weight=ADMISSION_BULK_WEIGHT,
+            )
+            logger.info(
+                f"Admission control: {ADMISSION_WORKERS} inference thread(s), queues "
+                f"interactive={ADMISSION_INTERACTIVE_QUEUE} bulk={ADMISSION_BULK_QUEUE}, "
+                f"weights {ADMISSION_INTERACTIVE_WEIGHT}:{ADMISSION_BULK_WEIGHT}"
+            )
+        return _controller
+
+
+def checkpoint() -> None:
+    """Yield to waiting interactive work if called from a bulk task (no-op otherwise)."""
+    if _controller is not None:
+        _controller.checkpoint()
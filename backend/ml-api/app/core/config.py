@@ -1,12 +1,157 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 import os
 
 
 class Settings(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
     model_path: str = "./model.pkl"  # Random Forest model path
+    result_store_path: str = ""  # SQLite result store shared by workers (empty = disabled)
+    result_store_max_rows: int = 1_000_000  # Per table; the oldest rows beyond this are deleted (0 = no cap)
+    result_store_ttl_days: float = 30.0  # Rows older than this are deleted (0 = kept until the cap)
+    model_info_path: str = "./model_info.json"  # Metadata + reference sketches written by train_model.py
+    drift_monitor_enabled: bool = True
+    model_holdout_path: str = "./model_holdout.csv"  # Held-out rows written by train_model.py
+    shadow_model_path: str = ""  # Candidate model scored on sampled live traffic (empty = disabled)
+    shadow_sample_rate: float = 0.1
+    shadow_queue_max_rows: int = 100_000  # Rows waiting for the candidate; further samples are dropped
+    model_registry_dir: str = ""  # <dir>/<version>/model.pkl (empty = single MODEL_PATH model)
+    model_default_version: str = ""  # Registry version served when no X-Model-Version header is sent
+    model_pinned_versions: str = ""  # Comma-separated versions preloaded and never evicted
+    model_cache_max_versions: int = 3
+    model_cache_max_mb: float = 1024.0
+    model_admin_token: str = ""  # Callers sending this in X-Admin-Token may load model versions (empty = disabled)
+    model_eager_load: bool = True  # Load + warm the model at startup instead of on the first request
+    model_background_load: bool = False  # Start serving immediately; /ready is 503 until warm
+    app_profile: str = "dev"  # "production" mounts only predict/health/monitoring routes
+    inference_parallel_min_rows: int = 2000  # Below this, forests score on the calling thread
+    inference_rows_per_thread: int = 1000
+    inference_max_threads: int = 0  # 0 = CPU cores / WEB_CONCURRENCY
+    trace_file_path: str = ""  # Rotating OTLP/JSON lines file for sampled traces (empty = not written)
+    trace_sample_rate: float = 0.05
+    trace_slow_ms: float = 500.0  # Requests at least this slow are always written
+    trace_file_max_mb: float = 10.0
+    trace_file_backups: int = 5
+    trace_queue_size: int = 1000
+    admission_enabled: bool = True  # Run inference on a scheduled thread pool instead of the event loop
+    admission_workers: int = 2
+    admission_interactive_queue: int = 64
+    admission_bulk_queue: int = 8
+    admission_interactive_weight: int = 4  # Interactive tasks picked per bulk task when both wait
+    admission_bulk_weight: int = 1
+    admission_bulk_slice_rows: int = 2000  # Bulk scoring yields to interactive work between slices
+    grid_mode_enabled: bool = False  # Answer single predictions from a precomputed risk grid
+    grid_points_per_feature: int = 32
+    grid_points: str = ""  # Per-feature overrides, e.g. "attendance=21,internal_marks=21"
+    grid_validation_points: int = 20000
+    grid_max_error: float = 0.1  # Grid is only served if its sampled p99 risk error is within this
+    grid_min_category_agreement: float = 0.998  # ... and it keeps this share of sampled risk categories
+    uncertainty_interval: float = 0.8  # Central share of tree votes reported as the risk interval
+    permutation_importance_enabled: bool = True  # Compute permutation importance per model version in the background
+    permutation_importance_repeats: int = 30
+    permutation_importance_max_rows: int = 2000  # Held-out rows used (sampled when there are more)
+    permutation_importance_workers: int = 0  # Processes started per computation (0 = half the cores)
+    permutation_importance_retry_seconds: float = 300.0  # A failed computation is scheduled again after this
+    profile_token: str = ""  # Callers sending this in X-Profile-Token may profile requests (empty = disabled)
+    profile_top_n: int = 40  # Functions listed in a cProfile summary
+    profile_wall_interval_ms: float = 1.0  # Sampling interval of wall-clock request profiles
+    profiler_enabled: bool = True  # Low-frequency sampling profiler aggregating stacks (runs only with a profile_token)
+    profiler_sample_hz: float = 10.0
+    profiler_max_stacks: int = 10000  # Distinct stacks kept before new ones are counted as truncated
 
 
 settings = Settings()
 
 # Get model path from environment variable or use default
 MODEL_PATH = os.getenv("MODEL_PATH", settings.model_path)
+
+# Persistent prediction result store (shared by all uvicorn workers on the host)
+RESULT_STORE_PATH = os.getenv("RESULT_STORE_PATH", settings.result_store_path)
+RESULT_STORE_MAX_ROWS = int(os.getenv("RESULT_STORE_MAX_ROWS", settings.result_store_max_rows))
+RESULT_STORE_TTL_DAYS = float(os.getenv("RESULT_STORE_TTL_DAYS", settings.result_store_ttl_days))
+
+# Training metadata (feature lists, reference sketches for drift monitoring)
+MODEL_INFO_PATH = os.getenv("MODEL_INFO_PATH", settings.model_info_path)
+
+# Held-out labelled rows used for the model report (calibration, partial dependence)
+MODEL_HOLDOUT_PATH = os.getenv("MODEL_HOLDOUT_PATH", settings.model_holdout_path)
+
+DRIFT_MONITOR_ENABLED = os.getenv(
+    "DRIFT_MONITOR_ENABLED", str(settings.drift_monitor_enabled)
+).lower() in ("1", "true", "yes")
+
+# Shadow evaluation of a candidate model on a sample of live traffic
+SHADOW_MODEL_PATH = os.getenv("SHADOW_MODEL_PATH", settings.shadow_model_path)
+SHADOW_SAMPLE_RATE = float(os.getenv("SHADOW_SAMPLE_RATE", settings.shadow_sample_rate))
+SHADOW_QUEUE_MAX_ROWS = int(os.getenv("SHADOW_QUEUE_MAX_ROWS", settings.shadow_queue_max_rows))
+
+# Versioned model registry with an in-memory LRU of loaded versions
+MODEL_REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR", settings.model_registry_dir)
+MODEL_DEFAULT_VERSION = os.getenv("MODEL_DEFAULT_VERSION", settings.model_default_version)
+MODEL_PINNED_VERSIONS = ",".join(
+    v for v in [MODEL_DEFAULT_VERSION, os.getenv("MODEL_PINNED_VERSIONS", settings.model_pinned_versions)] if v
+)
+MODEL_CACHE_MAX_VERSIONS = int(os.getenv("MODEL_CACHE_MAX_VERSIONS", settings.model_cache_max_versions))
+MODEL_CACHE_MAX_MB = float(os.getenv("MODEL_CACHE_MAX_MB", settings.model_cache_max_mb))
+MODEL_ADMIN_TOKEN = os.getenv("MODEL_ADMIN_TOKEN", settings.model_admin_token)
+
+# Startup lifecycle: eager load + warmup, optionally in the background
+MODEL_EAGER_LOAD = os.getenv("MODEL_EAGER_LOAD", str(settings.model_eager_load)).lower() in ("1", "true", "yes")
+MODEL_BACKGROUND_LOAD = os.getenv(
+    "MODEL_BACKGROUND_LOAD", str(settings.model_background_load)
+).lower() in ("1", "true", "yes")
+
+# Application profile used by main.create_app()
+APP_PROFILE = os.getenv("APP_PROFILE", settings.app_profile)
+
+# Inference parallelism policy (see app/core/parallelism.py)
+INFERENCE_PARALLEL_MIN_ROWS = int(os.getenv("INFERENCE_PARALLEL_MIN_ROWS", settings.inference_parallel_min_rows))
+INFERENCE_ROWS_PER_THREAD = int(os.getenv("INFERENCE_ROWS_PER_THREAD", settings.inference_rows_per_thread))
+INFERENCE_MAX_THREADS = int(os.getenv("INFERENCE_MAX_THREADS", settings.inference_max_threads))
+
+# Request tracing (see app/core/tracing.py)
+TRACE_FILE_PATH = os.getenv("TRACE_FILE_PATH", settings.trace_file_path)
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", settings.trace_sample_rate))
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", settings.trace_slow_ms))
+TRACE_FILE_MAX_MB = float(os.getenv("TRACE_FILE_MAX_MB", settings.trace_file_max_mb))
+TRACE_FILE_BACKUPS = int(os.getenv("TRACE_FILE_BACKUPS", settings.trace_file_backups))
+TRACE_QUEUE_SIZE = int(os.getenv("TRACE_QUEUE_SIZE", settings.trace_queue_size))
+
+# Admission control and priority lanes (see app/core/admission.py)
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", str(settings.admission_enabled)).lower() in ("1", "true", "yes")
+ADMISSION_WORKERS = int(os.getenv("ADMISSION_WORKERS", settings.admission_workers))
+ADMISSION_INTERACTIVE_QUEUE = int(os.getenv("ADMISSION_INTERACTIVE_QUEUE", settings.admission_interactive_queue))
+ADMISSION_BULK_QUEUE = int(os.getenv("ADMISSION_BULK_QUEUE", settings.admission_bulk_queue))
+ADMISSION_INTERACTIVE_WEIGHT = int(os.getenv("ADMISSION_INTERACTIVE_WEIGHT", settings.admission_interactive_weight))
+ADMISSION_BULK_WEIGHT = int(os.getenv("ADMISSION_BULK_WEIGHT", settings.admission_bulk_weight))
+ADMISSION_BULK_SLICE_ROWS = int(os.getenv("ADMISSION_BULK_SLICE_ROWS", settings.admission_bulk_slice_rows))
+
+# Precomputed risk grid for interactive scoring (see app/services/risk_grid.py)
+GRID_MODE_ENABLED = os.getenv("GRID_MODE_ENABLED", str(settings.grid_mode_enabled)).lower() in ("1", "true", "yes")
+GRID_POINTS_PER_FEATURE = int(os.getenv("GRID_POINTS_PER_FEATURE", settings.grid_points_per_feature))
+GRID_POINTS = os.getenv("GRID_POINTS", settings.grid_points)
+GRID_VALIDATION_POINTS = int(os.getenv("GRID_VALIDATION_POINTS", settings.grid_validation_points))
+GRID_MAX_ERROR = float(os.getenv("GRID_MAX_ERROR", settings.grid_max_error))
+GRID_MIN_CATEGORY_AGREEMENT = float(os.getenv("GRID_MIN_CATEGORY_AGREEMENT", settings.grid_min_category_agreement))
+
+# Per-prediction uncertainty from the forest's tree votes
+UNCERTAINTY_INTERVAL = float(os.getenv("UNCERTAINTY_INTERVAL", settings.uncertainty_interval))
+
+# Permutation importance per model version (see app/services/permutation_importance.py)
+PERMUTATION_IMPORTANCE_ENABLED = os.getenv(
+    "PERMUTATION_IMPORTANCE_ENABLED", str(settings.permutation_importance_enabled)
+).lower() in ("1", "true", "yes")
+PERMUTATION_IMPORTANCE_REPEATS = int(os.getenv("PERMUTATION_IMPORTANCE_REPEATS", settings.permutation_importance_repeats))
+PERMUTATION_IMPORTANCE_MAX_ROWS = int(os.getenv("PERMUTATION_IMPORTANCE_MAX_ROWS", settings.permutation_importance_max_rows))
+PERMUTATION_IMPORTANCE_WORKERS = int(os.getenv("PERMUTATION_IMPORTANCE_WORKERS", settings.permutation_importance_workers))
+PERMUTATION_IMPORTANCE_RETRY_SECONDS = float(
+    os.getenv("PERMUTATION_IMPORTANCE_RETRY_SECONDS", settings.permutation_importance_retry_seconds)
+)
+
+# Request profiling and the continuous sampling profiler (see app/core/profiling.py)
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", settings.profile_token)
+PROFILE_TOP_N = int(os.getenv("PROFILE_TOP_N", settings.profile_top_n))
+PROFILE_WALL_INTERVAL_MS = float(os.getenv("PROFILE_WALL_INTERVAL_MS", settings.profile_wall_interval_ms))
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", str(settings.profiler_enabled)).lower() in ("1", "true", "yes")
+PROFILER_SAMPLE_HZ = float(os.getenv("PROFILER_SAMPLE_HZ", settings.profiler_sample_hz))
+PROFILER_MAX_STACKS = int(os.getenv("PROFILER_MAX_STACKS", settings.profiler_max_stacks))
@@ -0,0 +1,33 @@
+from typing import Any
+import hashlib
+import json
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+
+def json_etag(payload: Any, weak: bool = False) -> str:
+    """
+    ETag for a JSON-serialisable payload.
+
+    weak=True gives a weak validator (W/"..."), for responses that are
+    equivalent whenever payload is equal but may differ in incidental
+    fields such as generation timestamps.
+    """
+    body = json.dumps(payload, sort_keys=True, default=str, separators=(",", ":"))
+    tag = '"' + hashlib.sha1(body.encode("utf-8")).hexdigest() + '"'
+    return "W/" + tag if weak else tag
+
+
+def cached_json_response(request: Request, payload: Any, etag: str = None) -> Response:
+    """
+    Serve a cached JSON payload with ETag / If-None-Match support.
+
+    Returns 304 with an empty body when the client already has this version.
+    """
+    etag = etag or json_etag(payload)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=payload, headers=headers)
@@ -0,0 +1,120 @@
+from typing import Any, Dict, Optional
+import logging
+import threading
+import time
+import traceback
+
+from app.core.config import MODEL_BACKGROUND_LOAD, MODEL_DEFAULT_VERSION, MODEL_EAGER_LOAD, MODEL_PATH
+from app.core.model_loader import DummyModel, get_model, get_model_hash
+from app.core.model_registry import get_model_registry
+from app.core.profiling import get_stack_sampler
+
+logger = logging.getLogger(__name__)
+
+
+class StartupState:
+    """Progress of this worker's model load and warmup, reported by /ready."""
+
+    def __init__(self):
+        self.phase = "starting"
+        self.error: Optional[str] = None
+        self.started_at = time.time()
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+        self.ready_at: Optional[float] = None
+        self.is_dummy_model: Optional[bool] = None
+        self.model_hash: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.phase == "ready"
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "status": self.phase,
+            "error": self.error,
+            "eager_load": MODEL_EAGER_LOAD,
+            "background_load": MODEL_BACKGROUND_LOAD,
+            "model_hash": self.model_hash,
+            "is_dummy_model": self.is_dummy_model,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "seconds_to_ready": (self.ready_at - self.started_at) if self.ready_at else None,
+        }
+
+
+state = StartupState()
+
+
+def _load_and_warm(analysis: bool) -> None:
+    # Imported here: the services are only needed once a model is loaded
+    from app.services.drift_monitor import get_drift_monitor
+    from app.services.permutation_importance import ensure_permutation_importance
+    from app.services.predictor import warmup
+    from app.services.result_store import get_result_store
+    from app.services.risk_grid import ensure_risk_grid
+    from app.services.shadow import get_shadow_evaluator
+
+    try:
+        state.phase = "loading"
+        start = time.perf_counter()
+        model = get_model()
+        state.model_hash = get_model_hash()
+        state.is_dummy_model = isinstance(model, DummyModel)
+        store = get_result_store()
+        if store is not None and not state.is_dummy_model:
+            store.set_current_model(state.model_hash)
+        registry = get_model_registry()
+        if registry is not None and MODEL_DEFAULT_VERSION:
+            # Pinned versions are already loading in the background; wait for the default
+            future = registry.preload(MODEL_DEFAULT_VERSION)
+            if future is not None:
+                future.result()
+        state.load_seconds = time.perf_counter() - start
+        logger.info(f"Model loaded in {state.load_seconds:.2f}s")
+
+        state.phase = "warming"
+        start = time.perf_counter()
+        warmup()
+        ensure_risk_grid(model)
+        if analysis:
+            from app.services.model_report import get_model_report
+
+            get_model_report(model, state.model_hash)
+        ensure_permutation_importance(MODEL_PATH, state.model_hash)
+        get_drift_monitor()
+        get_shadow_evaluator()
+        state.warmup_seconds = time.perf_counter() - start
+        logger.info(f"Warmup finished in {state.warmup_seconds:.2f}s")
+
+        state.phase = "ready"
+        state.ready_at = time.time()
+        logger.info(f"✅ Worker ready {state.ready_at - state.started_at:.2f}s after startup")
+    except Exception as e:
+        state.phase = "failed"
+        state.error = str(e)
+        logger.error(f"❌ Startup failed: {e}")
+        logger.error(f"Traceback: {traceback.format_exc()}")
+
+
+def startup(analysis: bool = False) -> None:
+    """
+    Load and warm the model according to MODEL_EAGER_LOAD / MODEL_BACKGROUND_LOAD.
+
+    analysis=True also builds the model report, which only the dev
+    profile's analysis and diagnostic routes serve.
+
+    Eager (default): blocks application startup until the worker is warm.
+    Background: returns immediately and /ready reports 503 until warm.
+    Lazy (MODEL_EAGER_LOAD=false): previous behaviour, the first request loads the model.
+    """
+    get_stack_sampler()
+    if not MODEL_EAGER_LOAD:
+        get_model_registry()
+        state.phase = "ready"
+        state.ready_at = time.time()
+        return
+    if MODEL_BACKGROUND_LOAD:
+        threading.Thread(target=_load_and_warm, args=(analysis,), name="model-startup", daemon=True).start()
+    else:
+        _load_and_warm(analysis)
@@ -1,11 +1,14 @@
 from functools import lru_cache
-from typing import Any
+from typing import Any, Dict
+import hashlib
 import os
 import joblib
 import logging
+import numpy as np
 import traceback
 
 from app.core.config import MODEL_PATH
+from app.core.parallelism import make_sequential
 
 logger = logging.getLogger(__name__)
 
@@ -17,52 +20,56 @@ class DummyModel:
     - Low attendance (< 70%) = higher risk
     - Low study hours (< 15) = higher risk
     - Low assignments (< 5) = higher risk
+
+    Probabilities and classes follow the trained pipeline: columns are
+    [P(Fail), P(Pass)] and class 0 = Fail, 1 = Pass.
     """
 
+    # Prepared feature names the heuristic reads, with the value assumed when missing
+    FEATURES = ("attendance", "study_hours", "assignments_submitted")
+    _DEFAULTS = {"attendance": 75.0, "study_hours": 20.0, "assignments_submitted": 8.0}
+    _SCALE = {"attendance": 100.0, "study_hours": 40.0, "assignments_submitted": 15.0}
+    _WEIGHTS = {"attendance": 0.4, "study_hours": 0.35, "assignments_submitted": 0.25}
+    classes_ = np.array([0, 1])
+
+    @classmethod
+    def risk(cls, columns: Dict[str, Any]) -> np.ndarray:
+        """Risk score (0 = safe, 1 = critical) for every row of a column mapping, in one pass."""
+        n = len(next(iter(columns.values()))) if columns else 0
+        score = np.zeros(n)
+        for name in cls.FEATURES:
+            values = np.asarray(columns.get(name, np.full(n, np.nan)), dtype=float)
+            values = np.where(np.isnan(values), cls._DEFAULTS[name], values)
+            # Lower values = higher risk
+            score += cls._WEIGHTS[name] * np.clip(values, 0, cls._SCALE[name]) / cls._SCALE[name]
+        return np.clip(1 - score, 0.0, 1.0)
+
+    @classmethod
+    def _columns(cls, X) -> Dict[str, Any]:
+        if hasattr(X, "columns"):
+            return {name: X[name].to_numpy(dtype=float) for name in cls.FEATURES if name in X.columns}
+        # A list of feature dicts; requests may still say assignments_completed
+        rows = [row if isinstance(row, dict) else {} for row in X]
+        columns = {}
+        for name in cls.FEATURES:
+            values = [row.get(name) for row in rows]
+            if name == "assignments_submitted":
+                values = [v if v is not None else row.get("assignments_completed") for v, row in zip(values, rows)]
+            columns[name] = np.array(values, dtype=float)
+        return columns
+
     def predict_proba(self, X):
-        # X is expected to be a list of dicts
-        results = []
-        for features in X:
-            if isinstance(features, dict):
-                # Calculate risk based on input features
-                attendance = features.get('attendance', 75)
-                study_hours = features.get('study_hours', 20)
-                assignments_completed = features.get('assignments_completed', 8)
-                
-                # Normalize values
-                attendance_norm = max(0, min(100, attendance)) / 100
-                study_hours_norm = max(0, min(40, study_hours)) / 40
-                assignments_norm = max(0, min(15, assignments_completed)) / 15
-                
-                # Calculate risk score (0 = safe, 1 = critical)
-                # Lower values = higher risk
-                risk_score = 1 - ((attendance_norm * 0.4 + study_hours_norm * 0.35 + assignments_norm * 0.25))
-                
-                # Ensure risk score is between 0 and 1
-                risk_score = max(0.0, min(1.0, risk_score))
-                
-                # Return probabilities: [normal_prob, risk_prob]
-                # For Random Forest: [Fail_prob, Pass_prob]
-                normal_prob = 1 - risk_score
-                risk_prob = risk_score
-                results.append([normal_prob, risk_prob])
-            else:
-                # Fallback for unexpected format
-                results.append([0.2, 0.8])
-        return results
+        """[P(Fail), P(Pass)] per row of a DataFrame or a list of feature dicts."""
+        risk = self.risk(self._columns(X))
+        return np.column_stack([risk, 1 - risk])
 
     def predict(self, X):
         """Predict class labels (0 = Fail, 1 = Pass)"""
-        probs = self.predict_proba(X)
-        return [1 if prob[1] > 0.5 else 0 for prob in probs]
+        return np.where(self.predict_proba(X)[:, 0] > 0.5, 0, 1)
 
     def get_feature_importance(self):
         """Return dummy feature importance"""
-        return {
-            'attendance': 0.4,
-            'study_hours': 0.35,
-            'assignments_completed': 0.25
-        }
+        return dict(self._WEIGHTS)
 
 
 def _load_model_uncached() -> Any:
@@ -84,6 +91,8 @@ def _load_model_uncached() -> Any:
                 if 'clf' in model.named_steps:
                     clf_type = type(model.named_steps['clf']).__name__
                     logger.info(f"Classifier type: {clf_type}")
+                # Parallelism is decided per call by app.core.parallelism, not by the pickled n_jobs
+                make_sequential(model)
             
             return model
         else:
@@ -109,3 +118,24 @@ def get_model() -> Any:
         Falls back to DummyModel if model file is not found.
     """
     return _load_model_uncached()
+
+
+
+@lru_cache(maxsize=1)
+def get_model_hash() -> str:
+    """
+    Content hash of the loaded model artifact (cached).
+
+    Used to key anything derived from the model's predictions, so a
+    retrained model.pkl never serves results produced by an older one.
+
+    Returns:
+        Hex sha256 of the model file, or "dummy" when the fallback model is used.
+    """
+    if isinstance(get_model(), DummyModel):
+        return "dummy"
+    digest = hashlib.sha256()
+    with open(MODEL_PATH, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
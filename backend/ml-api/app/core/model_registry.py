@@ -0,0 +1,293 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import logging
+import os
+import threading
+import time
+import traceback
+
+import joblib
+
+from app.core.config import (
+    MODEL_CACHE_MAX_MB,
+    MODEL_CACHE_MAX_VERSIONS,
+    MODEL_PINNED_VERSIONS,
+    MODEL_REGISTRY_DIR,
+)
+from app.core.parallelism import make_sequential
+from app.services.permutation_importance import ensure_permutation_importance
+
+logger = logging.getLogger(__name__)
+
+MODEL_FILENAME = "model.pkl"
+
+
+class ModelNotFoundError(Exception):
+    """The requested model version does not exist in the registry."""
+
+
+class ModelNotReadyError(Exception):
+    """The requested model version is known but not resident yet (it is being loaded)."""
+
+    def __init__(self, version: str, retry_after: int = 2):
+        super().__init__(f"Model version '{version}' is loading, retry in {retry_after}s")
+        self.version = version
+        self.retry_after = retry_after
+
+
+class ModelLoadError(Exception):
+    """The requested model version failed to load; it is retried only once its artifact changes."""
+
+    def __init__(self, version: str, error: str):
+        super().__init__(f"Model version '{version}' failed to load: {error}")
+        self.version = version
+        self.error = error
+
+
+class LoadedModel:
+    """A resident model version and its bookkeeping."""
+
+    def __init__(self, version: str, model: Any, model_hash: str, size_bytes: int,
+                 load_seconds: float, warmup_seconds: float):
+        self.version = version
+        self.model = model
+        self.model_hash = model_hash
+        self.size_bytes = size_bytes
+        self.load_seconds = load_seconds
+        self.warmup_seconds = warmup_seconds
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+        self.hits = 0
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "model_hash": self.model_hash,
+            "size_mb": round(self.size_bytes / (1024 * 1024), 2),
+            "load_seconds": round(self.load_seconds, 3),
+            "warmup_seconds": round(self.warmup_seconds, 3),
+            "loaded_at": self.loaded_at,
+            "last_used": self.last_used,
+            "hits": self.hits,
+        }
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _mtime(path: str) -> Optional[float]:
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+def _warmup(model: Any) -> None:
+    """Run synthetic predictions so first-call costs are paid off the request path."""
+    # Imported here: the predictor imports this module
+    from app.services.inference import inference_backend
+    from app.services.predictor import _predict_rows
+    from app.services.risk_grid import ensure_risk_grid
+
+    row = {name: ('low' if name == 'activities' else 50.0) for name in inference_backend(model).features}
+    _predict_rows(model, [row])
+    _predict_rows(model, [row] * 64)
+    ensure_risk_grid(model)
+
+
+class ModelRegistry:
+    """
+    Versioned model artifacts with a bounded in-memory LRU.
+
+    Layout::
+
+        <MODEL_REGISTRY_DIR>/<version>/model.pkl
+        <MODEL_REGISTRY_DIR>/<version>/model_holdout.csv (optional, for permutation importance)
+
+    Every version shares the feature schema and drift reference of
+    MODEL_INFO_PATH. Loads and warmups always happen on a single background thread. A request
+    for a version that is not resident schedules its load and fails fast with
+    ModelNotReadyError, so switching versions never blocks a request on
+    joblib. A version whose load failed raises ModelLoadError until its
+    artifact's mtime changes. Pinned versions are preloaded and never evicted.
+    """
+
+    def __init__(self, root: str, max_versions: int, max_bytes: int, pinned: List[str]):
+        self.root = root
+        self.max_versions = max(1, max_versions)
+        self.max_bytes = max_bytes
+        self.pinned = [v for v in pinned if v]
+        self._resident: "OrderedDict[str, LoadedModel]" = OrderedDict()
+        self._loading: Dict[str, Any] = {}
+        # Load failures: message and the artifact mtime it was read at
+        self._errors: Dict[str, Tuple[str, float]] = {}
+        self._evictions = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-loader")
+        for version in self.pinned:
+            try:
+                self.preload(version)
+            except ModelNotFoundError as e:
+                logger.warning(f"Pinned model version not preloaded: {e}")
+
+    def versions(self) -> List[str]:
+        """All versions present on disk (directories containing a model.pkl)."""
+        try:
+            names = sorted(os.listdir(self.root))
+        except OSError:
+            return []
+        return [
+            name for name in names
+            if os.path.isfile(os.path.join(self.root, name, MODEL_FILENAME))
+        ]
+
+    def artifact_path(self, version: str) -> str:
+        if not version or os.path.basename(version) != version or version.startswith("."):
+            raise ModelNotFoundError(f"Invalid model version '{version}'")
+        path = os.path.join(self.root, version, MODEL_FILENAME)
+        if not os.path.isfile(path):
+            raise ModelNotFoundError(f"Model version '{version}' not found in {self.root}")
+        return path
+
+    def get(self, version: str) -> LoadedModel:
+        """
+        Return a resident model version, never loading on the caller's thread.
+
+        Raises:
+            ModelNotFoundError: version does not exist
+            ModelNotReadyError: version exists but is still being loaded
+            ModelLoadError: the version's artifact failed to load and has not changed since
+        """
+        with self._lock:
+            entry = self._resident.get(version)
+            if entry is not None:
+                self._resident.move_to_end(version)
+                entry.last_used = time.time()
+                entry.hits += 1
+                return entry
+        self.artifact_path(version)
+        self.preload(version)
+        raise ModelNotReadyError(version)
+
+    def preload(self, version: str):
+        """
+        Schedule a background load + warmup of a version (no-op if resident or loading).
+
+        Raises:
+            ModelNotFoundError: version does not exist
+            ModelLoadError: the last load failed and the artifact is unchanged
+        """
+        path = self.artifact_path(version)
+        with self._lock:
+            if version in self._resident:
+                return None
+            future = self._loading.get(version)
+            if future is None:
+                error = self._errors.get(version)
+                if error is not None:
+                    if _mtime(path) == error[1]:
+                        raise ModelLoadError(version, error[0])
+                    logger.info(f"Model version '{version}' changed on disk since it failed to load; retrying")
+                    del self._errors[version]
+                future = self._executor.submit(self._load, version)
+                self._loading[version] = future
+            return future
+
+    def _load(self, version: str) -> None:
+        path = self.artifact_path(version)
+        # Read before loading: an artifact replaced mid-load counts as changed
+        mtime = _mtime(path)
+        try:
+            start = time.perf_counter()
+            model = make_sequential(joblib.load(path))
+            load_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            _warmup(model)
+            warmup_seconds = time.perf_counter() - start
+
+            # The artifact is the pickled forest, whose numpy buffers dominate its footprint
+            size_bytes = os.path.getsize(path)
+            entry = LoadedModel(version, model, _file_sha256(path), size_bytes, load_seconds, warmup_seconds)
+            with self._lock:
+                self._resident[version] = entry
+                self._errors.pop(version, None)
+                self._evict_locked(keep=version)
+            logger.info(
+                f"✅ Model version '{version}' loaded in {load_seconds:.2f}s, "
+                f"warmed in {warmup_seconds:.2f}s ({entry.size_bytes / (1024 * 1024):.1f} MB)"
+            )
+            ensure_permutation_importance(path, entry.model_hash)
+        except Exception as e:
+            with self._lock:
+                self._errors[version] = (str(e), mtime)
+            logger.error(f"❌ Error loading model version '{version}': {e}")
+            logger.error(f"Traceback: {traceback.format_exc()}")
+        finally:
+            with self._lock:
+                self._loading.pop(version, None)
+
+    def _evict_locked(self, keep: str) -> None:
+        def over_budget() -> bool:
+            total = sum(e.size_bytes for e in self._resident.values())
+            return len(self._resident) > self.max_versions or total > self.max_bytes
+
+        for version in list(self._resident.keys()):
+            if not over_budget():
+                break
+            if version in self.pinned or version == keep:
+                continue
+            self._resident.pop(version)
+            self._evictions += 1
+            logger.info(f"Evicted model version '{version}' from memory")
+
+    def describe(self) -> Dict[str, Any]:
+        with self._lock:
+            resident = [entry.describe() for entry in self._resident.values()]
+            loading = list(self._loading.keys())
+            errors = {version: message for version, (message, _) in self._errors.items()}
+            evictions = self._evictions
+        return {
+            "registry_dir": os.path.abspath(self.root),
+            "available_versions": self.versions(),
+            "pinned_versions": self.pinned,
+            "resident": resident,
+            "loading": loading,
+            "load_errors": errors,
+            "evictions": evictions,
+            "memory_used_mb": round(sum(e["size_mb"] for e in resident), 2),
+            "memory_budget_mb": round(self.max_bytes / (1024 * 1024), 2),
+            "max_versions": self.max_versions,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_model_registry() -> Optional[ModelRegistry]:
+    """
+    Model registry for this worker (cached).
+
+    Returns:
+        ModelRegistry when MODEL_REGISTRY_DIR is configured, else None
+    """
+    if not MODEL_REGISTRY_DIR:
+        return None
+    if not os.path.isdir(MODEL_REGISTRY_DIR):
+        logger.warning(f"Model registry directory {MODEL_REGISTRY_DIR} does not exist. Registry disabled.")
+        return None
+    pinned = [v.strip() for v in MODEL_PINNED_VERSIONS.split(",") if v.strip()]
+    registry = ModelRegistry(
+        MODEL_REGISTRY_DIR,
+        max_versions=MODEL_CACHE_MAX_VERSIONS,
+        max_bytes=int(MODEL_CACHE_MAX_MB * 1024 * 1024),
+        pinned=pinned,
+    )
+    logger.info(f"Model registry at {os.path.abspath(MODEL_REGISTRY_DIR)}: {registry.versions()}")
+    return registry
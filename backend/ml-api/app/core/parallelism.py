@@ -0,0 +1,145 @@
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+import logging
+import math
+import os
+import threading
+import time
+
+from joblib import parallel_config
+
+from app.core.config import (
+    INFERENCE_MAX_THREADS,
+    INFERENCE_PARALLEL_MIN_ROWS,
+    INFERENCE_ROWS_PER_THREAD,
+)
+
+logger = logging.getLogger(__name__)
+
+# Row-count buckets reported by /monitoring/inference
+_BUCKETS = (1, 10, 100, 1000, 10000, 100000)
+
+
+def _default_max_threads() -> int:
+    """Cores available to this worker: CPU count shared across uvicorn workers."""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    workers = max(1, int(os.getenv("WEB_CONCURRENCY", "1") or 1))
+    return max(1, cores // workers)
+
+
+def make_sequential(model: Any) -> Any:
+    """
+    Drop the n_jobs pickled into a forest at training time.
+
+    train_model.py fits with n_jobs=-1, which would make every predict_proba
+    fan out over all cores. With n_jobs=None scoring runs on the calling
+    thread unless inference_threads() opens a joblib context for a large batch.
+    """
+    steps = getattr(model, 'named_steps', None)
+    clf = steps.get('clf') if steps is not None else model
+    if clf is not None and hasattr(clf, 'n_jobs'):
+        clf.n_jobs = None
+    return model
+
+
+class ParallelismPolicy:
+    """
+    Chooses how many threads a forest uses for one scoring call.
+
+    Small inputs (the single-row and typical batch paths) run sequentially:
+    dispatching a few rows to a thread pool costs more than it saves and
+    competes with the other uvicorn workers. From min_rows upwards one
+    thread is used per rows_per_thread rows, up to max_threads.
+    """
+
+    def __init__(self, min_rows: int, rows_per_thread: int, max_threads: int):
+        self.min_rows = max(1, min_rows)
+        self.rows_per_thread = max(1, rows_per_thread)
+        self.max_threads = max_threads if max_threads > 0 else _default_max_threads()
+        self._lock = threading.Lock()
+        self._calls = {"sequential": 0, "parallel": 0}
+        self._rows = {"sequential": 0, "parallel": 0}
+        self._seconds = {"sequential": 0.0, "parallel": 0.0}
+        self._threads: Dict[int, int] = {}
+        self._buckets: Dict[str, Dict[str, int]] = {
+            label: {"sequential": 0, "parallel": 0}
+            for label in [f"<={upper}" for upper in _BUCKETS] + [f">{_BUCKETS[-1]}"]
+        }
+
+    def threads_for(self, n_rows: int) -> int:
+        if n_rows < self.min_rows or self.max_threads <= 1:
+            return 1
+        return max(1, min(self.max_threads, math.ceil(n_rows / self.rows_per_thread)))
+
+    def _bucket(self, n_rows: int) -> str:
+        for upper in _BUCKETS:
+            if n_rows <= upper:
+                return f"<={upper}"
+        return f">{_BUCKETS[-1]}"
+
+    def record(self, n_rows: int, threads: int, seconds: float) -> None:
+        mode = "parallel" if threads > 1 else "sequential"
+        with self._lock:
+            self._calls[mode] += 1
+            self._rows[mode] += n_rows
+            self._seconds[mode] += seconds
+            self._threads[threads] = self._threads.get(threads, 0) + 1
+            self._buckets[self._bucket(n_rows)][mode] += 1
+
+    def describe(self) -> Dict[str, Any]:
+        with self._lock:
+            modes = {
+                mode: {
+                    "calls": self._calls[mode],
+                    "rows": self._rows[mode],
+                    "seconds": round(self._seconds[mode], 4),
+                    "rows_per_second": round(self._rows[mode] / self._seconds[mode], 1)
+                    if self._seconds[mode] > 0 else None,
+                }
+                for mode in self._calls
+            }
+            return {
+                "policy": {
+                    "parallel_min_rows": self.min_rows,
+                    "rows_per_thread": self.rows_per_thread,
+                    "max_threads": self.max_threads,
+                },
+                "modes": modes,
+                "calls_by_threads": {str(k): v for k, v in sorted(self._threads.items())},
+                "calls_by_rows": dict(self._buckets),
+            }
+
+
+policy = ParallelismPolicy(INFERENCE_PARALLEL_MIN_ROWS, INFERENCE_ROWS_PER_THREAD, INFERENCE_MAX_THREADS)
+
+
+@contextmanager
+def inference_threads(n_rows: int, request_rows: Optional[int] = None):
+    """
+    Scope one scoring call under the policy and record it in the metrics.
+
+    joblib's parallel_config is thread-local, so concurrent requests each get
+    their own thread count without touching the shared model object.
+
+    Args:
+        n_rows: Rows scored by this call
+        request_rows: Rows of the whole request when it is scored in slices;
+            the thread count is chosen from these, so every slice of a large
+            batch runs with the same threads as an unsliced call would
+
+    Yields:
+        Number of threads chosen for this call
+    """
+    threads = policy.threads_for(request_rows if request_rows is not None else n_rows)
+    start = time.perf_counter()
+    try:
+        if threads == 1:
+            yield threads
+        else:
+            with parallel_config(backend="threading", n_jobs=threads):
+                yield threads
+    finally:
+        policy.record(n_rows, threads, time.perf_counter() - start)
@@ -0,0 +1,310 @@
+from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+import cProfile
+import hmac
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+
+from app.core.config import (
+    PROFILE_TOKEN,
+    PROFILE_TOP_N,
+    PROFILE_WALL_INTERVAL_MS,
+    PROFILER_ENABLED,
+    PROFILER_MAX_STACKS,
+    PROFILER_SAMPLE_HZ,
+)
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+PROFILE_TOKEN_HEADER = "x-profile-token"
+MODES = ("cprofile", "wall")
+
+# Wall-clock tree nodes below this share of the samples are folded away
+_MIN_TREE_SHARE = 0.01
+# Leaf frames of threads that are waiting, not working
+_IDLE_FILES = ("threading.py", "selectors.py", "queue.py")
+
+_current: ContextVar[Optional["RequestProfile"]] = ContextVar("request_profile", default=None)
+
+
+def token_allowed(token: Optional[str]) -> bool:
+    """True if profiling is configured and the token matches PROFILE_TOKEN."""
+    return bool(PROFILE_TOKEN) and token is not None and hmac.compare_digest(token, PROFILE_TOKEN)
+
+
+def _frame_name(frame) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}"
+
+
+def _short_path(path: str) -> str:
+    for marker in ("site-packages" + os.sep, os.getcwd() + os.sep):
+        if marker in path:
+            return path.split(marker, 1)[1]
+    return path
+
+
+class RequestProfile:
+    """
+    Profile of the handler work of one request.
+
+    "cprofile" runs the predictor under cProfile; "wall" samples the stack of
+    the thread running it every PROFILE_WALL_INTERVAL_MS and builds a
+    call tree of where wall time went (including waits on locks and I/O).
+    """
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.seconds = 0.0
+        self._profiler = cProfile.Profile() if mode == "cprofile" else None
+        self._tree: Dict[str, Any] = {"samples": 0, "children": {}}
+
+    def run(self, fn: Callable[[], Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            if self._profiler is not None:
+                return self._profiler.runcall(fn)
+            return self._run_wall(fn)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+    def _run_wall(self, fn: Callable[[], Any]) -> Any:
+        target = threading.get_ident()
+        marker = sys._getframe()
+        done = threading.Event()
+        interval = max(0.0001, PROFILE_WALL_INTERVAL_MS / 1000)
+
+        def sample():
+            while not done.wait(interval):
+                frame = sys._current_frames().get(target)
+                stack = []
+                while frame is not None and frame is not marker:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                if frame is None:
+                    continue  # marker not on the stack: fn has returned
+                node = self._tree
+                node["samples"] += 1
+                # Outermost first, starting at fn's own frame
+                for name in reversed(stack):
+                    node = node["children"].setdefault(name, {"samples": 0, "children": {}})
+                    node["samples"] += 1
+
+        sampler = threading.Thread(target=sample, name="request-profiler", daemon=True)
+        sampler.start()
+        try:
+            return fn()
+        finally:
+            done.set()
+            sampler.join()
+
+    def _tree_summary(self, node: Dict[str, Any], total: int, ms_per_sample: float) -> List[Dict[str, Any]]:
+        children = sorted(node["children"].items(), key=lambda item: item[1]["samples"], reverse=True)
+        return [
+            {
+                "function": name,
+                "ms": round(child["samples"] * ms_per_sample, 2),
+                "percent": round(100 * child["samples"] / total, 1),
+                "children": self._tree_summary(child, total, ms_per_sample),
+            }
+            for name, child in children
+            if child["samples"] >= total * _MIN_TREE_SHARE
+        ]
+
+    def summary(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {"mode": self.mode, "handler_ms": round(self.seconds * 1000, 2)}
+        if self._profiler is not None:
+            self._profiler.create_stats()
+            if not self._profiler.stats:
+                # Rejected before the handler ran (validation error, 429, ...)
+                result.update({"total_calls": 0, "functions": []})
+                return result
+            stats = pstats.Stats(self._profiler).sort_stats("cumulative")
+            functions = []
+            for func in stats.fcn_list[:PROFILE_TOP_N]:
+                primitive_calls, calls, tottime, cumtime, _ = stats.stats[func]
+                path, line, name = func
+                functions.append({
+                    "function": f"{_short_path(path)}:{line}({name})" if line else name,
+                    "calls": calls,
+                    "primitive_calls": primitive_calls,
+                    "tottime_ms": round(tottime * 1000, 3),
+                    "cumtime_ms": round(cumtime * 1000, 3),
+                })
+            result.update({"total_calls": stats.total_calls, "functions": functions})
+        else:
+            total = self._tree["samples"]
+            ms_per_sample = self.seconds * 1000 / total if total else 0.0
+            result.update({
+                "samples": total,
+                "interval_ms": PROFILE_WALL_INTERVAL_MS,
+                "call_tree": self._tree_summary(self._tree, total, ms_per_sample) if total else [],
+            })
+        return result
+
+
+def profiled(fn: Callable[[], Any]) -> Any:
+    """Run fn, under the current request's profile if it asked for one."""
+    profile = _current.get()
+    if profile is None:
+        return fn()
+    return profile.run(fn)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware for on-demand request profiles.
+
+    A request with ``X-Profile: cprofile`` (or ``wall``) and a matching
+    ``X-Profile-Token`` has its handler work profiled, and its JSON
+    response is wrapped as ``{"profile": {...}, "response": <original>}``.
+    Without a valid token the header is ignored and the response carries
+    ``X-Profile: denied``.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope.get("headers", [])}
+        mode = headers.get(PROFILE_HEADER, "").strip().lower()
+        if not mode:
+            await self.app(scope, receive, send)
+            return
+        if mode not in MODES or not token_allowed(headers.get(PROFILE_TOKEN_HEADER)):
+            async def send_denied(message):
+                if message["type"] == "http.response.start":
+                    message = {**message, "headers": list(message.get("headers", [])) + [(b"x-profile", b"denied")]}
+                await send(message)
+
+            await self.app(scope, receive, send_denied)
+            return
+
+        profile = RequestProfile(mode)
+        token = _current.set(profile)
+        start_message: Dict[str, Any] = {}
+        body = bytearray()
+
+        async def send_buffered(message):
+            if message["type"] == "http.response.start":
+                start_message.update(message)
+            elif message["type"] == "http.response.body":
+                body.extend(message.get("body", b""))
+                if not message.get("more_body", False):
+                    await self._send_wrapped(send, start_message, bytes(body), profile)
+            else:
+                await send(message)
+
+        try:
+            await self.app(scope, receive, send_buffered)
+        finally:
+            _current.reset(token)
+
+    @staticmethod
+    async def _send_wrapped(send, start_message: Dict[str, Any], body: bytes, profile: RequestProfile) -> None:
+        headers = [(k, v) for k, v in start_message.get("headers", []) if k.lower() != b"content-length"]
+        content_type = dict(headers).get(b"content-type", b"")
+        if content_type.startswith(b"application/json") and body:
+            payload = {"profile": profile.summary(), "response": json.loads(body)}
+            body = json.dumps(payload).encode("utf-8")
+        headers += [(b"content-length", str(len(body)).encode("latin-1")), (b"x-profile", profile.mode.encode())]
+        await send({**start_message, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+class StackSampler:
+    """
+    Always-on, low-frequency sampling profiler.
+
+    A daemon thread samples every other thread's stack PROFILER_SAMPLE_HZ
+    times per second and counts each distinct busy stack. Threads waiting
+    in threading/queue/selectors are counted as idle, not recorded. The
+    counts are served as collapsed stacks ("thread;frame;frame count"),
+    the input format of flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, hz: float, max_stacks: int):
+        self.interval = 1.0 / max(0.1, hz)
+        self.max_stacks = max(1, max_stacks)
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+        self.samples = 0
+        self.idle = 0
+        self.truncated = 0
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            frames = sys._current_frames()
+            with self._lock:
+                for ident, frame in frames.items():
+                    if ident == own:
+                        continue
+                    self.samples += 1
+                    if frame.f_code.co_filename.endswith(_IDLE_FILES):
+                        self.idle += 1
+                        continue
+                    stack = []
+                    while frame is not None:
+                        stack.append(_frame_name(frame))
+                        frame = frame.f_back
+                    key = ";".join([names.get(ident, str(ident))] + stack[::-1])
+                    if key in self._counts or len(self._counts) < self.max_stacks:
+                        self._counts[key] += 1
+                    else:
+                        self.truncated += 1
+
+    def collapsed(self) -> str:
+        with self._lock:
+            lines = [f"{stack} {count}" for stack, count in self._counts.most_common()]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+            self.samples = self.idle = self.truncated = 0
+            self.started_at = time.time()
+
+    def describe(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sample_hz": round(1.0 / self.interval, 2),
+                "since": self.started_at,
+                "samples": self.samples,
+                "idle_samples": self.idle,
+                "distinct_stacks": len(self._counts),
+                "truncated_samples": self.truncated,
+                "pid": os.getpid(),
+            }
+
+
+@lru_cache(maxsize=1)
+def get_stack_sampler() -> Optional[StackSampler]:
+    """
+    Sampling profiler for this worker (cached), started on first use.
+
+    Nothing can read the samples without a PROFILE_TOKEN, so the sampler
+    only runs when one is configured.
+
+    Returns:
+        StackSampler, or None when PROFILER_ENABLED is false or PROFILE_TOKEN is unset
+    """
+    if not PROFILER_ENABLED or not PROFILE_TOKEN:
+        return None
+    logger.info(f"Sampling profiler running at {PROFILER_SAMPLE_HZ} Hz")
+    return StackSampler(PROFILER_SAMPLE_HZ, PROFILER_MAX_STACKS)
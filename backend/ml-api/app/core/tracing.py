@@ -0,0 +1,272 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+import uuid
+
+from app.core.config import (
+    TRACE_FILE_BACKUPS,
+    TRACE_FILE_MAX_MB,
+    TRACE_FILE_PATH,
+    TRACE_QUEUE_SIZE,
+    TRACE_SAMPLE_RATE,
+    TRACE_SLOW_MS,
+)
+
+logger = logging.getLogger(__name__)
+
+CORRELATION_HEADER = "x-correlation-id"
+_TRACEPARENT = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$")
+_SERVICE_NAME = "ml-api"
+
+_current: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+
+
+def _span_id() -> str:
+    return os.urandom(8).hex()
+
+
+class Trace:
+    """Spans of one HTTP request. Times are time.time_ns() values."""
+
+    def __init__(self, name: str, correlation_id: str, trace_id: str, parent_span_id: Optional[str]):
+        self.name = name
+        self.correlation_id = correlation_id
+        self.trace_id = trace_id
+        self.parent_span_id = parent_span_id
+        self.span_id = _span_id()
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.handler_end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = {}
+        self.spans: List[Tuple[str, str, int, int, Dict[str, Any]]] = []
+        self.error = False
+
+    def add_span(self, name: str, start_ns: int, end_ns: int, **attributes) -> None:
+        self.spans.append((name, _span_id(), start_ns, end_ns, attributes))
+
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns or time.time_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: one entry per span plus the total so far."""
+        parts = [f"{name};dur={(end - start) / 1e6:.3f}" for name, _, start, end, _ in self.spans]
+        parts.append(f"total;dur={self.duration_ms():.3f}")
+        return ", ".join(parts)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """The trace as an OTLP/JSON ExportTraceServiceRequest (one line of the trace file)."""
+        status = {"code": 2 if self.error else 1}
+        spans = [{
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_span_id or "",
+            "name": self.name,
+            "kind": 2,  # SERVER
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otlp_attributes({**self.attributes, "correlation_id": self.correlation_id}),
+            "status": status,
+        }]
+        for name, span_id, start, end, attributes in self.spans:
+            spans.append({
+                "traceId": self.trace_id,
+                "spanId": span_id,
+                "parentSpanId": self.span_id,
+                "name": name,
+                "kind": 1,  # INTERNAL
+                "startTimeUnixNano": str(start),
+                "endTimeUnixNano": str(end),
+                "attributes": _otlp_attributes(attributes),
+                "status": {"code": 1},
+            })
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({"service.name": _SERVICE_NAME})},
+                "scopeSpans": [{"scope": {"name": "app.core.tracing"}, "spans": spans}],
+            }]
+        }
+
+
+def _otlp_attributes(values: Dict[str, Any]) -> List[Dict[str, Any]]:
+    attributes = []
+    for key, value in values.items():
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": str(value)}
+        attributes.append({"key": key, "value": typed})
+    return attributes
+
+
+def current_trace() -> Optional[Trace]:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Record a child span of the current request; a no-op outside a traced request."""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    start = time.time_ns()
+    try:
+        yield
+    finally:
+        trace.add_span(name, start, time.time_ns(), **attributes)
+
+
+@contextmanager
+def handler_span():
+    """
+    Wrap a route handler's work.
+
+    Everything between the request arriving and the handler starting
+    (body parsing and pydantic validation) is recorded as "validation";
+    the time from the handler returning to the response starting is
+    recorded by the middleware as "serialization".
+    """
+    trace = _current.get()
+    if trace is not None:
+        trace.add_span("validation", trace.start_ns, time.time_ns())
+    try:
+        yield
+    finally:
+        if trace is not None:
+            trace.handler_end_ns = time.time_ns()
+
+
+class TraceExporter:
+    """
+    Writes sampled traces to a size-rotated JSONL file.
+
+    Requests only enqueue the finished trace (never blocking; a full queue
+    drops it). A daemon thread serialises and writes.
+    """
+
+    def __init__(self, path: str, max_bytes: int, backups: int, queue_size: int):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+        self._queue: "queue.Queue[Trace]" = queue.Queue(maxsize=queue_size)
+        self.exported = 0
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def submit(self, trace: Trace) -> None:
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            trace = self._queue.get()
+            try:
+                line = json.dumps(trace.to_otlp(), separators=(",", ":"))
+                self._handler.emit(logging.makeLogRecord({"msg": line, "levelno": logging.INFO}))
+                self.exported += 1
+            except Exception as e:
+                logger.warning(f"Could not write trace {trace.trace_id}: {e}")
+
+
+@lru_cache(maxsize=1)
+def get_trace_exporter() -> Optional[TraceExporter]:
+    """
+    Trace file exporter for this worker (cached).
+
+    Returns:
+        TraceExporter when TRACE_FILE_PATH is configured, else None
+    """
+    if not TRACE_FILE_PATH:
+        return None
+    try:
+        exporter = TraceExporter(
+            TRACE_FILE_PATH,
+            max_bytes=int(TRACE_FILE_MAX_MB * 1024 * 1024),
+            backups=TRACE_FILE_BACKUPS,
+            queue_size=TRACE_QUEUE_SIZE,
+        )
+        logger.info(
+            f"Writing traces to {os.path.abspath(TRACE_FILE_PATH)} "
+            f"(sample rate {TRACE_SAMPLE_RATE}, keeping everything slower than {TRACE_SLOW_MS}ms)"
+        )
+        return exporter
+    except OSError as e:
+        logger.warning(f"Could not open trace file {TRACE_FILE_PATH}: {e}. Traces will not be written.")
+        return None
+
+
+def _should_export(trace: Trace) -> bool:
+    if trace.error or trace.duration_ms() >= TRACE_SLOW_MS:
+        return True
+    return TRACE_SAMPLE_RATE > 0 and random.random() < TRACE_SAMPLE_RATE
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware giving every HTTP request a correlation id and a trace.
+
+    The correlation id comes from the X-Correlation-Id header (or is
+    generated) and is echoed back; a W3C traceparent header, if present,
+    makes this request's spans children of the caller's span. Responses
+    carry a Server-Timing header with the span durations.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope.get("headers", [])}
+        match = _TRACEPARENT.match(headers.get("traceparent", "").strip().lower())
+        trace_id, parent_span_id = match.groups() if match else (uuid.uuid4().hex, None)
+        correlation_id = headers.get(CORRELATION_HEADER) or headers.get("x-request-id") or trace_id
+        trace = Trace(f"{scope['method']} {scope['path']}", correlation_id[:128], trace_id, parent_span_id)
+        trace.attributes.update({"http.method": scope["method"], "http.target": scope["path"]})
+        token = _current.set(trace)
+
+        async def send_with_trace(message):
+            if message["type"] == "http.response.start":
+                if trace.handler_end_ns is not None:
+                    trace.add_span("serialization", trace.handler_end_ns, time.time_ns())
+                trace.attributes["http.status_code"] = message["status"]
+                trace.error = message["status"] >= 500
+                extra = [
+                    (b"x-correlation-id", trace.correlation_id.encode("latin-1", "replace")),
+                    (b"server-timing", trace.server_timing().encode("latin-1")),
+                ]
+                message = {**message, "headers": list(message.get("headers", [])) + extra}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_trace)
+        except Exception:
+            trace.error = True
+            raise
+        finally:
+            _current.reset(token)
+            trace.end_ns = time.time_ns()
+            exporter = get_trace_exporter()
+            if exporter is not None and _should_export(trace):
+                exporter.submit(trace)
@@ -1,14 +1,15 @@
-from fastapi import APIRouter
-from app.core.model_loader import get_model, DummyModel, _load_model_uncached
+from fastapi import APIRouter, Request
+from app.core.http_cache import cached_json_response
+from app.core.model_loader import get_model, get_model_hash, DummyModel
+from app.services.model_report import get_model_report
 import os
 from app.core.config import MODEL_PATH
-import pandas as pd
 
 router = APIRouter()
 
 
 @router.get("/model-status")
-async def model_status():
+async def model_status(request: Request):
     """Check if the trained model is loaded or if dummy model is being used."""
     model = get_model()
     is_dummy = isinstance(model, DummyModel)
@@ -26,76 +27,25 @@ async def model_status():
         "message": "Dummy model is being used. Train the model first!" if is_dummy else "Trained model is loaded successfully!"
     }
     
-    # If it's a pipeline, get more info
-    if not is_dummy and hasattr(model, 'named_steps'):
-        try:
-            # Updated to use 'prep' instead of 'preprocessor' to match new pipeline
-            preprocessor = model.named_steps.get('prep')
-            if preprocessor:
-                numeric_transformer = preprocessor.named_transformers_.get('num')
-                if numeric_transformer and hasattr(numeric_transformer, 'feature_names_in_'):
-                    model_info["expected_numeric_features"] = list(numeric_transformer.feature_names_in_)
-                cat_transformer = preprocessor.named_transformers_.get('cat')
-                if cat_transformer and hasattr(cat_transformer, 'feature_names_in_'):
-                    model_info["expected_categorical_features"] = list(cat_transformer.feature_names_in_)
-        except Exception as e:
-            model_info["feature_extraction_error"] = str(e)
+    # Feature lists come from the cached model report (the fallback model has one too)
+    try:
+        report, _ = get_model_report(model, get_model_hash())
+        model_info["model_hash"] = report["model_hash"]
+        model_info["expected_numeric_features"] = report["expected_numeric_features"]
+        model_info["expected_categorical_features"] = report["expected_categorical_features"]
+    except Exception as e:
+        model_info["feature_extraction_error"] = str(e)
     
-    return model_info
+    return cached_json_response(request, model_info)
 
 
 @router.get("/test-prediction")
 @router.post("/test-prediction")
-async def test_prediction():
-    """Test prediction with sample data to verify model is working."""
+async def test_prediction(request: Request):
+    """Test prediction with sample data to verify model is working (cached per model version)."""
     try:
-        model = get_model()
-        is_dummy = isinstance(model, DummyModel)
-        
-        # Get valid activity categories from the model if available
-        valid_activity = "None"  # Default
-        if not is_dummy and hasattr(model, 'named_steps'):
-            try:
-                # Updated to use 'prep' instead of 'preprocessor'
-                preprocessor = model.named_steps.get('prep')
-                if preprocessor:
-                    cat_transformer = preprocessor.named_transformers_.get('cat')
-                    if cat_transformer and hasattr(cat_transformer, 'categories_'):
-                        known_categories = cat_transformer.categories_[0] if len(cat_transformer.categories_) > 0 else []
-                        if len(known_categories) > 0:
-                            valid_activity = list(known_categories)[0]  # Use first known category
-            except Exception:
-                pass  # Use default if we can't get categories
-        
-        # Test with sample features (only the 5 required features)
-        test_features = {
-            "attendance": 85,
-            "study_hours": 25,
-            "assignments_submitted": 10,
-            "internal_marks": 75,
-            "activities": valid_activity
-        }
-        
-        if is_dummy:
-            probs = model.predict_proba([test_features])[0]
-            predicted_class = model.predict([test_features])[0]
-            risk_score = float(probs[1])
-        else:
-            # Use pipeline
-            features_df = pd.DataFrame([test_features])
-            probs = model.predict_proba(features_df)[0]
-            predicted_class = model.predict(features_df)[0]
-            risk_score = float(probs[0])
-        
-        return {
-            "success": True,
-            "is_dummy_model": is_dummy,
-            "test_features": test_features,
-            "probabilities": probs.tolist() if hasattr(probs, 'tolist') else list(probs),
-            "predicted_class": int(predicted_class),
-            "risk_score": risk_score,
-            "message": "Prediction successful!"
-        }
+        report, _ = get_model_report(get_model(), get_model_hash())
+        return cached_json_response(request, report["test_prediction"])
     except Exception as e:
         import traceback
         return {
@@ -104,4 +54,3 @@ async def test_prediction():
             "traceback": traceback.format_exc(),
             "message": "Prediction failed - check error details"
         }
-
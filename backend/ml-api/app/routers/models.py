@@ -0,0 +1,47 @@
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+
+from app.core.config import MODEL_ADMIN_TOKEN
+from app.core.model_registry import ModelLoadError, ModelNotFoundError, get_model_registry
+
+router = APIRouter()
+
+
+def _registry():
+    registry = get_model_registry()
+    if registry is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Model registry is not configured. Set MODEL_REGISTRY_DIR to enable versioned models.",
+        )
+    return registry
+
+
+@router.get("")
+async def list_models():
+    """Available versions, resident versions and memory accounting."""
+    return _registry().describe()
+
+
+@router.post("/{version}/load", status_code=202)
+async def load_model(version: str, x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Preload and warm a version in the background so later requests never wait on it.
+
+    Only served when MODEL_ADMIN_TOKEN is set, and then only with a matching
+    X-Admin-Token.
+    """
+    if not MODEL_ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Model loading is disabled (MODEL_ADMIN_TOKEN is not set)")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token, MODEL_ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="A valid X-Admin-Token is required")
+    registry = _registry()
+    try:
+        registry.preload(version)
+    except ModelNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ModelLoadError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"version": version, "status": "loading", "registry": registry.describe()}
@@ -0,0 +1,94 @@
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from app.core.admission import get_admission_controller
+from app.core.config import PROFILE_TOKEN
+from app.core.parallelism import policy
+from app.core.profiling import get_stack_sampler, token_allowed
+from app.services.drift_monitor import get_drift_monitor
+from app.services.predictor import _resolve_model
+from app.services.risk_grid import cached_risk_grid
+from app.services.shadow import get_shadow_evaluator
+
+router = APIRouter()
+
+
+@router.get("/drift")
+async def drift():
+    """Feature drift of live traffic against the training reference, per model version."""
+    monitor = get_drift_monitor()
+    if monitor is None:
+        return {
+            "enabled": False,
+            "message": "Drift monitoring is disabled or model_info.json has no reference sketches. "
+                       "Retrain with train_model.py to generate them.",
+        }
+    return {"enabled": True, **monitor.report()}
+
+
+@router.get("/shadow")
+async def shadow():
+    """How the shadow candidate model compares with the primary on sampled live traffic."""
+    evaluator = get_shadow_evaluator()
+    if evaluator is None:
+        return {
+            "enabled": False,
+            "message": "Shadow evaluation is disabled. Set SHADOW_MODEL_PATH to a candidate model.pkl.",
+        }
+    return {"enabled": True, **evaluator.report()}
+
+
+@router.get("/inference")
+async def inference():
+    """Parallelism policy in effect and how many scoring calls ran sequentially vs. threaded."""
+    return policy.describe()
+
+
+@router.get("/admission")
+async def admission():
+    """Queue depths, wait times and rejections of the interactive and bulk lanes."""
+    controller = get_admission_controller()
+    if controller is None:
+        return {"enabled": False, "message": "Admission control is disabled (ADMISSION_ENABLED=false)."}
+    return controller.describe()
+
+
+@router.get("/grid")
+async def grid():
+    """Size, build time and measured error of the default model's precomputed risk grid."""
+    try:
+        model, version_label, _ = _resolve_model()
+    except Exception as e:
+        return {"enabled": False, "message": f"Default model unavailable: {e}"}
+    risk_grid = cached_risk_grid(model)
+    if risk_grid is None:
+        return {
+            "enabled": False,
+            "message": "Grid mode is disabled or the grid is not built. Set GRID_MODE_ENABLED=true.",
+        }
+    return {"enabled": True, "model_version": version_label, **risk_grid.describe()}
+
+
+@router.get("/profile")
+async def profile(reset: bool = False, x_profile_token: Optional[str] = Header(default=None)):
+    """
+    Collapsed stacks from this worker's sampling profiler, for flamegraph.pl or speedscope.
+
+    Only served when PROFILE_TOKEN is set, and then only with a matching
+    X-Profile-Token. reset=true clears the counts after returning them.
+    """
+    if not PROFILE_TOKEN:
+        raise HTTPException(status_code=404, detail="Profiling is disabled (PROFILE_TOKEN is not set)")
+    if not token_allowed(x_profile_token):
+        raise HTTPException(status_code=403, detail="A valid X-Profile-Token is required")
+    sampler = get_stack_sampler()
+    if sampler is None:
+        raise HTTPException(status_code=404, detail="The sampling profiler is disabled (PROFILER_ENABLED=false)")
+    body = sampler.collapsed()
+    stats = sampler.describe()
+    if reset:
+        sampler.reset()
+    headers = {f"X-Profiler-{key.replace('_', '-').title()}": str(value) for key, value in stats.items()}
+    return PlainTextResponse(body, headers=headers)
@@ -1,21 +1,164 @@
-from fastapi import APIRouter
+from functools import partial
+from typing import Any, Dict, Optional
+import asyncio
+import json
+import logging
+import time
 
+from fastapi import APIRouter, Header, HTTPException, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+
+from app.core.admission import BULK, INTERACTIVE, AdmissionRejected, get_admission_controller
+from app.core.model_registry import ModelLoadError, ModelNotFoundError, ModelNotReadyError
+from app.core.profiling import profiled
+from app.core.tracing import handler_span
 from app.schemas.prediction import (
     SinglePredictionRequest,
     SinglePredictionResponse,
     BatchPredictionRequest,
     BatchPredictionResponse,
+    TopKRequest,
+    TopKResponse,
 )
-from app.services.predictor import predict_single, predict_batch
+from app.services.feature_schema import FeatureValidationError, get_feature_schema
+from app.services.predictor import predict_single, predict_batch, predict_top_k
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+async def _run_with_version(lane: str, predict_fn, payload, model_version: Optional[str]):
+    """
+    Run a predictor through admission control on the given lane, mapping
+    invalid features, full queues and registry errors to HTTP responses.
+    """
+    # profiled() runs on whichever thread does the work, so X-Profile covers inference
+    call = partial(profiled, partial(predict_fn, payload, model_version=model_version))
+    controller = get_admission_controller()
+    try:
+        with handler_span():
+            if controller is None:
+                return call()
+            return await controller.run(lane, call)
+    except FeatureValidationError as e:
+        raise HTTPException(status_code=422, detail=e.detail())
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except ModelNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ModelNotReadyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except ModelLoadError as e:
+        # No Retry-After: retrying cannot help until the artifact is replaced
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/schema")
+async def feature_schema():
+    """JSON Schema of one record of features, as validated by every prediction route."""
+    return get_feature_schema().describe()
+
+
 @router.post("/single", response_model=SinglePredictionResponse)
-async def single_predict(payload: SinglePredictionRequest):
-    return predict_single(payload)
+async def single_predict(
+    payload: SinglePredictionRequest,
+    x_model_version: Optional[str] = Header(default=None),
+):
+    return await _run_with_version(INTERACTIVE, predict_single, payload, x_model_version)
 
 
 @router.post("/batch", response_model=BatchPredictionResponse)
-async def batch_predict(payload: BatchPredictionRequest):
-    return predict_batch(payload)
+async def batch_predict(
+    payload: BatchPredictionRequest,
+    x_model_version: Optional[str] = Header(default=None),
+):
+    return await _run_with_version(BULK, predict_batch, payload, x_model_version)
+
+
+@router.post("/top-k", response_model=TopKResponse)
+async def top_k_predict(
+    payload: TopKRequest,
+    x_model_version: Optional[str] = Header(default=None),
+):
+    return await _run_with_version(BULK, predict_top_k, payload, x_model_version)
+
+
+@router.websocket("/ws")
+async def predict_ws(websocket: WebSocket, model_version: Optional[str] = None):
+    """
+    Streaming single predictions for interactive clients (the what-if simulator).
+
+    The client sends ``{"id": <n>, "features": {...}}`` messages at any rate.
+    Only the newest unscored message is kept: anything it replaces is dropped
+    before scoring. Each scored message is answered with the usual single
+    prediction fields plus its ``id``. Scoring uses the interactive admission lane.
+    A message that fails is answered with an error frame; the connection stays open.
+    """
+    await websocket.accept()
+    mailbox: Dict[str, Any] = {}
+    arrived = asyncio.Event()
+    stats = {"received": 0, "superseded": 0, "scored": 0}
+
+    async def receive() -> None:
+        while True:
+            text = await websocket.receive_text()
+            stats["received"] += 1
+            if "pending" in mailbox:
+                stats["superseded"] += 1
+            try:
+                mailbox["pending"] = json.loads(text)
+            except json.JSONDecodeError as e:
+                mailbox["pending"] = {"error": f"Invalid JSON: {e}"}
+            arrived.set()
+
+    receiver = asyncio.create_task(receive())
+    waiter: Optional[asyncio.Task] = None
+    try:
+        while True:
+            waiter = asyncio.create_task(arrived.wait())
+            done, _ = await asyncio.wait({receiver, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver in done:
+                waiter.cancel()
+                break
+            arrived.clear()
+            message = mailbox.pop("pending")
+            message_id = message.get("id") if isinstance(message, dict) else None
+            reply: Dict[str, Any] = {"id": message_id}
+            start = time.perf_counter()
+            try:
+                if not isinstance(message, dict):
+                    raise ValueError("Messages must be JSON objects")
+                if "error" in message:
+                    raise ValueError(message["error"])
+                payload = SinglePredictionRequest.model_validate(message)
+                result = await _run_with_version(INTERACTIVE, predict_single, payload, model_version)
+                reply.update(result.model_dump())
+                stats["scored"] += 1
+            except HTTPException as e:
+                reply.update({"error": e.detail, "status": e.status_code})
+                if e.headers and "Retry-After" in e.headers:
+                    reply["retry_after"] = int(e.headers["Retry-After"])
+            except (ValidationError, ValueError) as e:
+                reply.update({"error": str(e), "status": 422})
+            except Exception as e:
+                logger.error(f"WebSocket prediction {message_id!r} failed: {e}", exc_info=True)
+                reply.update({"error": "Internal error while scoring this message", "status": 500})
+            reply["server_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            reply["superseded"] = stats["superseded"]
+            await websocket.send_json(reply)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if waiter is not None:
+            waiter.cancel()
+        receiver.cancel()
+        # Retrieve the receiver's outcome so its exception is never left unobserved
+        await asyncio.wait({receiver})
+        error = None if receiver.cancelled() else receiver.exception()
+        if error is not None and not isinstance(error, WebSocketDisconnect):
+            logger.warning(f"Prediction WebSocket receiver failed: {error!r}")
+        logger.info(
+            f"Prediction WebSocket closed: {stats['received']} received, "
+            f"{stats['scored']} scored, {stats['superseded']} superseded"
+        )
@@ -1,16 +1,35 @@
-from typing import Any, Dict, List
-from pydantic import BaseModel, RootModel
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, ConfigDict, Field, RootModel, model_validator
 
 
 class SinglePredictionRequest(BaseModel):
     features: Dict[str, Any]
+    exact: bool = False  # bypass grid mode and always run the model
+    uncertainty: bool = False  # also return tree-vote dispersion (implies exact)
+
+
+class PredictionUncertainty(BaseModel):
+    risk_std: float  # standard deviation of P(Fail) across the forest's trees
+    interval_low: float
+    interval_high: float
+    interval_level: float  # share of tree votes inside [interval_low, interval_high]
+    tree_agreement: float  # share of trees whose own vote matches the predicted label
+    out_of_distribution: bool
+    ood_features: List[str]  # features outside the training range
 
 
 class SinglePredictionResponse(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
     predicted_label: str
     risk_category: str
     risk_score: float
     feature_importance: Dict[str, float]
+    model_version: Optional[str] = None
+    scored_by: Optional[str] = None  # "model" or "grid"
+    error_estimate: Optional[float] = None  # sampled p99 risk error of the grid when scored_by == "grid"
+    uncertainty: Optional[PredictionUncertainty] = None
+    permutation_importance: Optional[Dict[str, float]] = None  # model-level, None until computed
 
 
 class BatchRecord(RootModel[Dict[str, Any]]):
@@ -20,6 +39,21 @@ class BatchRecord(RootModel[Dict[str, Any]]):
 
 class BatchPredictionRequest(BaseModel):
     records: List[Dict[str, Any]]
+    summary: bool = False  # also return aggregate statistics computed during scoring
+    summary_top_n: int = Field(default=10, ge=0, le=1000)
+    uncertainty: bool = False  # per-row tree-vote dispersion
+    # Delta mode: stable ids aligned with records; unchanged rows are not re-scored
+    student_ids: Optional[List[str]] = None
+    scope: str = "default"  # namespace for student_ids (e.g. course or section)
+
+    @model_validator(mode="after")
+    def _check_student_ids(self):
+        if self.student_ids is not None:
+            if len(self.student_ids) != len(self.records):
+                raise ValueError("student_ids must have one entry per record")
+            if len(set(self.student_ids)) != len(self.student_ids):
+                raise ValueError("student_ids must be unique within a batch")
+        return self
 
 
 class BatchPredictionItem(BaseModel):
@@ -28,7 +62,84 @@ class BatchPredictionItem(BaseModel):
     risk_category: str
     risk_score: float
     feature_importance: Dict[str, float]
+    # Only set in delta mode
+    student_id: Optional[str] = None
+    change: Optional[str] = None  # new / changed / unchanged / model_updated
+    previous_risk_category: Optional[str] = None
+    uncertainty: Optional[PredictionUncertainty] = None
+
+
+class RiskHistogramBin(BaseModel):
+    lower: float
+    upper: float
+    count: int
+
+
+class ActivitySummary(BaseModel):
+    count: int
+    mean_risk_score: float
+    category_counts: Dict[str, int]
+
+
+class TopRiskItem(BaseModel):
+    index: int  # position in the request's records
+    risk_score: float
+    risk_category: str
+    input_features: Dict[str, Any]
+
+
+class BatchSummary(BaseModel):
+    total: int
+    category_counts: Dict[str, int]  # keys match risk_category: low / medium / high
+    label_counts: Dict[str, int]
+    mean_risk_score: Optional[float] = None
+    risk_score_quantiles: Dict[str, float]
+    risk_score_histogram: List[RiskHistogramBin]
+    by_activities: Dict[str, ActivitySummary]
+    top_risk: List[TopRiskItem]
+
+
+class CategoryChange(BaseModel):
+    index: int  # position in the request's records
+    student_id: str
+    previous_risk_category: str
+    risk_category: str
+    previous_risk_score: float
+    risk_score: float
+
+
+class DeltaSummary(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
+    tracked: bool  # False when no result store is configured (every row counts as new)
+    new: int
+    changed: int
+    unchanged: int
+    model_updated: int
+    rescored: int
+    category_changes: List[CategoryChange]
 
 
 class BatchPredictionResponse(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
     items: List[BatchPredictionItem]
+    model_version: Optional[str] = None
+    summary: Optional[BatchSummary] = None
+    delta: Optional[DeltaSummary] = None
+    permutation_importance: Optional[Dict[str, float]] = None  # model-level, None until computed
+
+
+class TopKRequest(BaseModel):
+    records: List[Dict[str, Any]]
+    k: int = Field(default=50, ge=1, le=10000)
+    chunk_size: int = Field(default=1000, ge=1, le=50000)
+
+
+class TopKResponse(BaseModel):
+    model_config = ConfigDict(protected_namespaces=())
+
+    total_scored: int
+    k: int
+    items: List[TopRiskItem]  # riskiest first
+    model_version: Optional[str] = None
@@ -0,0 +1,104 @@
+from typing import Any, Dict, List
+import numpy as np
+
+from app.schemas.prediction import (
+    ActivitySummary,
+    BatchSummary,
+    RiskHistogramBin,
+    TopRiskItem,
+)
+
+HISTOGRAM_BINS = 10
+QUANTILES = [0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99]
+CATEGORIES = ["low", "medium", "high"]
+
+
+def risk_levels(risk_scores: np.ndarray, high: float, medium: float) -> np.ndarray:
+    """Vectorised risk_category ("low" / "medium" / "high") for an array of scores."""
+    return np.select(
+        [risk_scores >= high, risk_scores >= medium],
+        ["high", "medium"],
+        default="low",
+    )
+
+
+def summarize_batch(
+    features: List[Dict[str, Any]],
+    risk_scores: np.ndarray,
+    predicted_classes: np.ndarray,
+    top_n: int,
+    high: float,
+    medium: float,
+) -> BatchSummary:
+    """
+    Aggregate a scored batch with array operations only.
+
+    Args:
+        features: Prepared input rows (aligned with the scores)
+        risk_scores: Risk score per row
+        predicted_classes: Predicted class per row (0 = Fail, 1 = Pass)
+        top_n: Number of riskiest rows to return
+        high / medium: Risk thresholds used for risk_category
+
+    Returns:
+        BatchSummary with counts, histogram, quantiles, per-activities
+        breakdown and the top-N riskiest rows
+    """
+    risk_scores = np.asarray(risk_scores, dtype=float)
+    predicted_classes = np.asarray(predicted_classes)
+    n = len(risk_scores)
+    levels = risk_levels(risk_scores, high, medium)
+    # Index into CATEGORIES for each row
+    level_codes = np.select([levels == "high", levels == "medium"], [2, 1], default=0)
+
+    category_counts = dict(zip(CATEGORIES, np.bincount(level_codes, minlength=3).tolist()))
+    at_risk = int(np.count_nonzero(predicted_classes != 1))
+    label_counts = {"normal": n - at_risk, "at_risk": at_risk}
+
+    counts, edges = np.histogram(risk_scores, bins=HISTOGRAM_BINS, range=(0.0, 1.0))
+    histogram = [
+        RiskHistogramBin(lower=round(float(edges[i]), 6), upper=round(float(edges[i + 1]), 6), count=int(counts[i]))
+        for i in range(HISTOGRAM_BINS)
+    ]
+    quantiles = (
+        {str(q): float(v) for q, v in zip(QUANTILES, np.quantile(risk_scores, QUANTILES))} if n else {}
+    )
+
+    activities = np.asarray([str(row.get("activities", "low")) for row in features], dtype=object)
+    by_activities: Dict[str, ActivitySummary] = {}
+    if n:
+        names, inverse = np.unique(activities, return_inverse=True)
+        group_counts = np.bincount(inverse, minlength=len(names))
+        group_sums = np.bincount(inverse, weights=risk_scores, minlength=len(names))
+        group_levels = np.zeros((len(names), 3), dtype=np.int64)
+        np.add.at(group_levels, (inverse, level_codes), 1)
+        for i, name in enumerate(names):
+            by_activities[str(name)] = ActivitySummary(
+                count=int(group_counts[i]),
+                mean_risk_score=float(group_sums[i] / group_counts[i]),
+                category_counts=dict(zip(CATEGORIES, group_levels[i].tolist())),
+            )
+
+    top: List[TopRiskItem] = []
+    k = min(top_n, n)
+    if k > 0:
+        # Partial selection, then sort only the k winners
+        candidates = np.argpartition(-risk_scores, k - 1)[:k]
+        for i in candidates[np.argsort(-risk_scores[candidates], kind="stable")]:
+            top.append(TopRiskItem(
+                index=int(i),
+                risk_score=float(risk_scores[i]),
+                risk_category=str(levels[i]),
+                input_features=features[i],
+            ))
+
+    return BatchSummary(
+        total=n,
+        category_counts=category_counts,
+        label_counts=label_counts,
+        mean_risk_score=float(risk_scores.mean()) if n else None,
+        risk_score_quantiles=quantiles,
+        risk_score_histogram=histogram,
+        by_activities=by_activities,
+        top_risk=top,
+    )
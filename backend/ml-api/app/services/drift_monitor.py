@@ -0,0 +1,276 @@
+from collections import deque
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+import numpy as np
+
+from app.core.config import DRIFT_MONITOR_ENABLED, MODEL_INFO_PATH
+
+logger = logging.getLogger(__name__)
+
+# Rows waiting to be folded into the sketches. Bounded by rows, not requests,
+# so neither a traffic spike nor a few huge batches can grow memory; when full,
+# new rows are dropped (and counted).
+_PENDING_MAX_ROWS = 200_000
+_DRAIN_INTERVAL_SECONDS = 1.0
+
+# Conventional PSI interpretation bands
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+
+_EPSILON = 1e-4
+
+
+@lru_cache(maxsize=8)
+def load_reference(info_path: str = MODEL_INFO_PATH) -> Optional[Dict[str, Any]]:
+    """
+    Load the training reference sketches written by train_model.py.
+
+    Returns:
+        The "reference" section of model_info.json, or None if unavailable
+    """
+    try:
+        with open(info_path, "r") as f:
+            info = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read model info at {info_path}: {e}")
+        return None
+    reference = info.get("reference")
+    if not reference:
+        logger.warning(f"{info_path} has no reference sketches. Retrain with train_model.py to enable drift monitoring.")
+    return reference
+
+
+class _FeatureSketch:
+    """Live histogram for one feature, binned exactly like the reference."""
+
+    def __init__(self, name: str, reference: Dict[str, Any]):
+        self.name = name
+        self.kind = reference["type"]
+        self.missing = 0
+        if self.kind == "numeric":
+            self.edges = np.asarray(reference["bin_edges"], dtype=float)
+            self.inner_edges = self.edges[1:-1]
+            self.counts = np.zeros(len(self.edges) - 1, dtype=np.int64)
+            self.total = 0
+            self.sum = 0.0
+        else:
+            self.categories = list(reference["frequencies"].keys())
+            self.counts_by_category: Dict[str, int] = {c: 0 for c in self.categories}
+            self.other = 0
+
+    def update(self, values: List[Any]) -> None:
+        if self.kind == "numeric":
+            array = np.asarray([_to_float(v) for v in values], dtype=float)
+            present = array[~np.isnan(array)]
+            self.missing += len(array) - len(present)
+            if len(present):
+                bins = np.searchsorted(self.inner_edges, present, side="right")
+                self.counts += np.bincount(bins, minlength=len(self.counts))
+                self.total += len(present)
+                self.sum += float(present.sum())
+        else:
+            for value in values:
+                if value is None:
+                    self.missing += 1
+                    continue
+                key = str(value).strip().lower()
+                if key in self.counts_by_category:
+                    self.counts_by_category[key] += 1
+                else:
+                    self.other += 1
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value) if value is not None else math.nan
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _psi(expected: np.ndarray, actual: np.ndarray) -> float:
+    expected = np.clip(expected, _EPSILON, None)
+    actual = np.clip(actual, _EPSILON, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def _psi_status(psi: float) -> str:
+    if psi >= PSI_SIGNIFICANT:
+        return "significant"
+    if psi >= PSI_MODERATE:
+        return "moderate"
+    return "stable"
+
+
+class DriftMonitor:
+    """
+    Streaming feature drift monitor.
+
+    The request path only appends the prepared rows to a deque bounded by
+    row count (O(1), no numpy work). A daemon thread drains it about once per second and folds
+    the rows into per-model-version histograms that share the training bin
+    edges, so reports compare like with like.
+    """
+
+    def __init__(self, reference: Dict[str, Any]):
+        self.reference = reference
+        self._pending: deque = deque()
+        self._pending_rows = 0
+        self._pending_lock = threading.Lock()
+        self._dropped = 0
+        self._lock = threading.Lock()
+        self._sketches: Dict[str, Dict[str, _FeatureSketch]] = {}
+        self._rows_seen: Dict[str, int] = {}
+        self._first_seen: Dict[str, float] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    def observe(self, model_version: str, rows: List[Dict[str, Any]]) -> None:
+        """Queue prepared feature rows for the background sketch update."""
+        with self._pending_lock:
+            room = _PENDING_MAX_ROWS - self._pending_rows
+            if room < len(rows):
+                # Keep what fits: a batch larger than the buffer is still sampled
+                self._dropped += len(rows) - max(room, 0)
+                rows = rows[:max(room, 0)]
+            if rows:
+                self._pending.append((model_version, rows))
+                self._pending_rows += len(rows)
+        if self._thread is None:
+            self._start()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="drift-monitor", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(_DRAIN_INTERVAL_SECONDS)
+            try:
+                self.drain()
+            except Exception as e:
+                logger.warning(f"Drift monitor update failed: {e}")
+
+    def drain(self) -> None:
+        """Fold every pending row into the live sketches."""
+        with self._pending_lock:
+            pending, self._pending = self._pending, deque()
+            self._pending_rows = 0
+        by_version: Dict[str, List[Dict[str, Any]]] = {}
+        for model_version, rows in pending:
+            by_version.setdefault(model_version, []).extend(rows)
+
+        with self._lock:
+            for model_version, rows in by_version.items():
+                sketches = self._sketches.get(model_version)
+                if sketches is None:
+                    sketches = {
+                        name: _FeatureSketch(name, ref)
+                        for name, ref in self.reference["features"].items()
+                    }
+                    self._sketches[model_version] = sketches
+                    self._first_seen[model_version] = time.time()
+                for name, sketch in sketches.items():
+                    sketch.update([row.get(name) for row in rows])
+                self._rows_seen[model_version] = self._rows_seen.get(model_version, 0) + len(rows)
+
+    def report(self) -> Dict[str, Any]:
+        """PSI and KS-style drift scores per feature and per model version."""
+        self.drain()
+        versions = {}
+        with self._lock:
+            for model_version, sketches in self._sketches.items():
+                features = {}
+                for name, sketch in sketches.items():
+                    features[name] = self._feature_report(sketch, self.reference["features"][name])
+                worst = max((f.get("psi", 0.0) for f in features.values()), default=0.0)
+                versions[model_version] = {
+                    "rows_observed": self._rows_seen.get(model_version, 0),
+                    "observing_since": self._first_seen.get(model_version),
+                    "max_psi": worst,
+                    "status": _psi_status(worst),
+                    "features": features,
+                }
+        return {
+            "reference_rows": self.reference.get("n_rows"),
+            "pending_rows": self._pending_rows,
+            "dropped_rows": self._dropped,
+            "thresholds": {"moderate": PSI_MODERATE, "significant": PSI_SIGNIFICANT},
+            "model_versions": versions,
+        }
+
+    @staticmethod
+    def _feature_report(sketch: _FeatureSketch, reference: Dict[str, Any]) -> Dict[str, Any]:
+        if sketch.kind == "numeric":
+            expected = np.asarray(reference["bin_proportions"], dtype=float)
+            n = sketch.total
+            if n == 0:
+                return {"type": "numeric", "count": 0, "missing": sketch.missing}
+            actual = sketch.counts / n
+            psi = _psi(expected, actual)
+            # KS statistic on the shared bins (a lower bound of the exact KS distance)
+            ks = float(np.max(np.abs(np.cumsum(actual) - np.cumsum(expected))))
+            return {
+                "type": "numeric",
+                "count": n,
+                "missing": sketch.missing,
+                "psi": psi,
+                "ks": ks,
+                "status": _psi_status(psi),
+                "live_mean": sketch.sum / n,
+                "reference_mean": reference.get("mean"),
+                "live_bin_proportions": [float(p) for p in actual],
+                "reference_bin_proportions": reference["bin_proportions"],
+                "bin_edges": reference["bin_edges"],
+            }
+
+        n = sum(sketch.counts_by_category.values()) + sketch.other
+        if n == 0:
+            return {"type": "categorical", "count": 0, "missing": sketch.missing}
+        categories = sketch.categories
+        expected = np.asarray([reference["frequencies"][c] for c in categories] + [0.0])
+        actual = np.asarray([sketch.counts_by_category[c] for c in categories] + [sketch.other]) / n
+        psi = _psi(expected, actual)
+        return {
+            "type": "categorical",
+            "count": n,
+            "missing": sketch.missing,
+            "psi": psi,
+            "status": _psi_status(psi),
+            "live_frequencies": {c: float(p) for c, p in zip(categories + ["<unknown>"], actual)},
+            "reference_frequencies": reference["frequencies"],
+        }
+
+
+@lru_cache(maxsize=1)
+def get_drift_monitor() -> Optional[DriftMonitor]:
+    """
+    Shared drift monitor for this worker (cached).
+
+    Returns:
+        DriftMonitor, or None when disabled or no reference sketches exist
+    """
+    if not DRIFT_MONITOR_ENABLED:
+        return None
+    reference = load_reference(os.path.abspath(MODEL_INFO_PATH))
+    if not reference:
+        return None
+    return DriftMonitor(reference)
+
+
+def observe_features(model_version: str, rows: List[Dict[str, Any]]) -> None:
+    """Record prepared feature rows for drift monitoring (never raises)."""
+    try:
+        monitor = get_drift_monitor()
+        if monitor is not None:
+            monitor.observe(model_version, rows)
+    except Exception as e:
+        logger.warning(f"Could not record features for drift monitoring: {e}")
@@ -0,0 +1,296 @@
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import json
+import logging
+
+import numpy as np
+
+from app.core.config import MODEL_INFO_PATH
+
+logger = logging.getLogger(__name__)
+
+# Row reports returned in one error response; the number of invalid rows is always given
+MAX_ROW_ERRORS = 100
+
+# Schema of models trained before train_model.py wrote a "schema" section
+_DEFAULT_SCHEMA: Dict[str, Dict[str, Any]] = {
+    "attendance": {"type": "number", "minimum": 0, "maximum": 100, "required": True},
+    "study_hours": {"type": "number", "minimum": 0, "maximum": 168, "required": True},
+    "internal_marks": {"type": "number", "minimum": 0, "maximum": 100, "required": False, "default": None},
+    "assignments_submitted": {
+        "type": "number", "minimum": 0, "maximum": None, "required": True,
+        "aliases": ["assignments_completed"],
+    },
+    "activities": {
+        "type": "category", "categories": ["high", "low", "medium"], "required": False, "default": "low",
+    },
+}
+
+_NUMBER_TYPES = {int, float}
+
+
+class FeatureValidationError(ValueError):
+    """One or more request records do not match the feature schema."""
+
+    def __init__(self, errors: List[Dict[str, Any]], invalid_rows: int, total_rows: int):
+        first = errors[0]
+        field, message = next(iter(first["errors"].items()))
+        where = f"record {first['index']}: " if total_rows > 1 else ""
+        super().__init__(
+            f"{invalid_rows} of {total_rows} record(s) failed validation; first: {where}{field} {message}"
+        )
+        self.errors = errors
+        self.invalid_rows = invalid_rows
+        self.total_rows = total_rows
+
+    def detail(self) -> Dict[str, Any]:
+        return {
+            "message": str(self),
+            "invalid_rows": self.invalid_rows,
+            "total_rows": self.total_rows,
+            "errors": self.errors,
+        }
+
+
+def _show(value: Any) -> str:
+    text = repr(value)
+    return text if len(text) <= 40 else text[:37] + "..."
+
+
+class FeatureSpec:
+    """Type, presence rule and valid values of one model input."""
+
+    def __init__(self, name: str, spec: Dict[str, Any]):
+        self.name = name
+        self.kind = spec["type"]
+        if self.kind not in ("number", "category"):
+            raise ValueError(f"Feature {name}: unknown type '{self.kind}'")
+        self.required = bool(spec.get("required", True))
+        self.default = spec.get("default")
+        self.aliases = list(spec.get("aliases") or [])
+        self.minimum = spec.get("minimum")
+        self.maximum = spec.get("maximum")
+        self.categories = [str(c).strip().lower() for c in spec.get("categories") or []]
+
+    def bounds(self) -> str:
+        if self.minimum is not None and self.maximum is not None:
+            return f"between {self.minimum:g} and {self.maximum:g}"
+        if self.minimum is not None:
+            return f">= {self.minimum:g}"
+        return f"<= {self.maximum:g}" if self.maximum is not None else "a finite number"
+
+    def gather(self, records: Sequence[Dict[str, Any]]) -> List[Any]:
+        """This feature's raw value in every record (first non-null of its name and aliases)."""
+        if not self.aliases:
+            name = self.name
+            return [record.get(name) for record in records]
+        names = [self.name] + self.aliases
+        values = []
+        for record in records:
+            value = None
+            for name in names:
+                value = record.get(name)
+                if value is not None:
+                    break
+            values.append(value)
+        return values
+
+    def numbers(self, raw: List[Any]) -> Tuple[np.ndarray, Dict[int, str]]:
+        """float64 column (NaN = missing) and the problems found, by row."""
+        problems: Dict[int, str] = {}
+        if set(map(type, raw)) <= _NUMBER_TYPES | {type(None)}:
+            # Plain JSON numbers and nulls: one C-level conversion
+            values = np.array(raw, dtype=float)
+        else:
+            # Strings, booleans or other objects somewhere in the column
+            values = np.full(len(raw), np.nan)
+            for i, value in enumerate(raw):
+                if value is None or (isinstance(value, str) and not value.strip()):
+                    continue
+                if isinstance(value, bool) or not isinstance(value, (int, float, str, np.number)):
+                    problems[i] = f"must be a number, got {_show(value)}"
+                    continue
+                try:
+                    values[i] = float(value)
+                except ValueError:
+                    problems[i] = f"must be a number, got {_show(value)}"
+
+        missing = np.isnan(values)
+        if missing.any():
+            if self.required:
+                for i in np.flatnonzero(missing):
+                    problems.setdefault(int(i), "is required")
+            elif self.default is not None:
+                values[missing] = float(self.default)
+
+        low = -np.inf if self.minimum is None else self.minimum
+        high = np.inf if self.maximum is None else self.maximum
+        with np.errstate(invalid="ignore"):
+            outside = ~missing & ~(np.isfinite(values) & (values >= low) & (values <= high))
+        if outside.any():
+            for i in np.flatnonzero(outside):
+                problems.setdefault(int(i), f"must be {self.bounds()}, got {values[i]:g}")
+        return values, problems
+
+    def labels(self, raw: List[Any]) -> Tuple[np.ndarray, Dict[int, str]]:
+        """Object column of normalised categories and the problems found, by row."""
+        problems: Dict[int, str] = {}
+        column = np.fromiter(raw, dtype=object, count=len(raw))
+        if not set(map(type, raw)) <= {str, type(None)}:
+            for i, value in enumerate(raw):
+                if value is not None and not isinstance(value, str):
+                    problems[i] = f"must be one of {', '.join(self.categories)}, got {_show(value)}"
+                    column[i] = None
+        missing = np.equal(column, None).astype(bool)
+        present = np.flatnonzero(~missing)
+        text = np.char.lower(np.char.strip(column[present].astype(str)))
+        column[present] = text
+        blank = present[text == ""]
+        missing[blank] = True
+        column[blank] = None
+
+        unknown = present[(text != "") & ~np.isin(text, self.categories)]
+        for i in unknown:
+            problems[int(i)] = f"must be one of {', '.join(self.categories)}, got {_show(raw[i])}"
+        for i in np.flatnonzero(missing):
+            if int(i) in problems:
+                continue
+            if self.required:
+                problems[int(i)] = "is required"
+            else:
+                column[i] = self.default
+        return column, problems
+
+    def describe(self) -> Dict[str, Any]:
+        """JSON Schema of this feature."""
+        if self.kind == "number":
+            schema: Dict[str, Any] = {"type": "number"}
+            if self.minimum is not None:
+                schema["minimum"] = self.minimum
+            if self.maximum is not None:
+                schema["maximum"] = self.maximum
+        else:
+            schema = {"type": "string", "enum": self.categories}
+        if not self.required:
+            schema["default"] = self.default
+        if self.aliases:
+            schema["aliases"] = self.aliases
+        return schema
+
+
+class ValidatedFeatures:
+    """
+    Typed feature columns of validated records.
+
+    columns maps each feature to a float64 array (NaN where an optional
+    value is missing) or an object array of categories, in record order.
+    errors maps the index of every invalid record to {feature: message}.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], n_rows: int, errors: Dict[int, Dict[str, str]]):
+        self.columns = columns
+        self.names = list(columns)
+        self.n_rows = n_rows
+        self.errors = errors
+        self._rows: Optional[List[Dict[str, Any]]] = None
+
+    def take(self, indexes) -> "ValidatedFeatures":
+        """The selected records (a list of indexes or a slice) as their own columns."""
+        if isinstance(indexes, slice):
+            columns = {name: values[indexes] for name, values in self.columns.items()}
+        else:
+            indexes = np.asarray(indexes, dtype=np.int64)
+            columns = {name: values.take(indexes) for name, values in self.columns.items()}
+        n_rows = len(next(iter(columns.values()))) if columns else 0
+        return ValidatedFeatures(columns, n_rows, {})
+
+    def raise_for_errors(self) -> None:
+        if not self.errors:
+            return
+        indexes = sorted(self.errors)
+        reports = [{"index": i, "errors": self.errors[i]} for i in indexes[:MAX_ROW_ERRORS]]
+        raise FeatureValidationError(reports, len(indexes), self.n_rows)
+
+    def frame(self, order: Optional[List[str]] = None):
+        """DataFrame of the columns, in the model's column order."""
+        import pandas as pd
+
+        order = order or self.names
+        return pd.DataFrame({name: self.columns[name] for name in order}, columns=order)
+
+    def rows(self, start: int = 0, stop: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Records as dicts of model feature names; missing values are None."""
+        if start == 0 and stop is None:
+            if self._rows is None:
+                self._rows = self._build_rows(0, None)
+            return self._rows
+        return self._build_rows(start, stop)
+
+    def _build_rows(self, start: int, stop: Optional[int]) -> List[Dict[str, Any]]:
+        lists = []
+        for name in self.names:
+            column = self.columns[name][start:stop]
+            if column.dtype.kind == "f":
+                column = np.where(np.isnan(column), None, column)
+            lists.append(column.tolist())
+        return [dict(zip(self.names, values)) for values in zip(*lists)]
+
+
+class FeatureSchema:
+    """
+    Request schema of the model's features, generated from model_info.json.
+
+    validate() checks a whole batch one column at a time (numeric type,
+    range, required/optional, the activities vocabulary) and returns typed
+    columns ready for inference together with a per-record error report.
+    """
+
+    def __init__(self, specs: Dict[str, Dict[str, Any]], source: str):
+        self.features = [FeatureSpec(name, spec) for name, spec in specs.items()]
+        self.source = source
+
+    def validate(self, records: Sequence[Dict[str, Any]]) -> ValidatedFeatures:
+        columns: Dict[str, np.ndarray] = {}
+        errors: Dict[int, Dict[str, str]] = {}
+        for feature in self.features:
+            raw = feature.gather(records)
+            if feature.kind == "number":
+                columns[feature.name], problems = feature.numbers(raw)
+            else:
+                columns[feature.name], problems = feature.labels(raw)
+            for index, message in problems.items():
+                errors.setdefault(index, {})[feature.name] = message
+        return ValidatedFeatures(columns, len(records), errors)
+
+    def describe(self) -> Dict[str, Any]:
+        """JSON Schema of one record."""
+        return {
+            "type": "object",
+            "properties": {feature.name: feature.describe() for feature in self.features},
+            "required": [feature.name for feature in self.features if feature.required],
+            "source": self.source,
+        }
+
+
+@lru_cache(maxsize=8)
+def get_feature_schema(info_path: str = MODEL_INFO_PATH) -> FeatureSchema:
+    """
+    Feature schema of the model described by info_path (cached).
+
+    Uses the "schema" section train_model.py writes. Older model_info.json
+    files (or none at all) get the documented defaults for the features
+    they list.
+    """
+    try:
+        with open(info_path, "r") as f:
+            info = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read model info at {info_path}: {e}. Using the default feature schema.")
+        return FeatureSchema(_DEFAULT_SCHEMA, "default")
+    if info.get("schema"):
+        return FeatureSchema(info["schema"], info_path)
+    listed = info.get("features", {})
+    names = list(listed.get("numeric", [])) + list(listed.get("categorical", []))
+    specs = {name: _DEFAULT_SCHEMA[name] for name in names if name in _DEFAULT_SCHEMA} or _DEFAULT_SCHEMA
+    logger.warning(f"{info_path} has no feature schema; retrain with train_model.py. Using the default ranges.")
+    return FeatureSchema(specs, "default")
@@ -0,0 +1,160 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Tuple
+import threading
+import weakref
+
+import numpy as np
+
+from app.core.model_loader import DummyModel
+
+# Backend adapter per loaded model (models are immutable once loaded)
+_backends: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+FAIL, PASS = 0, 1
+
+
+def _expected_features(model) -> List[str]:
+    """Column order the trained pipeline expects (numeric first, then categorical)."""
+    preprocessor = model.named_steps['prep']
+    numeric_features = list(preprocessor.named_transformers_['num'].feature_names_in_)
+    cat_transformer = preprocessor.named_transformers_['cat']
+    if hasattr(cat_transformer, 'feature_names_in_'):
+        cat_features = list(cat_transformer.feature_names_in_)
+    else:
+        cat_features = ['activities']
+    return numeric_features + cat_features
+
+
+def _fail_index(model) -> int:
+    """Index of the 'Fail' class in predict_proba output."""
+    # You trained with y: Fail -> 0, Pass -> 1
+    # So risk = P(Fail) = P(class == 0)
+    classes = list(model.named_steps['clf'].classes_)
+    try:
+        return classes.index(0)
+    except ValueError:
+        # In case in future you switch to string labels
+        return classes.index("Fail")
+
+
+class InferenceBackend(ABC):
+    """
+    Columnar inference protocol every kind of model implements.
+
+    Input is the typed columns of validated features (float64 arrays with
+    NaN for missing values, object arrays of categories), all the same
+    length. Output is one vectorized answer for all rows: risk = P(Fail)
+    as float64 and the predicted class as int64 (0 = Fail, 1 = Pass).
+    """
+
+    kind = "abstract"
+    # Columns read, in the model's own order
+    features: List[str] = []
+
+    @abstractmethod
+    def predict_risk(self, columns: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        ...
+
+    def risk_votes(self, columns: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        predict_risk plus each ensemble member's risk vote, shape [members, rows].
+
+        Models that are not ensembles vote once, with their own risk.
+        """
+        risk, classes = self.predict_risk(columns)
+        return risk, classes, risk[np.newaxis, :]
+
+
+class PipelineBackend(InferenceBackend):
+    """A trained scikit-learn pipeline ("prep" transformer, "clf" classifier)."""
+
+    kind = "model"
+
+    def __init__(self, model: Any):
+        self.model = model
+        self.features = _expected_features(model)
+        self.classes = np.asarray(model.named_steps['clf'].classes_)
+        self.fail_index = _fail_index(model)
+
+    def frame(self, columns: Dict[str, np.ndarray]):
+        import pandas as pd
+
+        return pd.DataFrame({name: columns[name] for name in self.features}, columns=self.features)
+
+    def _answer(self, probs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # The classifier's predict is argmax over predict_proba; reuse it instead of a second pass
+        classes = self.classes.take(np.argmax(probs, axis=1)).astype(np.int64)
+        return probs[:, self.fail_index].astype(float), classes
+
+    def predict_risk(self, columns: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        return self._answer(self.model.predict_proba(self.frame(columns)))
+
+    def risk_votes(self, columns: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Per-tree class probabilities of a random forest, in one pass over the trees.
+
+        This is the work RandomForestClassifier.predict_proba does internally,
+        but each tree's output is kept instead of only summed, so the forest
+        mean and the spread across trees come from the same evaluation.
+        """
+        from joblib import Parallel, delayed
+        from sklearn.utils import check_array
+
+        clf = self.model.named_steps['clf']
+        estimators = getattr(clf, 'estimators_', None)
+        if not estimators:
+            return super().risk_votes(columns)
+        # The trees are called with check_input=False: give them the float32 (CSR) input they
+        # expect. NaN is allowed, as in the forest's own predict_proba (trees route missing values).
+        X = check_array(self.model.named_steps['prep'].transform(self.frame(columns)),
+                        dtype=np.float32, accept_sparse="csr", force_all_finite="allow-nan")
+        if hasattr(X, "indices") and X.indices.dtype != np.intc:
+            return super().risk_votes(columns)
+        votes = np.empty((len(estimators), X.shape[0], len(clf.classes_)))
+
+        def fill(index, tree):
+            votes[index] = tree.predict_proba(X, check_input=False)
+
+        # n_jobs=None follows the parallel_config opened by inference_threads()
+        Parallel(n_jobs=None, require="sharedmem")(delayed(fill)(i, tree) for i, tree in enumerate(estimators))
+        risk, classes = self._answer(votes.mean(axis=0))
+        return risk, classes, votes[:, :, self.fail_index]
+
+
+class HeuristicBackend(InferenceBackend):
+    """The rule-based DummyModel served when no trained model is available."""
+
+    kind = "heuristic"
+
+    def __init__(self, model: DummyModel):
+        self.model = model
+        self.features = list(DummyModel.FEATURES)
+
+    def predict_risk(self, columns: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        risk = self.model.risk(columns)
+        return risk, np.where(risk > 0.5, FAIL, PASS).astype(np.int64)
+
+
+def inference_backend(model: Any) -> InferenceBackend:
+    """The inference backend of a loaded model (cached per model)."""
+    backend = _backends.get(model)
+    if backend is None:
+        with _lock:
+            backend = _backends.get(model)
+            if backend is None:
+                backend = HeuristicBackend(model) if isinstance(model, DummyModel) else PipelineBackend(model)
+                _backends[model] = backend
+    return backend
+
+
+def columns_from_rows(rows: List[Dict[str, Any]], features: List[str]) -> Dict[str, np.ndarray]:
+    """Columns of already prepared feature dicts (None = missing)."""
+    columns = {}
+    for name in features:
+        values = [row.get(name) for row in rows]
+        if all(value is None or isinstance(value, (int, float)) for value in values):
+            columns[name] = np.array(values, dtype=float)
+        else:
+            columns[name] = np.fromiter(values, dtype=object, count=len(values))
+    return columns
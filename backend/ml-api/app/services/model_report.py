@@ -0,0 +1,296 @@
+from typing import Any, Dict, List, Optional
+import logging
+import os
+import threading
+import time
+import weakref
+
+import numpy as np
+
+from app.core.config import MODEL_HOLDOUT_PATH
+from app.core.http_cache import json_etag
+from app.core.model_loader import DummyModel
+from app.core.parallelism import inference_threads
+from app.services.drift_monitor import load_reference
+from app.services.inference import _expected_features, columns_from_rows, inference_backend
+from app.services.predictor import _get_feature_importance, _score_to_category
+
+logger = logging.getLogger(__name__)
+
+PDP_GRID_POINTS = 20
+# Differ per worker and per restart for the same model: not part of the ETag
+_TIMING_FIELDS = ("generated_at", "generation_seconds")
+PDP_BACKGROUND_ROWS = 200
+CALIBRATION_BINS = 10
+
+# Fallback PDP ranges when model_info.json has no reference sketches
+_DEFAULT_RANGES = {
+    "attendance": (0.0, 100.0),
+    "study_hours": (0.0, 10.0),
+    "internal_marks": (0.0, 100.0),
+    "assignments_submitted": (0.0, 10.0),
+}
+
+# Canned scenarios shown by /analysis/analyze-model
+TEST_CASES = [
+    {
+        "name": "Very Low Performance",
+        "features": {
+            "attendance": 5,
+            "study_hours": 5,
+            "assignments_submitted": 2,
+            "internal_marks": 30,
+            "activities": "low"
+        },
+        "expected_behavior": "Should predict Fail with high risk",
+    },
+    {
+        "name": "Very High Performance",
+        "features": {
+            "attendance": 95,
+            "study_hours": 35,
+            "assignments_submitted": 15,
+            "internal_marks": 90,
+            "activities": "high"
+        },
+        "expected_behavior": "Should predict Pass with low risk",
+    },
+    {
+        "name": "Medium Performance",
+        "features": {
+            "attendance": 75,
+            "study_hours": 20,
+            "assignments_submitted": 8,
+            "internal_marks": 70,
+            "activities": "medium"
+        },
+        "expected_behavior": "Should predict based on balanced features",
+    },
+]
+
+# Sample used by /diagnostic/test-prediction
+TEST_PREDICTION_FEATURES = {
+    "attendance": 85,
+    "study_hours": 25,
+    "assignments_submitted": 10,
+    "internal_marks": 75,
+}
+
+_reports: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def _risk_scores(model, columns: Dict[str, np.ndarray]) -> np.ndarray:
+    """P(Fail) of feature columns, through the model's inference backend like every prediction."""
+    with inference_threads(len(next(iter(columns.values())))):
+        return inference_backend(model).predict_risk(columns)[0]
+
+
+def _frame_columns(df) -> Dict[str, np.ndarray]:
+    return {name: df[name].to_numpy() for name in df.columns}
+
+
+def _load_holdout(expected_features: List[str]):
+    import pandas as pd
+
+    if not os.path.exists(MODEL_HOLDOUT_PATH):
+        logger.info(f"No held-out set at {MODEL_HOLDOUT_PATH}; report will skip calibration")
+        return None, None
+    holdout = pd.read_csv(MODEL_HOLDOUT_PATH)
+    y = holdout["performance"].map({"Fail": 0, "Pass": 1}) if "performance" in holdout.columns else None
+    return holdout[expected_features], y
+
+
+def _pdp_grid(feature: str, reference: Optional[Dict[str, Any]], background) -> List[Any]:
+    sketch = (reference or {}).get("features", {}).get(feature)
+    if sketch and sketch["type"] == "numeric":
+        low, high = sketch["quantiles"]["0.01"], sketch["quantiles"]["0.99"]
+    elif background is not None and feature in background:
+        low, high = float(background[feature].min()), float(background[feature].max())
+    else:
+        low, high = _DEFAULT_RANGES.get(feature, (0.0, 100.0))
+    return [float(v) for v in np.linspace(low, high, PDP_GRID_POINTS)]
+
+
+def _partial_dependence(model, expected_features: List[str], categories: List[str],
+                        background, reference) -> Dict[str, Any]:
+    """One backend call per feature over (grid x background) rows."""
+    curves = {}
+    columns = _frame_columns(background)
+    for feature in expected_features:
+        if feature == "activities":
+            grid = list(categories) or ["low", "medium", "high"]
+        else:
+            grid = _pdp_grid(feature, reference, background)
+        stacked = {name: np.tile(values, len(grid)) for name, values in columns.items()}
+        stacked[feature] = np.repeat(np.asarray(grid, dtype=object if feature == "activities" else float), len(background))
+        risk = _risk_scores(model, stacked).reshape(len(grid), len(background))
+        curves[feature] = {
+            "grid": grid,
+            "mean_risk": [float(v) for v in risk.mean(axis=1)],
+            "p10_risk": [float(v) for v in np.percentile(risk, 10, axis=1)],
+            "p90_risk": [float(v) for v in np.percentile(risk, 90, axis=1)],
+        }
+    return {"background_rows": int(len(background)), "curves": curves}
+
+
+def _calibration(model, X, y) -> Optional[Dict[str, Any]]:
+    if X is None or y is None or len(X) == 0:
+        return None
+    risk = _risk_scores(model, _frame_columns(X))
+    failed = (y.to_numpy() == 0).astype(float)
+    edges = np.linspace(0, 1, CALIBRATION_BINS + 1)
+    bins = np.clip(np.searchsorted(edges[1:-1], risk, side="right"), 0, CALIBRATION_BINS - 1)
+    table = []
+    for b in range(CALIBRATION_BINS):
+        mask = bins == b
+        count = int(mask.sum())
+        table.append({
+            "lower": float(edges[b]),
+            "upper": float(edges[b + 1]),
+            "count": count,
+            "mean_predicted_risk": float(risk[mask].mean()) if count else None,
+            "observed_fail_rate": float(failed[mask].mean()) if count else None,
+        })
+    predicted_fail = risk >= 0.5
+    return {
+        "holdout_rows": int(len(X)),
+        "brier_score": float(np.mean((risk - failed) ** 2)),
+        "accuracy": float(np.mean(predicted_fail == failed.astype(bool))),
+        "bins": table,
+    }
+
+
+def _scenarios(model, expected_features: List[str]) -> List[Dict[str, Any]]:
+    class_order = [int(c) if isinstance(c, (int, np.integer)) else c for c in model.named_steps['clf'].classes_]
+    risk, classes = inference_backend(model).predict_risk(
+        columns_from_rows([case["features"] for case in TEST_CASES], expected_features)
+    )
+    results = []
+    for case, prob_fail, predicted_class in zip(TEST_CASES, risk, classes):
+        prob_fail = float(prob_fail)
+        results.append({
+            "name": case["name"],
+            "features": case["features"],
+            "class_order": class_order,
+            "prob_fail": prob_fail,
+            "prob_pass": float(1 - prob_fail),
+            "predicted_class": int(predicted_class),
+            "predicted_label": "Pass" if predicted_class == 1 else "Fail",
+            "risk_score_percent": round(prob_fail * 100, 2),
+            "risk_category": _score_to_category(prob_fail),
+            "expected_behavior": case["expected_behavior"],
+        })
+    return results
+
+
+def _test_prediction(model, categories: List[str]) -> Dict[str, Any]:
+    backend = inference_backend(model)
+    test_features = dict(TEST_PREDICTION_FEATURES)
+    test_features["activities"] = categories[0] if categories else "low"
+    risk, classes = backend.predict_risk(columns_from_rows([test_features], backend.features))
+    risk_score = float(risk[0])
+    return {
+        "success": True,
+        "is_dummy_model": isinstance(model, DummyModel),
+        "test_features": test_features,
+        # [P(Fail), P(Pass)], the class order of every backend
+        "probabilities": [risk_score, 1.0 - risk_score],
+        "predicted_class": int(classes[0]),
+        "risk_score": risk_score,
+        "message": "Prediction successful!",
+    }
+
+
+def build_model_report(model, model_hash: str) -> Dict[str, Any]:
+    """
+    Compute everything the analysis/diagnostic endpoints show for one model.
+
+    Args:
+        model: Loaded model (pipeline or DummyModel)
+        model_hash: Content hash of the model artifact
+
+    Returns:
+        JSON-serialisable report with importances, partial dependence,
+        calibration and canned scenario results
+    """
+    import pandas as pd
+
+    start = time.perf_counter()
+    if isinstance(model, DummyModel):
+        report = {
+            "is_dummy": True,
+            "model_hash": model_hash,
+            "expected_numeric_features": list(DummyModel.FEATURES),
+            "expected_categorical_features": [],
+            "feature_importance": model.get_feature_importance(),
+            "test_prediction": _test_prediction(model, []),
+        }
+    else:
+        preprocessor = model.named_steps['prep']
+        classifier = model.named_steps['clf']
+        expected_features = _expected_features(model)
+        numeric_features = list(preprocessor.named_transformers_['num'].feature_names_in_)
+        cat_transformer = preprocessor.named_transformers_['cat']
+        categories = [str(c) for c in cat_transformer.categories_[0]] if hasattr(cat_transformer, 'categories_') else []
+
+        reference = load_reference()
+        X_holdout, y_holdout = _load_holdout(expected_features)
+        if X_holdout is not None and len(X_holdout):
+            background = X_holdout.sample(
+                n=min(PDP_BACKGROUND_ROWS, len(X_holdout)), random_state=42
+            ).reset_index(drop=True)
+        else:
+            # Single median student built from the reference sketches
+            row = {}
+            for feature in expected_features:
+                sketch = (reference or {}).get("features", {}).get(feature, {})
+                if feature == "activities":
+                    row[feature] = max(sketch["frequencies"], key=sketch["frequencies"].get) if sketch else "low"
+                else:
+                    row[feature] = sketch.get("quantiles", {}).get("0.5", float(np.mean(_DEFAULT_RANGES.get(feature, (0, 100)))))
+            background = pd.DataFrame([row], columns=expected_features)
+
+        report = {
+            "is_dummy": False,
+            "model_hash": model_hash,
+            "numeric_features": numeric_features,
+            "categorical_categories": categories,
+            "expected_numeric_features": numeric_features,
+            "expected_categorical_features": [f for f in expected_features if f not in numeric_features],
+            "feature_importance": {k: float(v) for k, v in _get_feature_importance(model, {}).items()},
+            "partial_dependence": _partial_dependence(model, expected_features, categories, background, reference),
+            "calibration": _calibration(model, X_holdout, y_holdout),
+            "test_cases": _scenarios(model, expected_features),
+            "test_prediction": _test_prediction(model, categories),
+            "model_info": {
+                "n_estimators": getattr(classifier, 'n_estimators', 'unknown'),
+                "max_depth": getattr(classifier, 'max_depth', 'unknown'),
+                "learning_rate": getattr(classifier, 'learning_rate', 'unknown'),
+            },
+        }
+    report["generated_at"] = time.time()
+    report["generation_seconds"] = round(time.perf_counter() - start, 3)
+    logger.info(f"Model report for {model_hash[:12]} generated in {report['generation_seconds']}s")
+    return report
+
+
+def get_model_report(model, model_hash: str) -> tuple:
+    """
+    Report for a model, generated once per loaded model and then cached.
+
+    The ETag depends only on the model hash and the report's content, so
+    every worker and restart serving the same model agrees on it.
+
+    Returns:
+        (report, etag)
+    """
+    with _lock:
+        cached = _reports.get(model)
+        if cached is not None and cached[0]["model_hash"] == model_hash:
+            return cached
+        report = build_model_report(model, model_hash)
+        content = {key: value for key, value in report.items() if key not in _TIMING_FIELDS}
+        cached = (report, json_etag([model_hash, content], weak=True))
+        _reports[model] = cached
+        return cached
@@ -0,0 +1,350 @@
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+
+import numpy as np
+
+from app.core.config import (
+    MODEL_HOLDOUT_PATH,
+    PERMUTATION_IMPORTANCE_ENABLED,
+    PERMUTATION_IMPORTANCE_MAX_ROWS,
+    PERMUTATION_IMPORTANCE_REPEATS,
+    PERMUTATION_IMPORTANCE_RETRY_SECONDS,
+    PERMUTATION_IMPORTANCE_WORKERS,
+)
+
+logger = logging.getLogger(__name__)
+
+CONFIDENCE_LEVEL = 0.95
+HOLDOUT_FILENAME = "model_holdout.csv"
+_SEED = 42
+
+# Finished results by model hash; the request path only ever reads this
+_results: Dict[str, Dict[str, Any]] = {}
+_pending: Dict[str, Future] = {}
+# Failure message and monotonic time by model hash; retried after PERMUTATION_IMPORTANCE_RETRY_SECONDS
+_errors: Dict[str, Tuple[str, float]] = {}
+_lock = threading.Lock()
+# Waits on the pool's feature tasks (and the sidecar lock) off the request path
+_coordinator: Optional[ThreadPoolExecutor] = None
+# Inside pool processes: inputs of the artifact being scored
+_inputs: Dict[tuple, tuple] = {}
+
+
+def sidecar_path(artifact_path: str) -> str:
+    """Where the result for a model artifact is stored: model.pkl -> model.importance.json."""
+    return os.path.splitext(artifact_path)[0] + ".importance.json"
+
+
+def holdout_path_for(artifact_path: str) -> str:
+    """Held-out rows of a model version: next to the artifact if present, else MODEL_HOLDOUT_PATH."""
+    local = os.path.join(os.path.dirname(os.path.abspath(artifact_path)), HOLDOUT_FILENAME)
+    return local if os.path.isfile(local) else MODEL_HOLDOUT_PATH
+
+
+@contextmanager
+def _sidecar_lock(artifact_path: str):
+    """
+    Exclusive lock on an artifact's sidecar, held across processes.
+
+    Every uvicorn worker schedules the same computation; the first one to
+    take the lock computes and writes, the others wait and then read the
+    file it wrote. Without fcntl (Windows) there is no lock.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    with open(sidecar_path(artifact_path) + ".lock", "a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _load_inputs(artifact_path: str, holdout_path: str, max_rows: int, seed: int) -> tuple:
+    """Model, held-out features, Fail labels and fail index, loaded once per pool process."""
+    key = (artifact_path, os.path.getmtime(artifact_path), holdout_path, max_rows, seed)
+    if key not in _inputs:
+        import joblib
+        import pandas as pd
+
+        from app.core.parallelism import make_sequential
+        from app.services.inference import _expected_features, _fail_index
+
+        model = make_sequential(joblib.load(artifact_path))
+        expected_features = _expected_features(model)
+        holdout = pd.read_csv(holdout_path)
+        if "performance" not in holdout.columns:
+            raise ValueError(f"{holdout_path} has no 'performance' column")
+        if len(holdout) > max_rows:
+            holdout = holdout.sample(n=max_rows, random_state=seed)
+        X = holdout[expected_features].reset_index(drop=True)
+        failed = (holdout["performance"].to_numpy() == "Fail").astype(float)
+        # One model per process: drop the previous artifact's arrays
+        _inputs.clear()
+        _inputs[key] = (model, X, failed, _fail_index(model), expected_features)
+    return _inputs[key]
+
+
+def _baseline_scores(artifact_path: str, holdout_path: str, max_rows: int, seed: int) -> Dict[str, Any]:
+    """Pool task: unpermuted Brier score and accuracy, plus the features to permute."""
+    model, X, failed, fail_index, expected_features = _load_inputs(artifact_path, holdout_path, max_rows, seed)
+    risk = model.predict_proba(X)[:, fail_index]
+    return {
+        "features": expected_features,
+        "rows": len(X),
+        "brier_score": float(np.mean((risk - failed) ** 2)),
+        "accuracy": float(np.mean((risk >= 0.5) == failed.astype(bool))),
+    }
+
+
+def _feature_scores(artifact_path: str, holdout_path: str, max_rows: int, seed: int,
+                    feature_index: int, repeats: int) -> Dict[str, List[float]]:
+    """
+    Pool task: Brier score and accuracy of every repeat with one feature shuffled.
+
+    All repeats are scored in a single predict_proba call. The shuffles are
+    seeded by (seed, feature_index), so results do not depend on which
+    process runs which feature.
+    """
+    import pandas as pd
+
+    model, X, failed, fail_index, expected_features = _load_inputs(artifact_path, holdout_path, max_rows, seed)
+    feature = expected_features[feature_index]
+    n = len(X)
+    rng = np.random.default_rng([seed, feature_index])
+    stacked = pd.concat([X] * repeats, ignore_index=True)
+    column = X[feature].to_numpy()
+    stacked[feature] = np.concatenate([column[rng.permutation(n)] for _ in range(repeats)])
+    permuted = model.predict_proba(stacked)[:, fail_index].reshape(repeats, n)
+    return {
+        "brier_score": np.mean((permuted - failed) ** 2, axis=1).tolist(),
+        "accuracy": np.mean((permuted >= 0.5) == failed.astype(bool), axis=1).tolist(),
+    }
+
+
+def compute_permutation_importance(artifact_path: str, holdout_path: str, model_hash: str,
+                                   repeats: int, max_rows: int, seed: int = _SEED,
+                                   workers: int = 0) -> Dict[str, Any]:
+    """
+    Permutation importance of one model artifact on its held-out rows.
+
+    Importance is the increase of the Brier score of the risk (P(Fail))
+    when one feature's column is shuffled. The baseline and each feature
+    are separate tasks on a process pool of `workers` processes, so
+    features are scored in parallel; with no workers they run here. The
+    pool is started only when there is something to compute and is shut
+    down before returning. The result is written next to the artifact (see sidecar_path) under a
+    cross-process lock, and a result another worker already wrote for the
+    same model hash is returned instead of recomputing it.
+
+    Returns:
+        JSON-serialisable result with the mean importance, its spread and
+        a t confidence interval per feature
+    """
+    with _sidecar_lock(artifact_path):
+        existing = _read_sidecar(artifact_path, model_hash)
+        if existing is not None:
+            return existing
+        with _process_pool(workers) as pool:
+            return _compute(artifact_path, holdout_path, model_hash, repeats, max_rows, seed, pool)
+
+
+def _compute(artifact_path: str, holdout_path: str, model_hash: str, repeats: int, max_rows: int,
+             seed: int, pool: Optional[ProcessPoolExecutor]) -> Dict[str, Any]:
+    """Body of compute_permutation_importance, run under the sidecar lock."""
+    from scipy import stats
+
+    def run(fn, *args):
+        return pool.submit(fn, *args) if pool is not None else _Done(fn(*args))
+
+    start = time.perf_counter()
+    baseline = run(_baseline_scores, artifact_path, holdout_path, max_rows, seed).result()
+    tasks = [
+        run(_feature_scores, artifact_path, holdout_path, max_rows, seed, index, repeats)
+        for index in range(len(baseline["features"]))
+    ]
+
+    t_value = float(stats.t.ppf(0.5 + CONFIDENCE_LEVEL / 2, df=max(1, repeats - 1)))
+    features = {}
+    for feature, task in zip(baseline["features"], tasks):
+        scores = task.result()
+        drops = np.asarray(scores["brier_score"]) - baseline["brier_score"]
+        mean = float(drops.mean())
+        std = float(drops.std(ddof=1)) if repeats > 1 else 0.0
+        half_width = t_value * std / np.sqrt(repeats)
+        features[feature] = {
+            "mean": mean,
+            "std": std,
+            "ci_low": mean - half_width,
+            "ci_high": mean + half_width,
+            "accuracy_drop": float(baseline["accuracy"] - np.mean(scores["accuracy"])),
+        }
+
+    result = {
+        "model_hash": model_hash,
+        "metric": "brier_score_increase",
+        "baseline": {"brier_score": baseline["brier_score"], "accuracy": baseline["accuracy"]},
+        "holdout_rows": int(baseline["rows"]),
+        "repeats": int(repeats),
+        "confidence_level": CONFIDENCE_LEVEL,
+        "features": dict(sorted(features.items(), key=lambda item: item[1]["mean"], reverse=True)),
+        "generated_at": time.time(),
+        "generation_seconds": round(time.perf_counter() - start, 3),
+    }
+
+    path = sidecar_path(artifact_path)
+    try:
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(result, f, indent=2)
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning(f"Could not store permutation importance at {path}: {e}")
+    return result
+
+
+class _Done:
+    """Result of a task run inline, with the Future interface compute_permutation_importance uses."""
+
+    def __init__(self, value: Any):
+        self._value = value
+
+    def result(self) -> Any:
+        return self._value
+
+
+def _read_sidecar(artifact_path: str, model_hash: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(sidecar_path(artifact_path), "r") as f:
+            result = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # A retrained artifact at the same path invalidates the stored result
+    return result if result.get("model_hash") == model_hash else None
+
+
+def _pool_size() -> int:
+    """PERMUTATION_IMPORTANCE_WORKERS, or half the cores (at least one) when it is 0."""
+    if PERMUTATION_IMPORTANCE_WORKERS > 0:
+        return PERMUTATION_IMPORTANCE_WORKERS
+    return max(1, (os.cpu_count() or 2) // 2)
+
+
+@contextmanager
+def _process_pool(workers: int):
+    """A process pool of `workers` processes for one computation (None when workers is 0)."""
+    if workers <= 0:
+        yield None
+        return
+    # spawn: forking a process that runs inference threads is not safe
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        yield pool
+    finally:
+        # Between model versions no processes (or their model copies) stay resident
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _get_coordinator() -> ThreadPoolExecutor:
+    global _coordinator
+    if _coordinator is None:
+        _coordinator = ThreadPoolExecutor(max_workers=2, thread_name_prefix="permutation-importance")
+    return _coordinator
+
+
+def _finished(model_hash: str, future: Future) -> None:
+    with _lock:
+        _pending.pop(model_hash, None)
+        try:
+            result = future.result()
+        except Exception as e:
+            _errors[model_hash] = (str(e), time.monotonic())
+            logger.error(
+                f"❌ Permutation importance for {model_hash[:12]} failed: {e} "
+                f"(retrying in {PERMUTATION_IMPORTANCE_RETRY_SECONDS:g}s)"
+            )
+            return
+        _results[model_hash] = result
+    logger.info(
+        f"Permutation importance for {model_hash[:12]} computed in {result['generation_seconds']}s "
+        f"({result['holdout_rows']} rows x {result['repeats']} repeats)"
+    )
+
+
+def _failed_recently(model_hash: str) -> bool:
+    """Whether the last computation for a model failed less than the retry interval ago (caller holds _lock)."""
+    error = _errors.get(model_hash)
+    return error is not None and time.monotonic() - error[1] < PERMUTATION_IMPORTANCE_RETRY_SECONDS
+
+
+def ensure_permutation_importance(artifact_path: str, model_hash: str) -> Optional[Dict[str, Any]]:
+    """
+    Result for a model artifact, scheduling its computation if needed.
+
+    Never computes on the caller's thread: a missing result is loaded from
+    the artifact's sidecar file or submitted to the background coordinator.
+    A failed computation is scheduled again once
+    PERMUTATION_IMPORTANCE_RETRY_SECONDS have passed since it failed.
+
+    Returns:
+        The result, or None while it is pending (or disabled/unavailable)
+    """
+    if not PERMUTATION_IMPORTANCE_ENABLED or model_hash == "dummy":
+        return None
+    with _lock:
+        if model_hash in _results:
+            return _results[model_hash]
+        if model_hash in _pending or _failed_recently(model_hash):
+            return None
+    result = _read_sidecar(artifact_path, model_hash)
+    with _lock:
+        if result is not None:
+            _results[model_hash] = result
+            return result
+        if model_hash in _pending or _failed_recently(model_hash):
+            return None
+        holdout_path = holdout_path_for(artifact_path)
+        if not os.path.isfile(holdout_path):
+            _errors[model_hash] = (f"No held-out set at {holdout_path}", time.monotonic())
+            logger.info(f"No held-out set at {holdout_path}; permutation importance unavailable")
+            return None
+        _errors.pop(model_hash, None)
+        future = _get_coordinator().submit(
+            compute_permutation_importance, artifact_path, holdout_path, model_hash,
+            PERMUTATION_IMPORTANCE_REPEATS, PERMUTATION_IMPORTANCE_MAX_ROWS, _SEED, _pool_size(),
+        )
+        _pending[model_hash] = future
+    future.add_done_callback(lambda f: _finished(model_hash, f))
+    logger.info(f"Permutation importance for {model_hash[:12]} scheduled")
+    return None
+
+
+def cached_permutation_importance(model_hash: str) -> Optional[Dict[str, Any]]:
+    """The finished result for a model, if any; a dictionary lookup, safe on the request path."""
+    return _results.get(model_hash)
+
+
+def permutation_importance_status(model_hash: str) -> Dict[str, Any]:
+    """Result or state ("pending", "failed", "unavailable", "disabled") for the analysis endpoint."""
+    if not PERMUTATION_IMPORTANCE_ENABLED:
+        return {"status": "disabled"}
+    with _lock:
+        if model_hash in _results:
+            return {"status": "ready", **_results[model_hash]}
+        if model_hash in _pending:
+            return {"status": "pending"}
+        if model_hash in _errors:
+            message, failed_at = _errors[model_hash]
+            retry_in = max(0.0, PERMUTATION_IMPORTANCE_RETRY_SECONDS - (time.monotonic() - failed_at))
+            return {"status": "failed", "error": message, "retry_in_seconds": round(retry_in, 1)}
+    return {"status": "unavailable"}
@@ -1,15 +1,36 @@
-from typing import Dict, Any, List
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional
 import numpy as np
 import logging
 import traceback
+import weakref
 
-from app.core.model_loader import get_model
+from app.core.admission import checkpoint
+from app.core.config import ADMISSION_BULK_SLICE_ROWS, MODEL_DEFAULT_VERSION, UNCERTAINTY_INTERVAL
+from app.core.model_loader import get_model, get_model_hash
+from app.core.model_registry import ModelNotFoundError, get_model_registry
+from app.core.parallelism import inference_threads
+from app.core.tracing import span
+from app.services.result_store import feature_key, get_result_store
+from app.services.batch_summary import risk_levels, summarize_batch
+from app.services.drift_monitor import load_reference, observe_features
+from app.services.feature_schema import ValidatedFeatures, get_feature_schema
+from app.services.inference import columns_from_rows, inference_backend
+from app.services.permutation_importance import cached_permutation_importance
+from app.services.shadow import shadow_submit
 from app.schemas.prediction import (
     SinglePredictionRequest,
     SinglePredictionResponse,
     BatchPredictionRequest,
     BatchPredictionResponse,
     BatchPredictionItem,
+    PredictionUncertainty,
+    CategoryChange,
+    DeltaSummary,
+    TopKRequest,
+    TopKResponse,
+    TopRiskItem,
 )
 
 logger = logging.getLogger(__name__)
@@ -18,6 +39,23 @@ logger = logging.getLogger(__name__)
 RISK_THRESHOLD_HIGH = 0.7
 RISK_THRESHOLD_MEDIUM = 0.4
 
+# Set while synthetic warmup requests run, so they never reach the result
+# store, the drift sketches or the shadow queue
+_WARMUP: ContextVar[bool] = ContextVar("predictor_warmup", default=False)
+
+# Impurity importances per loaded model. RandomForest.feature_importances_ is a
+# property that averages over every tree on each access, so it is computed once.
+_importance_cache: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+# Synthetic student used to exercise every inference path during warmup
+WARMUP_FEATURES = {
+    "attendance": 75,
+    "study_hours": 3,
+    "assignments_completed": 5,
+    "internal_marks": 35,
+    "activities": "medium",
+}
+
 
 def _score_to_category(score: float) -> str:
     """
@@ -47,6 +85,9 @@ def _get_feature_importance(model, features: Dict[str, Any]) -> Dict[str, float]
     Returns:
         Dictionary mapping feature names to importance scores
     """
+    cached = _importance_cache.get(model) if hasattr(model, 'named_steps') else None
+    if cached is not None:
+        return dict(cached)
     try:
         # Check if model has feature_importances_ attribute (Random Forest)
         if hasattr(model, 'named_steps') and 'clf' in model.named_steps:
@@ -76,16 +117,17 @@ def _get_feature_importance(model, features: Dict[str, Any]) -> Dict[str, float]
                 for i, feat_name in enumerate(all_features):
                     # For one-hot encoded features, map back to original
                     if feat_name.startswith('activities_'):
-                        importance_dict['activities'] = importance_dict.get('activities', 0) + importances[i]
+                        importance_dict['activities'] = importance_dict.get('activities', 0) + float(importances[i])
                     else:
-                        importance_dict[feat_name] = importances[i]
+                        importance_dict[feat_name] = float(importances[i])
                 
                 # Normalize to sum to 1
                 total = sum(importance_dict.values())
                 if total > 0:
                     importance_dict = {k: v / total for k, v in importance_dict.items()}
                 
-                return importance_dict
+                _importance_cache[model] = importance_dict
+                return dict(importance_dict)
     except Exception as e:
         logger.warning(f"Could not extract feature importance: {e}")
     
@@ -103,189 +145,306 @@ def _get_feature_importance(model, features: Dict[str, Any]) -> Dict[str, float]
     return {k: value for k in features.keys()}
 
 
-def _prepare_features_for_model(features: Dict[str, Any], model=None) -> Dict[str, Any]:
+def _permutation_importance(model_hash: str) -> Optional[Dict[str, float]]:
+    """Mean permutation importance per feature of a model, if already computed in the background."""
+    result = cached_permutation_importance(model_hash)
+    if result is None:
+        return None
+    return {feature: values["mean"] for feature, values in result["features"].items()}
+
+
+def _validate_features(records: List[Dict[str, Any]]) -> ValidatedFeatures:
     """
-    Prepare features for the model by mapping frontend names to dataset names.
-    
-    The frontend sends:
-    - attendance
-    - study_hours
-    - assignments_completed
-    - internal_marks (optional)
-    - activities (optional)
-    
-    The model expects:
-    - attendance
-    - study_hours
-    - internal_marks
-    - assignments_submitted (not assignments_completed)
-    - activities
+    Check request records against the model's feature schema.
+
+    Raises:
+        FeatureValidationError: with a report per invalid record
     """
-    # Map assignments_completed to assignments_submitted
-    prepared = features.copy()
-    if 'assignments_completed' in prepared and 'assignments_submitted' not in prepared:
-        prepared['assignments_submitted'] = prepared.pop('assignments_completed')
-    
-    # Set default for activities if not provided
-    if 'activities' not in prepared:
-        prepared['activities'] = 'low'  # Default to 'low' to match dataset
-    
-    # Handle unknown categories for 'activities' if model is provided
-    if model is not None and 'activities' in prepared:
-        try:
-            from app.core.model_loader import DummyModel
-            if not isinstance(model, DummyModel) and hasattr(model, 'named_steps'):
-                preprocessor = model.named_steps.get('prep')
-                if preprocessor:
-                    cat_transformer = preprocessor.named_transformers_.get('cat')
-                    if cat_transformer and hasattr(cat_transformer, 'categories_'):
-                        known_categories = cat_transformer.categories_[0] if len(cat_transformer.categories_) > 0 else []
-                        if len(known_categories) > 0:
-                            known_categories = list(known_categories)
-                            if prepared['activities'] not in known_categories:
-                                logger.warning(
-                                    f"Unknown activity category '{prepared['activities']}'. "
-                                    f"Known categories: {known_categories}. "
-                                    f"Using default: '{known_categories[0] if known_categories else 'low'}'"
-                                )
-                                prepared['activities'] = known_categories[0] if known_categories else 'low'
-        except Exception as e:
-            logger.warning(f"Could not validate activity category: {e}. Using provided value: {prepared.get('activities', 'low')}")
-    
-    return prepared
+    validated = get_feature_schema().validate(records)
+    validated.raise_for_errors()
+    return validated
+
 
+def _out_of_range(columns: Dict[str, np.ndarray]) -> List[List[str]]:
+    """Per row, the numeric features outside the range seen in training (or missing)."""
+    n = len(next(iter(columns.values()))) if columns else 0
+    flagged: List[List[str]] = [[] for _ in range(n)]
+    sketches = (load_reference() or {}).get("features", {})
+    for feature, sketch in sketches.items():
+        if sketch.get("type") != "numeric" or feature not in columns:
+            continue
+        values = np.asarray(columns[feature], dtype=float)
+        outside = (values < sketch["min"]) | (values > sketch["max"]) | np.isnan(values)
+        for i in np.flatnonzero(outside):
+            flagged[i].append(feature)
+    return flagged
 
-def predict_single(req: SinglePredictionRequest) -> SinglePredictionResponse:
+
+def _predict_columns(model, columns: Dict[str, np.ndarray],
+                     uncertainty: Optional[List[PredictionUncertainty]] = None) -> tuple:
+    """
+    Score typed feature columns through the model's inference backend, in
+    slices of ADMISSION_BULK_SLICE_ROWS.
+
+    Before each slice, bulk requests yield to waiting interactive requests
+    (see app.core.admission.checkpoint).
+
+    Args:
+        columns: Feature name -> array, all of one length (see ValidatedFeatures)
+        uncertainty: If a list is passed, every ensemble member's vote is kept
+            (see InferenceBackend.risk_votes) and one PredictionUncertainty per
+            row is appended
+
+    Returns:
+        (risk_scores, predicted_classes) arrays aligned with the rows
+    """
+    backend = inference_backend(model)
+    n = len(next(iter(columns.values()))) if columns else 0
+    risk = np.empty(n, dtype=float)
+    classes = np.empty(n, dtype=np.int64)
+    lower_q, upper_q = (1 - UNCERTAINTY_INTERVAL) / 2, (1 + UNCERTAINTY_INTERVAL) / 2
+    slice_rows = max(1, ADMISSION_BULK_SLICE_ROWS)
+    for start in range(0, n, slice_rows):
+        checkpoint()
+        stop = min(n, start + slice_rows)
+        part = {name: values[start:stop] for name, values in columns.items()}
+        # Threads follow the size of the whole request, not of the admission slice
+        with inference_threads(stop - start, request_rows=n):
+            if uncertainty is None:
+                risk[start:stop], classes[start:stop] = backend.predict_risk(part)
+            else:
+                risk[start:stop], classes[start:stop], votes = backend.risk_votes(part)
+        if uncertainty is not None:
+            ood = _out_of_range(part)
+            part_risk = risk[start:stop]
+            std = votes.std(axis=0)
+            low, high = np.quantile(votes, [lower_q, upper_q], axis=0)
+            agreement = np.mean((votes >= 0.5) == (part_risk >= 0.5), axis=0)
+            uncertainty.extend(
+                PredictionUncertainty(
+                    risk_std=float(std[i]),
+                    interval_low=float(low[i]),
+                    interval_high=float(high[i]),
+                    interval_level=UNCERTAINTY_INTERVAL,
+                    tree_agreement=float(agreement[i]),
+                    out_of_distribution=bool(ood[i]),
+                    ood_features=ood[i],
+                )
+                for i in range(stop - start)
+            )
+    return risk, classes
+
+
+def _as_results(risk: np.ndarray, classes: np.ndarray) -> List[tuple]:
+    """(risk_score, predicted_class) tuples of plain Python numbers."""
+    return list(zip(risk.tolist(), classes.tolist()))
+
+
+def _predict_rows(model, rows: List[Dict[str, Any]],
+                  uncertainty: Optional[List[PredictionUncertainty]] = None) -> List[tuple]:
+    """
+    Score prepared feature dicts (shadow traffic, warmup); see _predict_columns.
+
+    Returns:
+        List of (risk_score, predicted_class) tuples aligned with rows
+    """
+    columns = columns_from_rows(rows, inference_backend(model).features)
+    return _as_results(*_predict_columns(model, columns, uncertainty))
+
+
+def _resolve_model(model_version: Optional[str] = None) -> tuple:
+    """
+    Pick the model serving a request.
+
+    Without a registry (or without a requested/default version) this is the
+    single MODEL_PATH model. Registry versions are only ever served when
+    already resident; see ModelRegistry.get.
+
+    Args:
+        model_version: Version requested via the X-Model-Version header
+
+    Returns:
+        (model, version_label, model_hash)
+    """
+    registry = get_model_registry()
+    version = model_version or (MODEL_DEFAULT_VERSION if registry is not None else None)
+    if version:
+        if registry is None:
+            raise ModelNotFoundError(
+                f"Model version '{version}' requested but MODEL_REGISTRY_DIR is not configured"
+            )
+        entry = registry.get(version)
+        return entry.model, entry.version, entry.model_hash
+    model_hash = get_model_hash()
+    return get_model(), model_hash[:12], model_hash
+
+
+def _score_rows(model, features: ValidatedFeatures, model_hash: str,
+                uncertainty: Optional[List[PredictionUncertainty]] = None) -> List[tuple]:
+    """
+    Score validated features, reusing results from the persistent store when enabled.
+
+    All rows are looked up in one pass; only the misses reach the model,
+    as one columnar call.
+
+    Args:
+        model: Loaded model (any inference backend)
+        features: Validated feature columns
+        model_hash: Content hash of the model, part of every cache key
+        uncertainty: If a list is passed, every row is scored (the store only
+            holds scores) and per-row uncertainty is appended to it
+
+    Returns:
+        List of (risk_score, predicted_class) tuples aligned with the rows
+    """
+    store = get_result_store()
+    if store is None or _WARMUP.get():
+        return _as_results(*_predict_columns(model, features.columns, uncertainty))
+    key_order = inference_backend(model).features
+    rows = features.rows()
+    if uncertainty is not None:
+        results = _as_results(*_predict_columns(model, features.columns, uncertainty))
+        store.put_many(model_hash, {
+            feature_key(row, key_order): result for row, result in zip(rows, results)
+        })
+        return results
+
+    keys = [feature_key(row, key_order) for row in rows]
+    cached = store.get_many(model_hash, keys)
+
+    miss_indexes = [i for i, key in enumerate(keys) if key not in cached]
+    results: List[tuple] = [cached.get(key) for key in keys]
+
+    if miss_indexes:
+        fresh = _as_results(*_predict_columns(model, features.take(miss_indexes).columns))
+        for i, result in zip(miss_indexes, fresh):
+            results[i] = result
+        store.put_many(model_hash, {keys[i]: result for i, result in zip(miss_indexes, fresh)})
+
+    logger.info(f"Result store: {len(rows) - len(miss_indexes)} hits, {len(miss_indexes)} scored")
+    return results
+
+
+def _score_students(model, features: ValidatedFeatures, model_hash: str, student_ids: List[str], scope: str,
+                    uncertainty: Optional[List[Optional[PredictionUncertainty]]] = None) -> tuple:
+    """
+    Delta scoring keyed by stable student ids.
+
+    Each id's last scored feature fingerprint and result are kept in the
+    result store. Rows whose fingerprint and model are unchanged reuse the
+    stored result; only new or changed rows are scored.
+
+    Args:
+        uncertainty: If a list is passed, it is filled with one entry per
+            row: uncertainty for scored rows, None for reused ones
+
+    Returns:
+        (scored, states, tracked) where scored is aligned (risk_score,
+        predicted_class) tuples, states holds (change, previous_category,
+        previous_score) per row and tracked is False without a result store
+    """
+    store = get_result_store()
+    if store is None or _WARMUP.get():
+        if not _WARMUP.get():
+            logger.warning("Delta scoring requested but RESULT_STORE_PATH is not set; scoring every row")
+        scored = _score_rows(model, features, model_hash, uncertainty)
+        return scored, [("new", None, None)] * features.n_rows, False
+
+    key_order = inference_backend(model).features
+    fingerprints = [feature_key(row, key_order) for row in features.rows()]
+    previous = store.get_students(scope, student_ids)
+
+    scored: List[Optional[tuple]] = [None] * features.n_rows
+    states: List[tuple] = []
+    rescore_indexes = []
+    for i, (student_id, fingerprint) in enumerate(zip(student_ids, fingerprints)):
+        prev = previous.get(student_id)
+        if prev is None:
+            states.append(("new", None, None))
+        else:
+            prev_fingerprint, prev_model_hash, prev_score, prev_class, prev_category = prev
+            if prev_fingerprint != fingerprint:
+                change = "changed"
+            elif prev_model_hash != model_hash:
+                change = "model_updated"
+            else:
+                change = "unchanged"
+                scored[i] = (prev_score, prev_class)
+            states.append((change, prev_category, prev_score))
+        if scored[i] is None:
+            rescore_indexes.append(i)
+
+    if uncertainty is not None:
+        uncertainty.extend([None] * features.n_rows)
+    if rescore_indexes:
+        fresh_uncertainty = [] if uncertainty is not None else None
+        fresh = _score_rows(model, features.take(rescore_indexes), model_hash, fresh_uncertainty)
+        if uncertainty is not None:
+            for i, row_uncertainty in zip(rescore_indexes, fresh_uncertainty):
+                uncertainty[i] = row_uncertainty
+        categories = risk_levels(
+            np.fromiter((score for score, _ in fresh), dtype=float, count=len(fresh)),
+            RISK_THRESHOLD_HIGH, RISK_THRESHOLD_MEDIUM,
+        )
+        for i, result in zip(rescore_indexes, fresh):
+            scored[i] = result
+        store.put_students(scope, [
+            (student_ids[i], fingerprints[i], model_hash, score, predicted_class, str(category))
+            for i, (score, predicted_class), category in zip(rescore_indexes, fresh, categories)
+        ])
+
+    logger.info(f"Delta scoring: {features.n_rows - len(rescore_indexes)} reused, {len(rescore_indexes)} scored")
+    return scored, states, True
+
+
+def predict_single(req: SinglePredictionRequest, model_version: Optional[str] = None) -> SinglePredictionResponse:
     """
     Make a single prediction.
     
     Args:
         req: SinglePredictionRequest with features dictionary
+        model_version: Registry version to use (None = default model)
     
     Returns:
         SinglePredictionResponse with prediction results
     """
-    model = get_model()
+    model, version_label, model_hash = _resolve_model(model_version)
+    scored_by, error_estimate = "model", None
+    row_uncertainty: List[PredictionUncertainty] = []
     
-    # Prepare features for the model (pass model to validate categories)
-    prepared_features = _prepare_features_for_model(req.features, model=model)
+    # Invalid features are rejected here (422), never scored with made-up values
+    with span("preparation"):
+        features = _validate_features([req.features])
+        prepared_features = features.rows()[0]
+        if not _WARMUP.get():
+            observe_features(version_label, [prepared_features])
     
     try:
-        import pandas as pd
-        from app.core.model_loader import DummyModel
-        
         logger.info(f"Prepared features: {prepared_features}")
         logger.info(f"Original input features: {req.features}")
         
-        is_dummy = isinstance(model, DummyModel)
-        
-        if is_dummy:
-            # Dummy model - already returns [normal_prob, risk_prob]
-            logger.warning("Using dummy model for prediction")
-            probs = model.predict_proba([prepared_features])[0]
-            predicted_class = model.predict([prepared_features])[0]
-            risk_score = float(probs[1])  # index 1 = risk
-            logger.info(f"Dummy model probabilities: {probs}, risk_score: {risk_score}")
-        else:
-            logger.info("Using trained Random Forest model")
-            risk_score = None
-            predicted_class = None
-            probs = None
-            
-            try:
-                preprocessor = model.named_steps['prep']
-                
-                numeric_transformer = preprocessor.named_transformers_['num']
-                numeric_features = list(numeric_transformer.feature_names_in_)
-                
-                cat_transformer = preprocessor.named_transformers_['cat']
-                if hasattr(cat_transformer, 'feature_names_in_'):
-                    cat_features = list(cat_transformer.feature_names_in_)
-                else:
-                    cat_features = ['activities']
-                
-                expected_features = numeric_features + cat_features
-                logger.info(f"Expected features (in order): {expected_features}")
-                
-                ordered_features = {}
-                for feat in expected_features:
-                    if feat in prepared_features:
-                        ordered_features[feat] = prepared_features[feat]
-                    else:
-                        if feat == 'activities':
-                            ordered_features[feat] = 'low'
-                        else:
-                            ordered_features[feat] = 0
-                        logger.warning(f"Feature {feat} not provided, using default: {ordered_features[feat]}")
-                
-                features_df = pd.DataFrame([ordered_features], columns=expected_features)
-                logger.info(f"Features DataFrame shape: {features_df.shape}")
-                logger.info(f"Features DataFrame columns: {list(features_df.columns)}")
-                logger.info(f"Features DataFrame values: {features_df.values.tolist()}")
-                logger.info(
-                    f"Feature summary - Attendance: {ordered_features.get('attendance')}%, "
-                    f"Study Hours: {ordered_features.get('study_hours')}, "
-                    f"Assignments: {ordered_features.get('assignments_submitted')}, "
-                    f"Internal Marks: {ordered_features.get('internal_marks')}, "
-                    f"Activities: {ordered_features.get('activities')}"
-                )
-                
-                # ----- FIXED PART: get correct index for 'Fail' -----
-                clf = model.named_steps['clf']
-                probs_all = model.predict_proba(features_df)
-                logger.info(f"Raw prediction probabilities shape: {probs_all.shape}")
-                logger.info(f"Raw prediction probabilities: {probs_all}")
-                probs = probs_all[0]
-                logger.info(f"Prediction probabilities (aligned with classes_ {clf.classes_}): {probs}")
-                
-                predicted_class = model.predict(features_df)[0]
-                logger.info(f"Predicted class: {predicted_class}")
-                
-                classes = list(clf.classes_)
-                logger.info(f"Model classes_: {classes}")
-                
-                # You trained with y: Fail -> 0, Pass -> 1
-                # So risk = P(Fail) = P(class == 0)
-                try:
-                    fail_index = classes.index(0)
-                except ValueError:
-                    # In case in future you switch to string labels
-                    fail_index = classes.index("Fail")
-                
-                risk_score = float(probs[fail_index])
-                logger.info(f"Using fail_index={fail_index}, risk_score={risk_score}")
-                # ----- END FIX -----
-            
-            except Exception as pipeline_error:
-                logger.error(f"Error with pipeline prediction: {pipeline_error}")
-                logger.error(f"Pipeline error traceback: {traceback.format_exc()}")
-                try:
-                    logger.info("Trying fallback: simple DataFrame creation")
-                    features_df = pd.DataFrame([prepared_features])
-                    logger.info(f"Fallback DataFrame columns: {list(features_df.columns)}")
-                    
-                    clf = model.named_steps['clf']
-                    probs_all = model.predict_proba(features_df)
-                    logger.info(f"Fallback probabilities shape: {probs_all.shape}")
-                    probs = probs_all[0]
-                    classes = list(clf.classes_)
-                    logger.info(f"Fallback model classes_: {classes}")
-                    
-                    try:
-                        fail_index = classes.index(0)
-                    except ValueError:
-                        fail_index = classes.index("Fail")
-                    
-                    risk_score = float(probs[fail_index])
-                    predicted_class = model.predict(features_df)[0]
-                    logger.info(f"Fallback successful - Risk score: {risk_score}")
-                except Exception as fallback_error:
-                    logger.error(f"Fallback also failed: {fallback_error}")
-                    logger.error(f"Fallback traceback: {traceback.format_exc()}")
-                    raise fallback_error
-            
-            if risk_score is None or predicted_class is None or probs is None:
-                raise ValueError("Failed to get prediction results from model")
+        risk_score = None
+        if not req.exact and not req.uncertainty:
+            # Imported here: the grid module imports this one
+            from app.services.risk_grid import cached_risk_grid
+            grid = cached_risk_grid(model)
+            if grid is not None and grid.serving:
+                with span("grid_lookup"):
+                    grid_risk, grid_classes = grid.predict_risk(features.columns)
+                # NaN: outside the grid, scored exactly below
+                if not np.isnan(grid_risk[0]):
+                    risk_score, predicted_class = float(grid_risk[0]), int(grid_classes[0])
+                    scored_by, error_estimate = "grid", grid.error["p99_abs_error"]
+        if risk_score is None:
+            with span("inference", rows=1):
+                risk_score, predicted_class = _score_rows(
+                    model, features, model_hash,
+                    uncertainty=row_uncertainty if req.uncertainty else None,
+                )[0]
+        if model_version is None and not _WARMUP.get():
+            # A grid answer is not the model's exact score: the shadow thread re-scores that row
+            shadow_submit([prepared_features], [(risk_score, predicted_class) if scored_by == "model" else None], model)
+        logger.info(f"Predicted class: {predicted_class}, risk_score={risk_score} ({inference_backend(model).kind})")
         
         # Map predicted class to label (frontend expects "at_risk" or "normal")
         # 0 = Fail, 1 = Pass
@@ -300,7 +459,8 @@ def predict_single(req: SinglePredictionRequest) -> SinglePredictionResponse:
         else:
             risk_category = "low"
         
-        feature_importance = _get_feature_importance(model, prepared_features)
+        with span("explanation"):
+            feature_importance = _get_feature_importance(model, prepared_features)
         
         logger.info(
             f"Prediction: {predicted_label}, Risk: {risk_category} ({risk_score:.2f})"
@@ -311,85 +471,219 @@ def predict_single(req: SinglePredictionRequest) -> SinglePredictionResponse:
             risk_category=risk_category,
             risk_score=risk_score,
             feature_importance=feature_importance,
+            model_version=version_label,
+            scored_by=scored_by,
+            error_estimate=error_estimate,
+            uncertainty=row_uncertainty[0] if row_uncertainty else None,
+            permutation_importance=_permutation_importance(model_hash),
         )
     except Exception as e:
+        # No made-up 0.5 result: a failed prediction is an error the caller must see
         logger.error(f"Error making prediction: {e}")
         logger.error(f"Traceback: {traceback.format_exc()}")
-        risk_score = 0.5
-        logger.warning(f"Falling back to default prediction with risk_score={risk_score}")
-        return SinglePredictionResponse(
-            predicted_label="Fail",
-            risk_category="At-Risk",
-            risk_score=risk_score,
-            feature_importance=_get_feature_importance(model, prepared_features),
-        )
+        raise Exception(f"Prediction failed: {str(e)}")
 
 
-def predict_batch(req: BatchPredictionRequest) -> BatchPredictionResponse:
+def predict_batch(req: BatchPredictionRequest, model_version: Optional[str] = None) -> BatchPredictionResponse:
     """
     Make batch predictions for multiple records.
     
     Args:
         req: BatchPredictionRequest with list of feature dictionaries
+        model_version: Registry version to use (None = default model)
     
     Returns:
         BatchPredictionResponse with list of prediction results
     """
-    model = get_model()
+    model, version_label, model_hash = _resolve_model(model_version)
     features_list: List[Dict[str, Any]] = req.records
     
-    prepared_features_list = [
-        _prepare_features_for_model(features, model=model) for features in features_list
-    ]
+    with span("preparation", rows=len(features_list)):
+        features = _validate_features(features_list)
+        prepared_features_list = features.rows()
+        if not _WARMUP.get():
+            observe_features(version_label, prepared_features_list)
     
     try:
-        import pandas as pd
-        
-        features_df = pd.DataFrame(prepared_features_list)
-        
-        clf = model.named_steps['clf']
-        probs_list = model.predict_proba(features_df)
-        predicted_classes = model.predict(features_df)
-        
-        classes = list(clf.classes_)
-        logger.info(f"Batch prediction - model classes_: {classes}")
-        try:
-            fail_index = classes.index(0)
-        except ValueError:
-            fail_index = classes.index("Fail")
+        states = None
+        row_uncertainty = [] if req.uncertainty else None
+        with span("inference", rows=len(prepared_features_list)):
+            if req.student_ids is not None:
+                scored, states, tracked = _score_students(
+                    model, features, model_hash, req.student_ids, req.scope, row_uncertainty,
+                )
+            else:
+                scored = _score_rows(model, features, model_hash, row_uncertainty)
+        if model_version is None and not _WARMUP.get():
+            shadow_submit(prepared_features_list, scored, model)
         
-        items: List[BatchPredictionItem] = []
-        for i, (features, probs, predicted_class) in enumerate(
-            zip(prepared_features_list, probs_list, predicted_classes)
-        ):
-            # probs is 1D for this row; use correct index for Fail
-            risk_score = float(probs[fail_index])
+        with span("explanation", rows=len(scored)):
+            items: List[BatchPredictionItem] = []
+            for index, (row, (risk_score, predicted_class)) in enumerate(zip(prepared_features_list, scored)):
+                predicted_label = "normal" if predicted_class == 1 else "at_risk"
             
-            predicted_label = "normal" if predicted_class == 1 else "at_risk"
-            
-            category = _score_to_category(risk_score)
-            if category == "Critical":
-                risk_category = "high"
-            elif category == "At-Risk":
-                risk_category = "medium"
-            else:
-                risk_category = "low"
+                category = _score_to_category(risk_score)
+                if category == "Critical":
+                    risk_category = "high"
+                elif category == "At-Risk":
+                    risk_category = "medium"
+                else:
+                    risk_category = "low"
             
-            feature_importance = _get_feature_importance(model, features)
+                feature_importance = _get_feature_importance(model, row)
             
-            items.append(
-                BatchPredictionItem(
-                    input_features=features,
-                    predicted_label=predicted_label,
-                    risk_category=risk_category,
-                    risk_score=risk_score,
-                    feature_importance=feature_importance,
+                items.append(
+                    BatchPredictionItem(
+                        input_features=row,
+                        predicted_label=predicted_label,
+                        risk_category=risk_category,
+                        risk_score=risk_score,
+                        feature_importance=feature_importance,
+                    )
                 )
+                if row_uncertainty:
+                    items[-1].uncertainty = row_uncertainty[index]
+                if states is not None:
+                    change, previous_category, _ = states[index]
+                    items[-1].student_id = req.student_ids[index]
+                    items[-1].change = change
+                    items[-1].previous_risk_category = previous_category
+        
+        delta = None
+        if states is not None:
+            counts = {"new": 0, "changed": 0, "unchanged": 0, "model_updated": 0}
+            category_changes = []
+            for index, (item, (change, previous_category, previous_score)) in enumerate(zip(items, states)):
+                counts[change] += 1
+                if previous_category is not None and previous_category != item.risk_category:
+                    category_changes.append(CategoryChange(
+                        index=index,
+                        student_id=item.student_id,
+                        previous_risk_category=previous_category,
+                        risk_category=item.risk_category,
+                        previous_risk_score=previous_score,
+                        risk_score=item.risk_score,
+                    ))
+            delta = DeltaSummary(
+                tracked=tracked,
+                rescored=len(items) - counts["unchanged"],
+                category_changes=category_changes,
+                **counts,
             )
         
+        summary = None
+        if req.summary:
+            with span("summary"):
+                summary = summarize_batch(
+                    prepared_features_list,
+                    np.fromiter((score for score, _ in scored), dtype=float, count=len(scored)),
+                    np.fromiter((cls for _, cls in scored), dtype=int, count=len(scored)),
+                    top_n=req.summary_top_n,
+                    high=RISK_THRESHOLD_HIGH,
+                    medium=RISK_THRESHOLD_MEDIUM,
+                )
+        
         logger.info(f"Batch prediction completed: {len(items)} predictions")
-        return BatchPredictionResponse(items=items)
+        return BatchPredictionResponse(
+            items=items,
+            model_version=version_label,
+            summary=summary,
+            delta=delta,
+            permutation_importance=_permutation_importance(model_hash),
+        )
         
     except Exception as e:
         logger.error(f"Error making batch prediction: {e}")
-        raise Exception(f"Batch prediction failed: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Batch prediction failed: {str(e)}")
+
+
+def predict_top_k(req: TopKRequest, model_version: Optional[str] = None) -> TopKResponse:
+    """
+    Return only the k riskiest records of a cohort.
+
+    Records are validated once into typed columns (a few floats per record),
+    then scored chunk by chunk; after each chunk the running selection is
+    cut back to k with a partial sort (argpartition), so working memory
+    beyond the request body and its columns is O(k + chunk_size).
+
+    Args:
+        req: TopKRequest with records, k and chunk size
+        model_version: Registry version to use (None = default model)
+
+    Returns:
+        TopKResponse with the k highest risk scores, riskiest first
+    """
+    model, version_label, model_hash = _resolve_model(model_version)
+    records = req.records
+    k = min(req.k, len(records))
+    # Validated up front: a bad record fails the request before any scoring
+    with span("preparation", rows=len(records)):
+        validated = _validate_features(records)
+
+    best_scores = np.empty(0, dtype=float)
+    best_indexes = np.empty(0, dtype=np.int64)
+
+    try:
+        with span("inference", rows=len(records), chunk_size=req.chunk_size):
+            for start in range(0, len(records), req.chunk_size):
+                chunk = validated.take(slice(start, start + req.chunk_size))
+                if not _WARMUP.get():
+                    observe_features(version_label, chunk.rows())
+                scored = _score_rows(model, chunk, model_hash)
+
+                scores = np.concatenate([best_scores, np.fromiter((r[0] for r in scored), dtype=float, count=len(scored))])
+                indexes = np.concatenate([best_indexes, np.arange(start, start + chunk.n_rows, dtype=np.int64)])
+                if len(scores) > k:
+                    keep = np.argpartition(-scores, k - 1)[:k]
+                    scores, indexes = scores[keep], indexes[keep]
+                best_scores, best_indexes = scores, indexes
+    except Exception as e:
+        logger.error(f"Error ranking records: {e}")
+        raise Exception(f"Top-k prediction failed: {str(e)}")
+
+    # Riskiest first; ties keep input order
+    order = np.lexsort((best_indexes, -best_scores))
+    best_scores, best_indexes = best_scores[order], best_indexes[order]
+    levels = risk_levels(best_scores, RISK_THRESHOLD_HIGH, RISK_THRESHOLD_MEDIUM)
+
+    items = [
+        TopRiskItem(
+            index=int(i),
+            risk_score=float(score),
+            risk_category=str(level),
+            input_features=validated.rows(i, i + 1)[0],
+        )
+        for i, score, level in zip(best_indexes, best_scores, levels)
+    ]
+    logger.info(f"Top-k ranking completed: {len(items)} of {len(records)} records returned")
+    return TopKResponse(total_scored=len(records), k=k, items=items, model_version=version_label)
+
+
+@contextmanager
+def warmup_mode():
+    """Run predictions without recording them anywhere (result store, drift, shadow)."""
+    token = _WARMUP.set(True)
+    try:
+        yield
+    finally:
+        _WARMUP.reset(token)
+
+
+def warmup(model_version: Optional[str] = None) -> None:
+    """
+    Send synthetic requests through every inference path.
+
+    Pays the first-call costs of pandas, sklearn and pydantic before real
+    traffic arrives.
+
+    Args:
+        model_version: Registry version to warm (None = default model)
+    """
+    with warmup_mode():
+        predict_single(SinglePredictionRequest(features=dict(WARMUP_FEATURES)), model_version=model_version)
+        predict_batch(BatchPredictionRequest(records=[dict(WARMUP_FEATURES)]), model_version=model_version)
+        predict_batch(
+            BatchPredictionRequest(records=[dict(WARMUP_FEATURES)] * 32, summary=True),
+            model_version=model_version,
+        )
+        predict_top_k(TopKRequest(records=[dict(WARMUP_FEATURES)] * 8, k=2, chunk_size=4), model_version=model_version)
@@ -0,0 +1,325 @@
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from app.core.config import RESULT_STORE_MAX_ROWS, RESULT_STORE_PATH, RESULT_STORE_TTL_DAYS
+
+logger = logging.getLogger(__name__)
+
+# SQLite caps the number of bound parameters per statement; stay well below it.
+_LOOKUP_CHUNK = 500
+# Each worker prunes old rows at most this often, after a write
+_PRUNE_INTERVAL_SECONDS = 60.0
+# Table -> (column holding the time its rows were written, primary key columns)
+_RETENTION = {
+    "results": ("created_at", "model_hash, feature_key"),
+    "student_scores": ("updated_at", "scope, student_id"),
+}
+
+
+def _canonical_value(value: Any) -> Any:
+    """Normalise a single feature value so equal inputs hash identically."""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (int, float)):
+        value = float(value)
+        return None if math.isnan(value) else value
+    try:
+        number = float(value)
+        return None if math.isnan(number) else number
+    except (TypeError, ValueError):
+        return str(value).strip().lower()
+
+
+def feature_key(ordered_features: Dict[str, Any], expected_features: List[str]) -> str:
+    """
+    Build the canonical key for a feature vector.
+
+    Args:
+        ordered_features: Prepared features (model column names)
+        expected_features: Column order the model was trained with
+
+    Returns:
+        Hex digest of the canonical feature vector
+    """
+    vector = [_canonical_value(ordered_features.get(name)) for name in expected_features]
+    payload = json.dumps(vector, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class ResultStore:
+    """
+    Host-local persistent prediction cache backed by SQLite in WAL mode.
+
+    Every uvicorn worker opens the same database file, so a result scored by
+    one worker (or before a restart) is reused by all of them. Rows are keyed
+    by (model hash, canonical feature vector) and hold the risk score and the
+    predicted class.
+
+    A second table tracks, per (scope, student id), the fingerprint of the
+    features last scored and the result, for delta re-scoring of re-uploaded
+    batches.
+
+    Both tables are bounded: rows older than ttl_seconds and the oldest rows
+    beyond max_rows are pruned after writes (see prune), and the results of
+    a replaced model are deleted by set_current_model.
+    """
+
+    def __init__(self, path: str, max_rows: int = 0, ttl_seconds: float = 0.0):
+        self.path = path
+        self.max_rows = max_rows
+        self.ttl_seconds = ttl_seconds
+        self._last_prune = 0.0
+        self._prune_lock = threading.Lock()
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " model_hash TEXT NOT NULL,"
+            " feature_key TEXT NOT NULL,"
+            " risk_score REAL NOT NULL,"
+            " predicted_class INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " PRIMARY KEY (model_hash, feature_key)"
+            ") WITHOUT ROWID"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS student_scores ("
+            " scope TEXT NOT NULL,"
+            " student_id TEXT NOT NULL,"
+            " fingerprint TEXT NOT NULL,"
+            " model_hash TEXT NOT NULL,"
+            " risk_score REAL NOT NULL,"
+            " predicted_class INTEGER NOT NULL,"
+            " risk_category TEXT NOT NULL,"
+            " updated_at REAL NOT NULL,"
+            " PRIMARY KEY (scope, student_id)"
+            ") WITHOUT ROWID"
+        )
+        for table, (column, _) in _RETENTION.items():
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_{column} ON {table} ({column})")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, model_hash: str, keys: Iterable[str]) -> Dict[str, Tuple[float, int]]:
+        """
+        Look up many feature keys in as few queries as possible.
+
+        Returns:
+            Mapping of feature key -> (risk_score, predicted_class) for the hits
+        """
+        unique_keys = list(dict.fromkeys(keys))
+        found: Dict[str, Tuple[float, int]] = {}
+        if not unique_keys:
+            return found
+        try:
+            conn = self._connection()
+            for start in range(0, len(unique_keys), _LOOKUP_CHUNK):
+                chunk = unique_keys[start:start + _LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    "SELECT feature_key, risk_score, predicted_class FROM results "
+                    f"WHERE model_hash = ? AND feature_key IN ({placeholders})",
+                    [model_hash, *chunk],
+                ).fetchall()
+                for key, risk_score, predicted_class in rows:
+                    found[key] = (float(risk_score), int(predicted_class))
+        except sqlite3.Error as e:
+            logger.warning(f"Result store lookup failed, scoring everything: {e}")
+            return {}
+        return found
+
+    def put_many(self, model_hash: str, results: Dict[str, Tuple[float, int]]) -> None:
+        """Persist freshly scored results; failures are logged, never raised."""
+        if not results:
+            return
+        now = time.time()
+        try:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO results "
+                "(model_hash, feature_key, risk_score, predicted_class, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (model_hash, key, float(score), int(predicted_class), now)
+                    for key, (score, predicted_class) in results.items()
+                ],
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Result store write failed: {e}")
+            return
+        self._maybe_prune()
+
+    def get_students(self, scope: str, student_ids: Iterable[str]) -> Dict[str, Tuple[str, str, float, int, str]]:
+        """
+        Look up the last scored state of many students.
+
+        Returns:
+            Mapping of student id -> (fingerprint, model_hash, risk_score,
+            predicted_class, risk_category) for the ids seen before
+        """
+        unique_ids = list(dict.fromkeys(student_ids))
+        found: Dict[str, Tuple[str, str, float, int, str]] = {}
+        if not unique_ids:
+            return found
+        try:
+            conn = self._connection()
+            for start in range(0, len(unique_ids), _LOOKUP_CHUNK):
+                chunk = unique_ids[start:start + _LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    "SELECT student_id, fingerprint, model_hash, risk_score, predicted_class, risk_category "
+                    f"FROM student_scores WHERE scope = ? AND student_id IN ({placeholders})",
+                    [scope, *chunk],
+                ).fetchall()
+                for student_id, fingerprint, model_hash, risk_score, predicted_class, risk_category in rows:
+                    found[student_id] = (fingerprint, model_hash, float(risk_score), int(predicted_class), risk_category)
+        except sqlite3.Error as e:
+            logger.warning(f"Student score lookup failed, treating all rows as new: {e}")
+            return {}
+        return found
+
+    def put_students(self, scope: str, rows: List[Tuple[str, str, str, float, int, str]]) -> None:
+        """
+        Record the latest scored state of students; failures are logged, never raised.
+
+        Args:
+            scope: Namespace for the ids (e.g. a course or cohort)
+            rows: (student_id, fingerprint, model_hash, risk_score, predicted_class, risk_category)
+        """
+        if not rows:
+            return
+        now = time.time()
+        try:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT OR REPLACE INTO student_scores "
+                "(scope, student_id, fingerprint, model_hash, risk_score, predicted_class, risk_category, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(scope, *row, now) for row in rows],
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Student score write failed: {e}")
+            return
+        self._maybe_prune()
+
+    def set_current_model(self, model_hash: str) -> int:
+        """
+        Record the model this host serves, deleting the cached results of the one it replaced.
+
+        The first worker to start with a new model hash deletes the results
+        rows of the previously recorded hash; later workers find their hash
+        already recorded and delete nothing. Student states are kept: delta
+        re-scoring compares against them to report model_updated.
+
+        Returns:
+            Number of results rows deleted
+        """
+        try:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT value FROM meta WHERE key = 'model_hash'").fetchone()
+                deleted = 0
+                if row is not None and row[0] != model_hash:
+                    deleted = conn.execute("DELETE FROM results WHERE model_hash = ?", (row[0],)).rowcount
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('model_hash', ?)", (model_hash,))
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+        except sqlite3.Error as e:
+            logger.warning(f"Result store could not record the current model: {e}")
+            return 0
+        if deleted:
+            logger.info(f"Result store: deleted {deleted} results of replaced model {row[0][:12]}")
+        return deleted
+
+    def prune(self) -> Dict[str, int]:
+        """
+        Delete rows older than ttl_seconds, then the oldest rows beyond max_rows, in each table.
+
+        Returns:
+            Number of rows deleted per table
+        """
+        now = time.time()
+        deleted: Dict[str, int] = {}
+        conn = self._connection()
+        for table, (column, key) in _RETENTION.items():
+            count = 0
+            if self.ttl_seconds > 0:
+                count += conn.execute(f"DELETE FROM {table} WHERE {column} < ?", (now - self.ttl_seconds,)).rowcount
+            if self.max_rows > 0:
+                excess = conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0] - self.max_rows
+                if excess > 0:
+                    count += conn.execute(
+                        f"DELETE FROM {table} WHERE ({key}) IN "
+                        f"(SELECT {key} FROM {table} ORDER BY {column} LIMIT ?)",
+                        (excess,),
+                    ).rowcount
+            deleted[table] = count
+        conn.commit()
+        return deleted
+
+    def _maybe_prune(self) -> None:
+        """Prune if this worker has not for _PRUNE_INTERVAL_SECONDS; failures are logged, never raised."""
+        if self.max_rows <= 0 and self.ttl_seconds <= 0:
+            return
+        now = time.monotonic()
+        with self._prune_lock:
+            if now - self._last_prune < _PRUNE_INTERVAL_SECONDS:
+                return
+            self._last_prune = now
+        try:
+            deleted = self.prune()
+        except sqlite3.Error as e:
+            logger.warning(f"Result store pruning failed: {e}")
+            return
+        if any(deleted.values()):
+            logger.info(f"Result store pruned: {deleted}")
+
+
+@lru_cache(maxsize=1)
+def get_result_store() -> Optional[ResultStore]:
+    """
+    Open the persistent result store if RESULT_STORE_PATH is configured.
+
+    Returns:
+        ResultStore instance, or None when the store is disabled or unusable
+    """
+    if not RESULT_STORE_PATH:
+        return None
+    try:
+        store = ResultStore(
+            RESULT_STORE_PATH,
+            max_rows=RESULT_STORE_MAX_ROWS,
+            ttl_seconds=RESULT_STORE_TTL_DAYS * 86400,
+        )
+        logger.info(f"Result store enabled at {os.path.abspath(RESULT_STORE_PATH)}")
+        return store
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f"Could not open result store at {RESULT_STORE_PATH}: {e}. Continuing without it.")
+        return None
@@ -0,0 +1,318 @@
+from itertools import product
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+import math
+import threading
+import time
+import weakref
+
+import numpy as np
+
+from app.core.config import (
+    GRID_MAX_ERROR,
+    GRID_MIN_CATEGORY_AGREEMENT,
+    GRID_MODE_ENABLED,
+    GRID_POINTS,
+    GRID_POINTS_PER_FEATURE,
+    GRID_VALIDATION_POINTS,
+)
+from app.core.model_loader import DummyModel
+from app.core.parallelism import inference_threads
+from app.services.drift_monitor import load_reference
+from app.services.feature_schema import get_feature_schema
+from app.services.inference import FAIL, PASS, InferenceBackend, _expected_features, inference_backend
+from app.services.predictor import RISK_THRESHOLD_HIGH, RISK_THRESHOLD_MEDIUM
+
+logger = logging.getLogger(__name__)
+
+# Rows per predict_proba call while filling the grid
+_BUILD_CHUNK = 50000
+# Risk values where the API's label or risk_category changes
+_BOUNDARIES = np.array([RISK_THRESHOLD_MEDIUM, 0.5, RISK_THRESHOLD_HIGH])
+# Share of validation points with each optional feature missing
+_MISSING_SHARE = 0.1
+
+_grids: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def _points_overrides() -> Dict[str, int]:
+    overrides = {}
+    for part in GRID_POINTS.split(","):
+        if "=" in part:
+            name, value = part.split("=", 1)
+            overrides[name.strip()] = int(value)
+    return overrides
+
+
+def _axis(feature: str, sketch: Optional[Dict[str, Any]], points: int) -> np.ndarray:
+    """Grid coordinates of one numeric feature over its training range."""
+    if sketch and sketch.get("type") == "numeric":
+        low, high = math.floor(sketch["min"]), math.ceil(sketch["max"])
+        integer_valued = all(float(v).is_integer() for v in sketch["quantiles"].values())
+    else:
+        low, high, integer_valued = 0.0, 100.0, False
+    if high <= low:
+        high = low + 1
+    if integer_valued and high - low + 1 <= points:
+        # Count features (assignments): one point per value, so lookups at integers are exact
+        return np.arange(low, high + 1, dtype=float)
+    return np.linspace(low, high, max(2, points))
+
+
+class RiskGrid(InferenceBackend):
+    """
+    Risk (P(Fail)) of one model precomputed over a quantized feature grid.
+
+    Numeric features are interpolated multilinearly between grid points;
+    the categorical feature (activities) selects a slice. Optional numeric
+    features (internal_marks) have one extra slot holding the model's risk
+    when the value is missing. Points outside the grid, other missing
+    values and unknown categories are not answered, and neither are points
+    whose risk is within `margin` of a label or risk_category boundary.
+
+    A forest's risk is a step function, so no grid spacing bounds the
+    interpolation error: `error` holds estimates from random validation
+    points, and `margin` is their p99, not a guarantee.
+    """
+
+    kind = "grid"
+
+    def __init__(self, numeric_features: List[str], axes: List[np.ndarray],
+                 categorical_feature: Optional[str], categories: List[str], values: np.ndarray,
+                 missing_slots: Optional[List[bool]] = None):
+        self.numeric_features = numeric_features
+        self.axes = axes
+        self.categorical_feature = categorical_feature
+        self.categories = categories
+        self.features = numeric_features + ([categorical_feature] if categorical_feature else [])
+        # Per numeric feature: True if index len(axis) holds the missing-value slice
+        self.missing_slots = missing_slots or [False] * len(axes)
+        self.values = values  # shape: [len(axis) (+1 with a missing slot) for axis in axes] + [len(categories)]
+        self.build_seconds: Optional[float] = None
+        self.error: Dict[str, Any] = {}
+        # Set to the sampled p99 error once the grid is validated
+        self.margin = 0.0
+        self.serving = False
+
+    def predict_risk(self, columns: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Interpolated risk per row and its class at the 0.5 threshold.
+
+        Rows the grid cannot answer, or cannot answer without possibly
+        changing their label or risk_category, get NaN risk and class -1.
+        """
+        coords = np.column_stack([np.asarray(columns[f], dtype=float) for f in self.numeric_features])
+        n = len(coords)
+        if self.categorical_feature is None:
+            cats = np.zeros(n, dtype=np.int64)
+        else:
+            labels = np.asarray(columns[self.categorical_feature], dtype=object)
+            cats = np.full(n, -1, dtype=np.int64)
+            for code, category in enumerate(self.categories):
+                cats[labels == category] = code
+
+        inside = cats >= 0
+        for j, axis in enumerate(self.axes):
+            missing = np.isnan(coords[:, j])
+            in_range = (coords[:, j] >= axis[0]) & (coords[:, j] <= axis[-1])
+            inside &= (missing & self.missing_slots[j]) | in_range
+        risk = np.full(n, np.nan)
+        if inside.any():
+            risk[inside] = self._interpolate(coords[inside], cats[inside])
+        if self.margin > 0:
+            # The exact risk may lie on the other side of a threshold: leave these to the model
+            near = (np.abs(risk[:, np.newaxis] - _BOUNDARIES) < self.margin).any(axis=1)
+            risk[near] = np.nan
+            inside &= ~near
+        classes = np.where(risk >= 0.5, FAIL, PASS).astype(np.int64)
+        classes[~inside] = -1
+        return risk, classes
+
+    def _interpolate(self, coords: np.ndarray, cats: np.ndarray) -> np.ndarray:
+        lower, frac = [], []
+        uppers = []
+        for j, axis in enumerate(self.axes):
+            missing = np.isnan(coords[:, j])
+            values = np.where(missing, axis[0], coords[:, j])
+            idx = np.clip(np.searchsorted(axis, values, side="right") - 1, 0, len(axis) - 2)
+            # Missing values sit in the extra slot at len(axis), with no interpolation along this axis
+            lower.append(np.where(missing, len(axis), idx))
+            uppers.append(np.where(missing, len(axis), idx + 1))
+            frac.append(np.where(missing, 0.0, (values - axis[idx]) / (axis[idx + 1] - axis[idx])))
+        result = np.zeros(len(coords))
+        for corner in product((0, 1), repeat=len(self.axes)):
+            weight = np.ones(len(coords))
+            index = []
+            for j, bit in enumerate(corner):
+                weight *= frac[j] if bit else (1 - frac[j])
+                index.append(uppers[j] if bit else lower[j])
+            result += weight * self.values[tuple(index) + (cats,)]
+        return result
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "serving": self.serving,
+            "axes": {
+                feature: {
+                    "min": float(axis[0]), "max": float(axis[-1]), "points": int(len(axis)),
+                    "missing_slot": bool(slot),
+                }
+                for feature, axis, slot in zip(self.numeric_features, self.axes, self.missing_slots)
+            },
+            "categories": self.categories,
+            "cells": int(self.values.size),
+            "size_kb": round(self.values.nbytes / 1024, 1),
+            "build_seconds": round(self.build_seconds, 3) if self.build_seconds is not None else None,
+            "error": self.error,
+            "p99_error_allowed": GRID_MAX_ERROR,
+            "min_category_agreement": GRID_MIN_CATEGORY_AGREEMENT,
+            "boundary_margin": self.margin,
+        }
+
+
+def _measure_error(grid: RiskGrid, model) -> Dict[str, Any]:
+    """
+    Estimate the grid's error against exact scoring on random in-grid points.
+
+    Some points have optional values missing. All figures are sample
+    statistics over GRID_VALIDATION_POINTS points; the largest error seen
+    is not a bound on the error elsewhere.
+    """
+    rng = np.random.default_rng(0)
+    n = max(1, GRID_VALIDATION_POINTS)
+    columns = {}
+    for feature, axis in zip(grid.numeric_features, grid.axes):
+        if np.all(np.diff(axis) == 1):
+            # Count features are only ever integers
+            columns[feature] = rng.integers(int(axis[0]), int(axis[-1]) + 1, size=n).astype(float)
+        else:
+            columns[feature] = rng.uniform(axis[0], axis[-1], size=n)
+    for feature, slot in zip(grid.numeric_features, grid.missing_slots):
+        if slot:
+            columns[feature][rng.random(n) < _MISSING_SHARE] = np.nan
+    if grid.categorical_feature is not None:
+        codes = rng.integers(len(grid.categories), size=n)
+        columns[grid.categorical_feature] = np.asarray(grid.categories, dtype=object)[codes]
+    with inference_threads(n):
+        exact, _ = inference_backend(model).predict_risk(columns)
+    grid.margin = 0.0
+    approx, _ = grid.predict_risk(columns)
+    error = np.abs(approx - exact)
+    # Same label (threshold 0.5) and same API risk band (RISK_THRESHOLD_MEDIUM / RISK_THRESHOLD_HIGH)
+    bands = lambda r: np.digitize(r, [RISK_THRESHOLD_MEDIUM, RISK_THRESHOLD_HIGH])
+
+    # What the grid serves: points within the p99 error of a boundary are left to the model
+    grid.margin = float(np.quantile(error, 0.99))
+    served, _ = grid.predict_risk(columns)
+    answered = ~np.isnan(served)
+    return {
+        "estimate": "sample",
+        "samples": int(n),
+        "max_abs_error_observed": float(error.max()),
+        "p99_abs_error": grid.margin,
+        "mean_abs_error": float(error.mean()),
+        "label_agreement": float(np.mean((approx >= 0.5) == (exact >= 0.5))),
+        "risk_category_agreement": float(np.mean(bands(approx) == bands(exact))),
+        "answered_share": float(answered.mean()),
+        "answered_risk_category_agreement": float(np.mean(bands(served[answered]) == bands(exact[answered])))
+        if answered.any() else None,
+    }
+
+
+def build_risk_grid(model) -> Optional[RiskGrid]:
+    """
+    Score a model over the whole grid and measure the interpolation error.
+
+    Returns:
+        RiskGrid (serving only if the sampled p99 error is within
+        GRID_MAX_ERROR and the answered validation points kept the model's
+        risk_category at least GRID_MIN_CATEGORY_AGREEMENT of the time), or
+        None for models the grid cannot represent
+    """
+    if isinstance(model, DummyModel):
+        return None
+    start = time.perf_counter()
+    expected_features = _expected_features(model)
+    preprocessor = model.named_steps['prep']
+    numeric_features = list(preprocessor.named_transformers_['num'].feature_names_in_)
+    categorical = [f for f in expected_features if f not in numeric_features]
+    if len(categorical) > 1:
+        logger.warning(f"Grid mode supports one categorical feature, model has {categorical}; grid disabled")
+        return None
+    categorical_feature = categorical[0] if categorical else None
+    if categorical_feature is not None:
+        cat_transformer = preprocessor.named_transformers_['cat']
+        categories = [str(c) for c in cat_transformer.categories_[0]]
+    else:
+        categories = ["-"]
+
+    sketches = (load_reference() or {}).get("features", {})
+    overrides = _points_overrides()
+    axes = [
+        _axis(feature, sketches.get(feature), overrides.get(feature, GRID_POINTS_PER_FEATURE))
+        for feature in numeric_features
+    ]
+    # Optional features without a default reach the model as NaN: give them a missing-value slice
+    optional = {
+        spec.name for spec in get_feature_schema().features
+        if spec.kind == "number" and not spec.required and spec.default is None
+    }
+    missing_slots = [feature in optional for feature in numeric_features]
+    coordinates = [np.append(axis, np.nan) if slot else axis for axis, slot in zip(axes, missing_slots)]
+
+    # Every grid point, numeric axes varying slowest and category fastest (C order)
+    mesh = np.meshgrid(*coordinates, np.arange(len(categories)), indexing="ij")
+    flat = {feature: m.ravel() for feature, m in zip(numeric_features, mesh[:-1])}
+    category_codes = mesh[-1].ravel()
+    total = len(category_codes)
+    risk = np.empty(total, dtype=np.float32)
+    backend = inference_backend(model)
+    for chunk_start in range(0, total, _BUILD_CHUNK):
+        chunk = slice(chunk_start, chunk_start + _BUILD_CHUNK)
+        columns = {feature: values[chunk] for feature, values in flat.items()}
+        if categorical_feature is not None:
+            columns[categorical_feature] = np.asarray(categories, dtype=object)[category_codes[chunk]]
+        with inference_threads(len(category_codes[chunk])):
+            risk[chunk] = backend.predict_risk(columns)[0]
+
+    shape = [len(values) for values in coordinates] + [len(categories)]
+    grid = RiskGrid(numeric_features, axes, categorical_feature, categories, risk.reshape(shape), missing_slots)
+    grid.error = _measure_error(grid, model)
+    agreement = grid.error["answered_risk_category_agreement"]
+    grid.serving = (
+        grid.error["p99_abs_error"] <= GRID_MAX_ERROR
+        and agreement is not None and agreement >= GRID_MIN_CATEGORY_AGREEMENT
+    )
+    grid.build_seconds = time.perf_counter() - start
+    message = (
+        f"Risk grid built: {total} cells ({grid.values.nbytes / 1024:.0f} KB) in {grid.build_seconds:.2f}s, "
+        f"sampled p99 error {grid.error['p99_abs_error']:.4f} (max seen {grid.error['max_abs_error_observed']:.4f}), "
+        f"answers {grid.error['answered_share']:.1%} of points"
+    )
+    if grid.serving:
+        logger.info(message)
+    elif grid.error["p99_abs_error"] > GRID_MAX_ERROR:
+        logger.warning(f"{message} exceeds GRID_MAX_ERROR={GRID_MAX_ERROR}; grid will not answer predictions")
+    else:
+        logger.warning(f"{message} changes some risk categories; grid will not answer predictions")
+    return grid
+
+
+def ensure_risk_grid(model) -> Optional[RiskGrid]:
+    """Build (once per loaded model) and cache the grid when grid mode is enabled."""
+    if not GRID_MODE_ENABLED:
+        return None
+    with _lock:
+        if model in _grids:
+            return _grids[model]
+        grid = build_risk_grid(model)
+        _grids[model] = grid
+        return grid
+
+
+def cached_risk_grid(model) -> Optional[RiskGrid]:
+    """The grid of a model if it has already been built; never builds on the request path."""
+    if not GRID_MODE_ENABLED or isinstance(model, DummyModel):
+        return None
+    return _grids.get(model)
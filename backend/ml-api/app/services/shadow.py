@@ -0,0 +1,227 @@
+from collections import deque
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+import logging
+import os
+import random
+import threading
+import time
+
+import joblib
+import numpy as np
+
+from app.core.config import SHADOW_MODEL_PATH, SHADOW_QUEUE_MAX_ROWS, SHADOW_SAMPLE_RATE
+from app.core.parallelism import make_sequential
+from app.services.inference import columns_from_rows, inference_backend
+
+logger = logging.getLogger(__name__)
+
+# Upper edges of the |candidate - primary| risk score histogram
+DELTA_BUCKETS = [0.01, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0]
+_LATENCY_WINDOW = 2000
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    return float(np.percentile(values, q))
+
+
+class ShadowEvaluator:
+    """
+    Scores a sample of live traffic with a candidate model, off the request path.
+
+    The request path only draws a random number and appends the rows with the
+    primary model's exact scores to a queue bounded by row count (rows that
+    do not fit are dropped, never waited on). A single daemon thread loads the
+    candidate and scores the queued rows with it straight through its
+    inference backend: sequentially, outside admission control and the
+    /monitoring/inference counters. Rows the primary answered from the risk
+    grid carry no exact score; only those are re-scored with the primary
+    model, so the comparison is always model against model.
+    """
+
+    def __init__(self, model_path: str, sample_rate: float, max_queued_rows: int):
+        self.model_path = model_path
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self.max_queued_rows = max(1, max_queued_rows)
+        self._pending: deque = deque()
+        self._pending_rows = 0
+        self._available = threading.Condition(threading.Lock())
+        self._lock = threading.Lock()
+        self.model = None
+        self.load_error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+
+        self.requests_sampled = 0
+        self.requests_dropped = 0
+        self.rows_dropped = 0
+        self.rows_compared = 0
+        self.label_agreements = 0
+        self.category_agreements = 0
+        self.delta_sum = 0.0
+        self.abs_delta_sum = 0.0
+        self.max_abs_delta = 0.0
+        self.delta_histogram = [0] * len(DELTA_BUCKETS)
+        self.errors = 0
+        self._latencies_ms: deque = deque(maxlen=_LATENCY_WINDOW)
+        self._per_row_latencies_ms: deque = deque(maxlen=_LATENCY_WINDOW)
+
+        self._thread = threading.Thread(target=self._run, name="shadow-evaluator", daemon=True)
+        self._thread.start()
+
+    def submit(self, rows: List[Dict[str, Any]], primary_results: List[Optional[tuple]],
+               primary_model: Any) -> None:
+        """
+        Maybe copy a request's prepared rows to the shadow queue. Never blocks.
+
+        primary_results holds the primary model's exact (risk, class) per row,
+        or None for a row that was answered from the risk grid.
+        """
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return
+        with self._available:
+            room = self.max_queued_rows - self._pending_rows
+            if room <= 0:
+                self.requests_dropped += 1
+                self.rows_dropped += len(rows)
+                return
+            if room < len(rows):
+                # Keep what fits: a batch larger than the queue is still compared in part
+                self.rows_dropped += len(rows) - room
+                rows, primary_results = rows[:room], primary_results[:room]
+            self._pending.append((rows, primary_results, primary_model))
+            self._pending_rows += len(rows)
+            self.requests_sampled += 1
+            self._available.notify()
+
+    def _load(self) -> None:
+        start = time.perf_counter()
+        try:
+            # Keep the candidate on one core so it cannot slow the primary down
+            self.model = make_sequential(joblib.load(self.model_path))
+            self.load_seconds = time.perf_counter() - start
+            logger.info(f"Shadow candidate loaded from {self.model_path} in {self.load_seconds:.2f}s")
+        except Exception as e:
+            self.load_error = str(e)
+            logger.error(f"Could not load shadow candidate from {self.model_path}: {e}")
+
+    def _run(self) -> None:
+        self._load()
+        if self.model is None:
+            return
+        while True:
+            with self._available:
+                while not self._pending:
+                    self._available.wait()
+                rows, primary_results, primary_model = self._pending.popleft()
+                self._pending_rows -= len(rows)
+            try:
+                self._evaluate(rows, primary_results, primary_model)
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Shadow evaluation failed: {e}")
+
+    def _evaluate(self, rows: List[Dict[str, Any]], primary_results: List[Optional[tuple]],
+                  primary_model: Any) -> None:
+        # Imported here: the predictor module imports this one
+        from app.services.predictor import _score_to_category
+
+        def score(model: Any, subset: List[Dict[str, Any]]) -> List[tuple]:
+            backend = inference_backend(model)
+            risk, classes = backend.predict_risk(columns_from_rows(subset, backend.features))
+            return list(zip(risk.tolist(), classes.tolist()))
+
+        # Only rows the grid answered lack an exact primary score
+        regrid = [i for i, result in enumerate(primary_results) if result is None]
+        if regrid:
+            primary_results = list(primary_results)
+            for i, result in zip(regrid, score(primary_model, [rows[i] for i in regrid])):
+                primary_results[i] = result
+
+        start = time.perf_counter()
+        candidate_results = score(self.model, rows)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            self._latencies_ms.append(elapsed_ms)
+            self._per_row_latencies_ms.append(elapsed_ms / max(len(rows), 1))
+            for (primary_score, primary_class), (candidate_score, candidate_class) in zip(
+                primary_results, candidate_results
+            ):
+                delta = candidate_score - primary_score
+                self.rows_compared += 1
+                self.label_agreements += int(primary_class == candidate_class)
+                self.category_agreements += int(
+                    _score_to_category(primary_score) == _score_to_category(candidate_score)
+                )
+                self.delta_sum += delta
+                self.abs_delta_sum += abs(delta)
+                self.max_abs_delta = max(self.max_abs_delta, abs(delta))
+                for i, upper in enumerate(DELTA_BUCKETS):
+                    if abs(delta) <= upper:
+                        self.delta_histogram[i] += 1
+                        break
+
+    def report(self) -> Dict[str, Any]:
+        """Aggregated agreement, score deltas and candidate latency."""
+        with self._lock:
+            n = self.rows_compared
+            latencies = list(self._latencies_ms)
+            per_row = list(self._per_row_latencies_ms)
+            return {
+                "candidate_model_path": self.model_path,
+                "candidate_loaded": self.model is not None,
+                "candidate_load_error": self.load_error,
+                "candidate_load_seconds": self.load_seconds,
+                "sample_rate": self.sample_rate,
+                "requests_sampled": self.requests_sampled,
+                "requests_dropped": self.requests_dropped,
+                "rows_dropped": self.rows_dropped,
+                "queued_requests": len(self._pending),
+                "queued_rows": self._pending_rows,
+                "max_queued_rows": self.max_queued_rows,
+                "errors": self.errors,
+                "rows_compared": n,
+                "label_agreement_rate": self.label_agreements / n if n else None,
+                "category_agreement_rate": self.category_agreements / n if n else None,
+                "mean_score_delta": self.delta_sum / n if n else None,
+                "mean_abs_score_delta": self.abs_delta_sum / n if n else None,
+                "max_abs_score_delta": self.max_abs_delta if n else None,
+                "abs_delta_histogram": {
+                    f"<={upper}": count for upper, count in zip(DELTA_BUCKETS, self.delta_histogram)
+                },
+                "candidate_latency_ms": {
+                    "p50": _percentile(latencies, 50),
+                    "p95": _percentile(latencies, 95),
+                    "p99": _percentile(latencies, 99),
+                    "per_row_p50": _percentile(per_row, 50),
+                    "window": len(latencies),
+                },
+            }
+
+
+@lru_cache(maxsize=1)
+def get_shadow_evaluator() -> Optional[ShadowEvaluator]:
+    """
+    Shadow evaluator for this worker (cached).
+
+    Returns:
+        ShadowEvaluator when SHADOW_MODEL_PATH points at an existing file, else None
+    """
+    if not SHADOW_MODEL_PATH:
+        return None
+    if not os.path.exists(SHADOW_MODEL_PATH):
+        logger.warning(f"Shadow model not found at {SHADOW_MODEL_PATH}. Shadow evaluation disabled.")
+        return None
+    return ShadowEvaluator(SHADOW_MODEL_PATH, SHADOW_SAMPLE_RATE, SHADOW_QUEUE_MAX_ROWS)
+
+
+def shadow_submit(rows: List[Dict[str, Any]], primary_results: List[Optional[tuple]], primary_model: Any) -> None:
+    """Offer a request's prepared rows and the primary's exact results to the shadow evaluator (never raises)."""
+    try:
+        evaluator = get_shadow_evaluator()
+        if evaluator is not None:
+            evaluator.submit(rows, primary_results, primary_model)
+    except Exception as e:
+        logger.warning(f"Could not submit request for shadow evaluation: {e}")
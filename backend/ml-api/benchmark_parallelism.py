@@ -0,0 +1,118 @@
+"""
+Inference Parallelism Benchmark
+===============================
+
+Times predict_proba of the trained model for a range of batch sizes, once
+sequentially and once per thread count, and shows where threading starts to
+pay off. Use the reported crossover to tune INFERENCE_PARALLEL_MIN_ROWS and
+INFERENCE_ROWS_PER_THREAD for the deployment host.
+
+Usage:
+    python benchmark_parallelism.py
+    python benchmark_parallelism.py --rows 1 100 1000 10000 --threads 1 2 4 --repeats 7 --json
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import parallel_config
+
+from app.core.model_loader import DummyModel, get_model
+from app.core.parallelism import policy
+from app.services.inference import _expected_features
+
+DEFAULT_ROWS = [1, 10, 100, 500, 1000, 2000, 5000, 10000, 20000]
+
+
+def synthetic_frame(expected_features, n_rows: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for feature in expected_features:
+        if feature == "activities":
+            columns[feature] = rng.choice(["low", "medium", "high"], size=n_rows)
+        else:
+            columns[feature] = rng.uniform(0, 100, size=n_rows)
+    return pd.DataFrame(columns, columns=expected_features)
+
+
+def time_call(model, df: pd.DataFrame, threads: int, repeats: int) -> float:
+    """Median seconds of one predict_proba call with the given thread count."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        if threads == 1:
+            model.predict_proba(df)
+        else:
+            with parallel_config(backend="threading", n_jobs=threads):
+                model.predict_proba(df)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential vs. threaded forest inference by batch size")
+    parser.add_argument("--rows", nargs="+", type=int, default=DEFAULT_ROWS)
+    parser.add_argument("--threads", nargs="+", type=int, default=None,
+                        help="Thread counts to compare (default: 1, 2, 4 ... up to the policy maximum)")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    model = get_model()
+    if isinstance(model, DummyModel):
+        raise SystemExit("No trained model found. Run python train_model.py first.")
+    expected_features = _expected_features(model)
+
+    thread_counts = args.threads
+    if thread_counts is None:
+        thread_counts = [1]
+        while thread_counts[-1] * 2 <= max(policy.max_threads, 2):
+            thread_counts.append(thread_counts[-1] * 2)
+    if 1 not in thread_counts:
+        thread_counts = [1] + thread_counts
+
+    # Warm the forest and the thread pool
+    time_call(model, synthetic_frame(expected_features, 64), max(thread_counts), 2)
+
+    results = []
+    for n_rows in args.rows:
+        df = synthetic_frame(expected_features, n_rows)
+        timings = {threads: time_call(model, df, threads, args.repeats) for threads in thread_counts}
+        best = min(timings, key=timings.get)
+        results.append({
+            "rows": n_rows,
+            "seconds": {str(t): s for t, s in timings.items()},
+            "best_threads": best,
+            "speedup": timings[1] / timings[best],
+            "policy_threads": policy.threads_for(n_rows),
+        })
+
+    # Smallest batch from which threading wins by at least 10%
+    crossover = next((r["rows"] for r in results if r["best_threads"] > 1 and r["speedup"] >= 1.1), None)
+
+    if args.json:
+        print(json.dumps({"policy": policy.describe()["policy"], "results": results, "crossover_rows": crossover}, indent=2))
+        return
+
+    header = f"{'rows':>8}" + "".join(f"{f'{t} thr ms':>12}" for t in thread_counts) + f"{'best':>6}{'speedup':>9}{'policy':>8}"
+    print(header)
+    for r in results:
+        print(
+            f"{r['rows']:>8}"
+            + "".join(f"{r['seconds'][str(t)] * 1000:>12.2f}" for t in thread_counts)
+            + f"{r['best_threads']:>6}{r['speedup']:>9.2f}{r['policy_threads']:>8}"
+        )
+    print()
+    print(f"Current policy: {policy.describe()['policy']}")
+    if crossover is None:
+        print("Threading never won by 10% or more on this host; keep INFERENCE_PARALLEL_MIN_ROWS above the largest batch.")
+    else:
+        print(f"Threading pays off from about {crossover} rows; consider INFERENCE_PARALLEL_MIN_ROWS={crossover}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Synthetic Student Data Generator
+================================
+
+Fits the training datasets (the same files train_model.py merges) and writes
+any number of realistic synthetic rows, for load tests, 100k-row batches and
+out-of-core experiments.
+
+The model is a Gaussian copula per class (Pass / Fail):
+- each numeric feature keeps its empirical distribution (interpolated
+  quantiles), rounded to the precision seen in the data;
+- `activities` is treated as ordinal (low < medium < high) and keeps its
+  per-class frequencies;
+- the dependence between all features is the rank correlation of the
+  normal scores, so relationships such as "higher marks with more
+  assignments" survive.
+
+Rows are generated and written in chunks, so memory does not grow with the
+row count. The same seed, row count and chunk size give identical output.
+
+Output format follows the extension: .csv, .ndjson/.jsonl, .xlsx (up to
+Excel's row limit) or .parquet (needs pyarrow).
+
+Usage:
+    python generate_synthetic_data.py synthetic_1m.csv --rows 1000000
+    python generate_synthetic_data.py load_test.parquet --rows 5000000 --seed 7 --chunk-size 200000
+    python generate_synthetic_data.py batch_100k.ndjson --rows 100000 --fail-rate 0.3 --no-label
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr, ndtri
+
+DATASET_PATHS = [
+    "student_performance_synthetic_1000.xlsx",
+    "student_performance_balanced.xlsx",
+    "student_performance_balanced_FIXED.csv",
+]
+NUMERIC_FEATURES = ["attendance", "study_hours", "internal_marks", "assignments_submitted"]
+CATEGORICAL_FEATURE = "activities"
+CATEGORY_ORDER = ["low", "medium", "high"]
+LABEL = "performance"
+CLASSES = ["Fail", "Pass"]
+EXCEL_MAX_ROWS = 1_048_575
+
+
+def load_datasets(paths):
+    frames = []
+    for path in paths:
+        if not os.path.exists(path):
+            raise SystemExit(f"Dataset {path} not found; run from the ml-api directory or pass --datasets")
+        frames.append(pd.read_csv(path) if path.lower().endswith(".csv") else pd.read_excel(path))
+    df = pd.concat(frames, ignore_index=True)
+    df[CATEGORICAL_FEATURE] = df[CATEGORICAL_FEATURE].astype(str).str.strip().str.lower()
+    df = df[df[CATEGORICAL_FEATURE].isin(CATEGORY_ORDER) & df[LABEL].isin(CLASSES)]
+    return df.dropna(subset=NUMERIC_FEATURES).reset_index(drop=True)
+
+
+def _decimals(values: np.ndarray) -> int:
+    """Decimal places used in the data (0 for count features), at most 4."""
+    for places in range(5):
+        if np.allclose(values, np.round(values, places)):
+            return places
+    return 4
+
+
+def _normal_scores(column: pd.Series) -> np.ndarray:
+    """Phi^-1 of mid-ranks: the copula's view of one column."""
+    ranks = column.rank(method="average").to_numpy()
+    return ndtri((ranks - 0.5) / len(column))
+
+
+class ClassCopula:
+    """Marginals and normal-score correlation of the rows of one class."""
+
+    def __init__(self, df: pd.DataFrame, decimals: dict):
+        self.n = len(df)
+        self.sorted = {f: np.sort(df[f].to_numpy(dtype=float)) for f in NUMERIC_FEATURES}
+        self.decimals = decimals
+        ordinal = df[CATEGORICAL_FEATURE].map({c: i for i, c in enumerate(CATEGORY_ORDER)})
+        frequencies = np.bincount(ordinal, minlength=len(CATEGORY_ORDER)) / len(df)
+        self.category_cuts = np.cumsum(frequencies)[:-1]
+        scores = np.column_stack(
+            [_normal_scores(df[f]) for f in NUMERIC_FEATURES] + [_normal_scores(ordinal)]
+        )
+        correlation = np.corrcoef(scores, rowvar=False)
+        # Nearest positive definite matrix, so the Cholesky factor exists
+        eigenvalues, eigenvectors = np.linalg.eigh(correlation)
+        correlation = eigenvectors @ np.diag(np.clip(eigenvalues, 1e-6, None)) @ eigenvectors.T
+        scale = np.sqrt(np.diag(correlation))
+        self.correlation = correlation / np.outer(scale, scale)
+        self._cholesky = np.linalg.cholesky(self.correlation)
+        self._probabilities = (np.arange(self.n) + 0.5) / self.n
+
+    def sample(self, n: int, rng: np.random.Generator) -> dict:
+        uniforms = ndtr(rng.standard_normal((n, self._cholesky.shape[0])) @ self._cholesky.T)
+        columns = {}
+        for j, feature in enumerate(NUMERIC_FEATURES):
+            values = np.interp(uniforms[:, j], self._probabilities, self.sorted[feature])
+            columns[feature] = np.round(values, self.decimals[feature])
+            if self.decimals[feature] == 0:
+                columns[feature] = columns[feature].astype(np.int64)
+        codes = np.searchsorted(self.category_cuts, uniforms[:, -1], side="right")
+        columns[CATEGORICAL_FEATURE] = np.asarray(CATEGORY_ORDER, dtype=object)[codes]
+        return columns
+
+
+class StudentGenerator:
+    """A ClassCopula per class plus the class balance."""
+
+    def __init__(self, df: pd.DataFrame, fail_rate: float = None):
+        self.decimals = {f: _decimals(df[f].to_numpy(dtype=float)) for f in NUMERIC_FEATURES}
+        self.copulas = {label: ClassCopula(df[df[LABEL] == label], self.decimals) for label in CLASSES}
+        self.fail_rate = float((df[LABEL] == "Fail").mean()) if fail_rate is None else fail_rate
+
+    def chunk(self, n: int, rng: np.random.Generator, include_label: bool = True) -> pd.DataFrame:
+        failed = rng.random(n) < self.fail_rate
+        columns = {f: np.empty(n, dtype=np.int64 if self.decimals[f] == 0 else float) for f in NUMERIC_FEATURES}
+        columns[CATEGORICAL_FEATURE] = np.empty(n, dtype=object)
+        for label, mask in (("Fail", failed), ("Pass", ~failed)):
+            count = int(mask.sum())
+            if count:
+                for feature, values in self.copulas[label].sample(count, rng).items():
+                    columns[feature][mask] = values
+        if include_label:
+            columns[LABEL] = np.where(failed, "Fail", "Pass")
+        return pd.DataFrame(columns)
+
+
+class ChunkWriter:
+    """Appends DataFrames to a .csv, .ndjson/.jsonl, .xlsx or .parquet file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.extension = os.path.splitext(path)[1].lower()
+        self._parquet = None
+        if self.extension == ".xlsx":
+            from openpyxl import Workbook
+
+            self._workbook = Workbook(write_only=True)
+            self._sheet = self._workbook.create_sheet("students")
+            self._header_written = False
+        elif self.extension == ".parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise SystemExit("Parquet output needs pyarrow (pip install pyarrow)")
+        elif self.extension in (".csv", ".ndjson", ".jsonl"):
+            self._file = open(path, "w", newline="", encoding="utf-8")
+        else:
+            raise SystemExit(f"{path}: unsupported output format (use .csv, .ndjson, .jsonl, .xlsx or .parquet)")
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.extension == ".csv":
+            df.to_csv(self._file, header=self._file.tell() == 0, index=False)
+        elif self.extension in (".ndjson", ".jsonl"):
+            # to_json(lines=True) ends every record, including the last, with a newline
+            self._file.write(df.to_json(orient="records", lines=True))
+        elif self.extension == ".xlsx":
+            if not self._header_written:
+                self._sheet.append(list(df.columns))
+                self._header_written = True
+            for row in df.itertuples(index=False):
+                self._sheet.append([v.item() if isinstance(v, np.generic) else v for v in row])
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table)
+
+    def close(self) -> None:
+        if self.extension == ".xlsx":
+            self._workbook.save(self.path)
+        elif self.extension == ".parquet":
+            if self._parquet is not None:
+                self._parquet.close()
+        else:
+            self._file.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic student rows fitted to the training data")
+    parser.add_argument("output", help="Output file (.csv, .ndjson, .jsonl, .xlsx or .parquet)")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--fail-rate", type=float, default=None,
+                        help="Share of Fail rows (default: as in the datasets)")
+    parser.add_argument("--no-label", action="store_true", help=f"Omit the {LABEL} column (scoring input)")
+    parser.add_argument("--datasets", nargs="+", default=DATASET_PATHS)
+    args = parser.parse_args()
+
+    if args.output.lower().endswith(".xlsx") and args.rows > EXCEL_MAX_ROWS:
+        raise SystemExit(f"xlsx holds at most {EXCEL_MAX_ROWS} rows; use .csv or .parquet")
+
+    source = load_datasets(args.datasets)
+    generator = StudentGenerator(source, args.fail_rate)
+    print(f"Fitted {len(source)} rows from {len(args.datasets)} file(s); fail rate {generator.fail_rate:.3f}")
+
+    start = time.perf_counter()
+    writer = ChunkWriter(args.output)
+    seeds = np.random.SeedSequence(args.seed)
+    written = 0
+    try:
+        for child in seeds.spawn(max(1, -(-args.rows // args.chunk_size))):
+            n = min(args.chunk_size, args.rows - written)
+            if n <= 0:
+                break
+            writer.write(generator.chunk(n, np.random.default_rng(child), include_label=not args.no_label))
+            written += n
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {written} rows to {args.output} in {elapsed:.1f}s ({written / max(elapsed, 1e-9):,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
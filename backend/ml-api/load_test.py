@@ -0,0 +1,386 @@
+"""
+HTTP Load Test
+==============
+
+Starts the API under uvicorn (or targets a running server with --url) and
+drives a fixed-rate asyncio traffic mix against it:
+
+- interactive: what-if simulator sessions. Bursts of /predict/single
+  requests (a slider being dragged) arrive at --interactive-rate bursts/s;
+- bulk: /predict/batch uploads of --batch-size rows at --batch-rate/s.
+
+Arrivals are Poisson at the configured rates and do not wait for earlier
+responses (open loop), so a slow server shows up as latency and queueing
+instead of silently lowering the offered load. Payloads are sampled with
+generate_synthetic_data.py's fitted generator.
+
+The report has throughput, p50/p95/p99/p99.9 latency, error and 429 rates
+per route, plus CPU and RSS of the server processes (Linux /proc). It can
+check latency SLOs and compare against a stored baseline; violations and
+regressions make the exit code 1.
+
+Usage:
+    python load_test.py --duration 30 --interactive-rate 5 --batch-rate 0.5
+    python load_test.py --workers 2 --slo predict_single:p99=150 --save-baseline
+    python load_test.py --url http://localhost:8000 --scenario staging --json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from generate_synthetic_data import DATASET_PATHS, StudentGenerator, load_datasets
+
+BASELINE_DIR = "load_baselines"
+PERCENTILES = {"p50": 50, "p95": 95, "p99": 99, "p999": 99.9}
+# Relative change of a baseline metric that counts as a regression
+DEFAULT_TOLERANCE = 0.2
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, workers: int, env_overrides: dict, log_path: str) -> subprocess.Popen:
+    command = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+               "--workers", str(workers), "--log-level", "warning"]
+    env = dict(os.environ, **env_overrides)
+    with open(log_path, "ab") as log:
+        return subprocess.Popen(
+            command, cwd=os.path.dirname(os.path.abspath(__file__)), env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+
+
+async def wait_ready(client, timeout: float) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if (await client.get("/ready")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.25)
+    raise SystemExit(f"Server not ready after {timeout}s")
+
+
+class ProcessSampler:
+    """CPU% and RSS of a process and its children, sampled from /proc."""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.cpu_percent = []
+        self.rss_mb = []
+        self._ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+        self.available = os.path.isdir(f"/proc/{pid}")
+
+    def _tree(self):
+        pids = [self.pid]
+        for name in os.listdir("/proc"):
+            if name.isdigit():
+                try:
+                    with open(f"/proc/{name}/stat") as f:
+                        if int(f.read().rsplit(")", 1)[1].split()[1]) == self.pid:
+                            pids.append(int(name))
+                except (OSError, IndexError, ValueError):
+                    continue
+        return pids
+
+    def _read(self):
+        cpu, rss = 0, 0.0
+        for pid in self._tree():
+            try:
+                with open(f"/proc/{pid}/stat") as f:
+                    fields = f.read().rsplit(")", 1)[1].split()
+                cpu += int(fields[11]) + int(fields[12])  # utime + stime
+                with open(f"/proc/{pid}/status") as f:
+                    for line in f:
+                        if line.startswith("VmRSS:"):
+                            rss += int(line.split()[1]) / 1024
+            except (OSError, IndexError, ValueError):
+                continue
+        return cpu, rss
+
+    async def run(self, interval: float = 0.5) -> None:
+        if not self.available:
+            return
+        last_cpu, _ = self._read()
+        last_time = time.perf_counter()
+        while True:
+            await asyncio.sleep(interval)
+            cpu, rss = self._read()
+            now = time.perf_counter()
+            self.cpu_percent.append(100.0 * (cpu - last_cpu) / self._ticks / (now - last_time))
+            self.rss_mb.append(rss)
+            last_cpu, last_time = cpu, now
+
+    def summary(self):
+        if not self.cpu_percent:
+            return None
+        return {
+            "cpu_percent_mean": round(float(np.mean(self.cpu_percent)), 1),
+            "cpu_percent_max": round(float(np.max(self.cpu_percent)), 1),
+            "rss_mb_max": round(float(np.max(self.rss_mb)), 1),
+        }
+
+
+class LoadRun:
+    def __init__(self, client, args, generator: StudentGenerator):
+        self.client = client
+        self.args = args
+        self.rng = np.random.default_rng(args.seed)
+        self.random = random.Random(args.seed)
+        self.generator = generator
+        self.results = {"predict_single": [], "predict_batch": []}  # (latency_s, status)
+        self.in_flight = 0
+        self.dropped = 0
+        self.measuring = False
+
+    def _records(self, n: int):
+        df = self.generator.chunk(n, self.rng, include_label=False)
+        return json.loads(df.to_json(orient="records"))
+
+    async def _call(self, route: str, path: str, body: dict) -> None:
+        self.in_flight += 1
+        measured = self.measuring
+        start = time.perf_counter()
+        try:
+            status = (await self.client.post(path, json=body)).status_code
+        except Exception:
+            status = 0  # connection error / timeout
+        finally:
+            self.in_flight -= 1
+        if measured:
+            self.results[route].append((time.perf_counter() - start, status))
+
+    async def _burst(self) -> None:
+        """One simulator interaction: a student record nudged a few times in quick succession."""
+        features = self._records(1)[0]
+        tasks = []
+        for _ in range(self.args.burst_size):
+            features = dict(features, attendance=min(100.0, max(0.0, features["attendance"] + self.random.uniform(-5, 5))))
+            tasks.append(asyncio.ensure_future(self._call("predict_single", "/predict/single", {"features": features})))
+            await asyncio.sleep(self.args.burst_interval_ms / 1000)
+        await asyncio.gather(*tasks)
+
+    async def _arrivals(self, rate: float, make_request, until: float) -> None:
+        if rate <= 0:
+            return
+        tasks = set()
+        next_at = time.perf_counter()
+        while True:
+            next_at += self.random.expovariate(rate)
+            if next_at >= until:
+                break
+            await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+            if self.in_flight >= self.args.max_in_flight:
+                self.dropped += 1
+                continue
+            task = asyncio.ensure_future(make_request())
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def run(self) -> None:
+        batch_body = lambda: {"records": self._records(self.args.batch_size)}  # noqa: E731
+        until = time.perf_counter() + self.args.warmup + self.args.duration
+
+        async def begin_measuring():
+            await asyncio.sleep(self.args.warmup)
+            self.measuring = True
+
+        await asyncio.gather(
+            begin_measuring(),
+            self._arrivals(self.args.interactive_rate, self._burst, until),
+            self._arrivals(
+                self.args.batch_rate,
+                lambda: self._call("predict_batch", "/predict/batch", batch_body()),
+                until,
+            ),
+        )
+
+
+def route_report(samples, seconds: float) -> dict:
+    if not samples:
+        return {"requests": 0}
+    latencies = np.array([latency for latency, _ in samples]) * 1000
+    statuses = np.array([status for _, status in samples])
+    ok = (statuses >= 200) & (statuses < 300)
+    report = {
+        "requests": int(len(samples)),
+        "throughput_rps": round(float(ok.sum()) / seconds, 2),
+        "error_rate": round(float(np.mean(~ok & (statuses != 429))), 4),
+        "rejected_429_rate": round(float(np.mean(statuses == 429)), 4),
+    }
+    ok_latencies = latencies[ok] if ok.any() else latencies
+    for name, q in PERCENTILES.items():
+        report[f"{name}_ms"] = round(float(np.percentile(ok_latencies, q)), 2)
+    report["max_ms"] = round(float(ok_latencies.max()), 2)
+    return report
+
+
+def check_slos(routes: dict, slos) -> list:
+    """SLOs look like predict_single:p99=150 (milliseconds); returns violations."""
+    violations = []
+    for slo in slos:
+        try:
+            route, rest = slo.split(":", 1)
+            metric, limit = rest.split("=", 1)
+            limit = float(limit)
+        except ValueError:
+            raise SystemExit(f"Bad --slo '{slo}', expected route:pXX=milliseconds")
+        value = routes.get(route, {}).get(f"{metric}_ms")
+        if value is None or value > limit:
+            violations.append(f"{route} {metric} {value} ms > {limit} ms")
+    return violations
+
+
+def compare_baseline(routes: dict, baseline: dict, tolerance: float) -> list:
+    """Latency or throughput more than `tolerance` worse than the baseline."""
+    regressions = []
+    for route, current in routes.items():
+        previous = baseline.get("routes", {}).get(route)
+        if not previous or not previous.get("requests") or not current.get("requests"):
+            continue
+        for metric in ("p95_ms", "p99_ms"):
+            if current[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(f"{route} {metric}: {current[metric]} vs baseline {previous[metric]}")
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{route} throughput_rps: {current['throughput_rps']} vs baseline {previous['throughput_rps']}"
+            )
+        if current["error_rate"] > previous["error_rate"] + 0.01:
+            regressions.append(f"{route} error_rate: {current['error_rate']} vs baseline {previous['error_rate']}")
+    return regressions
+
+
+async def run(args) -> dict:
+    import httpx
+
+    server = None
+    url = args.url
+    if url is None:
+        port = _free_port()
+        server = start_server(
+            port, args.workers, {"MODEL_BACKGROUND_LOAD": "false", "TRACE_SAMPLE_RATE": "0"}, args.server_log
+        )
+        url = f"http://127.0.0.1:{port}"
+    generator = StudentGenerator(load_datasets(args.datasets))
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    try:
+        async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits) as client:
+            await wait_ready(client, args.startup_timeout)
+            sampler = ProcessSampler(server.pid) if server is not None else None
+            sampling = asyncio.ensure_future(sampler.run()) if sampler is not None else None
+            load = LoadRun(client, args, generator)
+            await load.run()
+            if sampling is not None:
+                sampling.cancel()
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+
+    seconds = args.duration
+    return {
+        "scenario": args.scenario,
+        "config": {
+            "duration_s": args.duration,
+            "workers": args.workers if args.url is None else None,
+            "interactive_bursts_per_s": args.interactive_rate,
+            "burst_size": args.burst_size,
+            "batch_uploads_per_s": args.batch_rate,
+            "batch_size": args.batch_size,
+        },
+        "measured_seconds": seconds,
+        "client_dropped": load.dropped,
+        "routes": {route: route_report(samples, seconds) for route, samples in load.results.items()},
+        "server": sampler.summary() if sampler is not None else None,
+    }
+
+
+def print_report(report: dict) -> None:
+    print(f"Scenario '{report['scenario']}', {report['measured_seconds']}s measured")
+    header = f"{'route':<16}{'reqs':>7}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'p99.9':>9}{'err %':>7}{'429 %':>7}"
+    print(header)
+    for route, r in report["routes"].items():
+        if not r["requests"]:
+            print(f"{route:<16}{0:>7}")
+            continue
+        print(
+            f"{route:<16}{r['requests']:>7}{r['throughput_rps']:>8.1f}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}"
+            f"{r['p99_ms']:>9.1f}{r['p999_ms']:>9.1f}{r['error_rate'] * 100:>7.2f}{r['rejected_429_rate'] * 100:>7.2f}"
+        )
+    if report["server"]:
+        s = report["server"]
+        print(f"server CPU mean {s['cpu_percent_mean']}% (max {s['cpu_percent_max']}%), RSS max {s['rss_mb_max']} MB")
+    if report["client_dropped"]:
+        print(f"client dropped {report['client_dropped']} arrivals (more than --max-in-flight outstanding)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fixed-rate HTTP load test with latency percentiles and baselines")
+    parser.add_argument("--url", default=None, help="Target a running server instead of starting uvicorn")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers when the harness starts the server")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--warmup", type=float, default=3.0, help="Seconds of traffic before measuring")
+    parser.add_argument("--interactive-rate", type=float, default=5.0, help="Simulator bursts per second")
+    parser.add_argument("--burst-size", type=int, default=5)
+    parser.add_argument("--burst-interval-ms", type=float, default=40.0)
+    parser.add_argument("--batch-rate", type=float, default=0.5, help="Batch uploads per second")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--max-in-flight", type=int, default=256)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--startup-timeout", type=float, default=120.0)
+    parser.add_argument("--server-log", default=os.devnull, help="Where the started server's output goes")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--datasets", nargs="+", default=DATASET_PATHS)
+    parser.add_argument("--slo", action="append", default=[], help="e.g. predict_single:p99=150 (ms), repeatable")
+    parser.add_argument("--scenario", default="default", help="Baseline name")
+    parser.add_argument("--baseline-dir", default=BASELINE_DIR)
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the scenario's baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    report["slo_violations"] = check_slos(report["routes"], args.slo)
+    baseline_path = os.path.join(args.baseline_dir, f"{args.scenario}.json")
+    report["baseline_regressions"] = []
+    if os.path.exists(baseline_path):
+        with open(baseline_path) as f:
+            report["baseline_regressions"] = compare_baseline(report["routes"], json.load(f), args.tolerance)
+    if args.save_baseline:
+        os.makedirs(args.baseline_dir, exist_ok=True)
+        with open(baseline_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+        for violation in report["slo_violations"]:
+            print(f"SLO violated: {violation}")
+        if os.path.exists(baseline_path) and not args.save_baseline:
+            print(f"Compared with {baseline_path}: "
+                  f"{len(report['baseline_regressions']) or 'no'} regression(s)")
+        for regression in report["baseline_regressions"]:
+            print(f"  {regression}")
+        if args.save_baseline:
+            print(f"Saved baseline {baseline_path}")
+    if report["slo_violations"] or (report["baseline_regressions"] and not args.save_baseline):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,13 @@
+from contextlib import asynccontextmanager
+from typing import Optional
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers.predict import router as predict_router
-from app.routers.diagnostic import router as diagnostic_router
-from app.routers.debug_prediction import router as debug_router
-from app.routers.model_analysis import router as analysis_router
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from app.core.config import APP_PROFILE
+from app.core.profiling import ProfilingMiddleware
+from app.core.tracing import TracingMiddleware
 import logging
 
 # Configure logging
@@ -12,22 +16,84 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
-app = FastAPI(title="Hackathon ML API", version="1.0.0")
+PROFILES = ("production", "dev")
 
-# CORS configuration for frontend integration
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # In production, replace with specific frontend URL
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
 
-@app.get("/health")
-async def health():
-    return {"status": "ok", "service": "ml-api"}
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Imported here: lifecycle pulls in the model and every warmed service, which
+    # `import main` (and tools that only build the app) should not pay for
+    from app.core import lifecycle
+
+    # Load and warm the model before (or, if configured, while) serving traffic
+    await run_in_threadpool(lifecycle.startup, analysis=app.state.profile == "dev")
+    yield
+
+
+def create_app(profile: Optional[str] = None) -> FastAPI:
+    """
+    Build the FastAPI application for a deployment profile.
+
+    - production: prediction, health/readiness, monitoring and model registry
+      routes only. The diagnostic, debug and analysis routers (full inference
+      with tracebacks in the response) are never imported.
+    - dev: everything, including the diagnostic routers.
+
+    Args:
+        profile: "production" or "dev" (defaults to the APP_PROFILE env var)
+    """
+    profile = (profile or APP_PROFILE).lower()
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown APP_PROFILE '{profile}'. Expected one of: {', '.join(PROFILES)}")
+
+    app = FastAPI(title="Hackathon ML API", version="1.0.0", lifespan=lifespan)
+    app.state.profile = profile
+
+    # CORS configuration for frontend integration
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  # In production, replace with specific frontend URL
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["X-Correlation-Id", "Server-Timing", "X-Profile"],
+    )
+    # Inside tracing, so a profiled request's rewritten body is still traced
+    app.add_middleware(ProfilingMiddleware)
+    # Added last so it is outermost: its spans cover CORS handling and routing too
+    app.add_middleware(TracingMiddleware)
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "service": "ml-api", "profile": profile}
+
+    @app.get("/ready")
+    async def ready():
+        """Readiness probe: 200 only once the model is loaded and warmed."""
+        from app.core import lifecycle
+
+        body = {"service": "ml-api", **lifecycle.state.describe()}
+        return JSONResponse(status_code=200 if lifecycle.state.ready else 503, content=body)
+
+    from app.routers.predict import router as predict_router
+    from app.routers.monitoring import router as monitoring_router
+    from app.routers.models import router as models_router
+
+    app.include_router(predict_router, prefix="/predict", tags=["predict"])
+    app.include_router(monitoring_router, prefix="/monitoring", tags=["monitoring"])
+    app.include_router(models_router, prefix="/models", tags=["models"])
+
+    if profile == "dev":
+        # Imported here so production workers never load these modules
+        from app.routers.diagnostic import router as diagnostic_router
+        from app.routers.debug_prediction import router as debug_router
+        from app.routers.model_analysis import router as analysis_router
+
+        app.include_router(diagnostic_router, prefix="/diagnostic", tags=["diagnostic"])
+        app.include_router(debug_router, prefix="/debug", tags=["debug"])
+        app.include_router(analysis_router, prefix="/analysis", tags=["analysis"])
+
+    return app
+
 
-app.include_router(predict_router, prefix="/predict", tags=["predict"])
-app.include_router(diagnostic_router, prefix="/diagnostic", tags=["diagnostic"])
-app.include_router(debug_router, prefix="/debug", tags=["debug"])
-app.include_router(analysis_router, prefix="/analysis", tags=["analysis"])
+app = create_app()
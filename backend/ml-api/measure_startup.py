@@ -0,0 +1,119 @@
+"""
+Startup Cost Measurement
+========================
+
+Measures, for each application profile, how long `import main` takes, how
+long the model load + warmup takes, and the worker's resident memory after
+each step. Every profile runs in a fresh interpreter so results are not
+polluted by modules imported for another profile.
+
+Usage:
+    python measure_startup.py
+    python measure_startup.py --profiles production --runs 5 --json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Runs inside the child interpreter; prints one JSON line
+CHILD_SCRIPT = r"""
+import json, os, sys, time
+
+def rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        return None
+
+baseline = rss_mb()
+start = time.perf_counter()
+import main
+import_seconds = time.perf_counter() - start
+after_import = rss_mb()
+heavy = [m for m in ("pandas", "sklearn", "numpy") if m in sys.modules]
+
+from app.core import lifecycle
+start = time.perf_counter()
+lifecycle.startup(analysis=main.app.state.profile == "dev")
+startup_seconds = time.perf_counter() - start
+
+print(json.dumps({
+    "import_seconds": import_seconds,
+    "startup_seconds": startup_seconds,
+    "rss_baseline_mb": baseline,
+    "rss_after_import_mb": after_import,
+    "rss_after_startup_mb": rss_mb(),
+    "routes": len(main.app.routes),
+    "heavy_modules_after_import": heavy,
+    "status": lifecycle.state.phase,
+}))
+"""
+
+
+def measure(profile: str) -> dict:
+    env = dict(os.environ, APP_PROFILE=profile)
+    env.setdefault("MODEL_BACKGROUND_LOAD", "false")
+    proc = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Profile {profile} failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def summarize(runs: list) -> dict:
+    summary = {}
+    for key in ("import_seconds", "startup_seconds", "rss_after_import_mb", "rss_after_startup_mb"):
+        values = [r[key] for r in runs if r[key] is not None]
+        summary[key] = statistics.median(values) if values else None
+    summary["routes"] = runs[-1]["routes"]
+    summary["heavy_modules_after_import"] = runs[-1]["heavy_modules_after_import"]
+    summary["status"] = runs[-1]["status"]
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time and RSS per app profile")
+    parser.add_argument("--profiles", nargs="+", default=["production", "dev"])
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per profile (median is reported)")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    results = {}
+    for profile in args.profiles:
+        results[profile] = summarize([measure(profile) for _ in range(args.runs)])
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'profile':<12}{'import s':>10}{'startup s':>11}{'RSS import MB':>15}{'RSS ready MB':>14}{'routes':>8}  heavy modules after import")
+    for profile, r in results.items():
+        def fmt(value, spec):
+            return format(value, spec) if value is not None else "n/a"
+        print(
+            f"{profile:<12}{fmt(r['import_seconds'], '>10.3f')}{fmt(r['startup_seconds'], '>11.3f')}"
+            f"{fmt(r['rss_after_import_mb'], '>15.1f')}{fmt(r['rss_after_startup_mb'], '>14.1f')}"
+            f"{r['routes']:>8}  {', '.join(r['heavy_modules_after_import']) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
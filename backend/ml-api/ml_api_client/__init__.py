@@ -0,0 +1,11 @@
+"""
+Python client for the ML API.
+
+Sync and asyncio clients with pooled keep-alive connections, automatic
+chunking of large batches, bounded concurrency, retries on 429/503 and
+results in input order.
+"""
+
+from ml_api_client.client import AsyncMLApiClient, MLApiClient, MLApiError
+
+__all__ = ["MLApiClient", "AsyncMLApiClient", "MLApiError"]
@@ -0,0 +1,283 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence
+import asyncio
+import logging
+import random
+import time
+import uuid
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "http://localhost:8000"
+
+# Server answers that mean "try again later" (admission control, model loading)
+RETRY_STATUSES = (429, 503)
+# Connection-level failures worth retrying; predictions are idempotent
+RETRY_EXCEPTIONS = (httpx.ConnectError, httpx.RemoteProtocolError, httpx.ReadError, httpx.PoolTimeout)
+
+
+class MLApiError(Exception):
+    """The ML API answered with an error status (after any retries)."""
+
+    def __init__(self, status_code: int, detail: Any, correlation_id: Optional[str] = None):
+        super().__init__(f"ML API returned {status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+        self.correlation_id = correlation_id
+
+
+def _chunks(n: int, chunk_size: int) -> List[slice]:
+    return [slice(start, min(start + chunk_size, n)) for start in range(0, n, chunk_size)]
+
+
+def _retry_delay(attempt: int, response: Optional[httpx.Response], backoff: float, max_backoff: float) -> float:
+    """Retry-After when the server sends one, else exponential backoff with full jitter."""
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        if retry_after is not None:
+            try:
+                return min(max_backoff, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+    return random.uniform(0, min(max_backoff, backoff * (2 ** attempt)))
+
+
+def _error_for(response: httpx.Response) -> MLApiError:
+    try:
+        detail = response.json().get("detail", response.text)
+    except ValueError:
+        detail = response.text
+    return MLApiError(response.status_code, detail, response.headers.get("x-correlation-id"))
+
+
+class _ClientBase:
+    def __init__(self, base_url: str, timeout: float, chunk_size: int, max_in_flight: int,
+                 max_retries: int, backoff: float, max_backoff: float, model_version: Optional[str],
+                 max_connections: Optional[int]):
+        if chunk_size < 1 or max_in_flight < 1:
+            raise ValueError("chunk_size and max_in_flight must be at least 1")
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.model_version = model_version
+        self.limits = httpx.Limits(
+            max_connections=max_connections or max_in_flight,
+            max_keepalive_connections=max_connections or max_in_flight,
+        )
+
+    def _headers(self, correlation_id: str) -> Dict[str, str]:
+        headers = {"X-Correlation-Id": correlation_id}
+        if self.model_version:
+            headers["X-Model-Version"] = self.model_version
+        return headers
+
+    def _batch_bodies(self, records: Sequence[Dict[str, Any]], chunk_size: Optional[int],
+                      student_ids: Optional[Sequence[str]], scope: Optional[str],
+                      uncertainty: bool) -> List[Dict[str, Any]]:
+        if student_ids is not None and len(student_ids) != len(records):
+            raise ValueError("student_ids must have one entry per record")
+        bodies = []
+        for part in _chunks(len(records), chunk_size or self.chunk_size):
+            body: Dict[str, Any] = {"records": list(records[part])}
+            if uncertainty:
+                body["uncertainty"] = True
+            if student_ids is not None:
+                body["student_ids"] = list(student_ids[part])
+                if scope is not None:
+                    body["scope"] = scope
+            bodies.append(body)
+        return bodies
+
+
+class MLApiClient(_ClientBase):
+    """
+    Synchronous client for the ML API.
+
+    One pooled keep-alive connection set is shared by every call. Large
+    record sets are split into chunks that are posted to /predict/batch
+    with at most max_in_flight requests outstanding; items come back in
+    input order. 429 and 503 answers are retried with backoff (honouring
+    Retry-After).
+
+    Usage::
+
+        with MLApiClient("http://ml-api:8000") as client:
+            items = client.predict_batch(records)
+    """
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, *, timeout: float = 60.0, chunk_size: int = 1000,
+                 max_in_flight: int = 4, max_retries: int = 5, backoff: float = 0.5, max_backoff: float = 30.0,
+                 model_version: Optional[str] = None, max_connections: Optional[int] = None,
+                 http_client: Optional[httpx.Client] = None):
+        super().__init__(base_url, timeout, chunk_size, max_in_flight, max_retries, backoff, max_backoff,
+                         model_version, max_connections)
+        # A caller-provided client (e.g. fastapi.testclient.TestClient) is used as is and not closed here
+        self._owns_client = http_client is None
+        self._http = http_client or httpx.Client(base_url=self.base_url, timeout=timeout, limits=self.limits)
+
+    def __enter__(self) -> "MLApiClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._owns_client:
+            self._http.close()
+
+    def _request(self, method: str, path: str, json: Any = None, correlation_id: Optional[str] = None) -> Any:
+        correlation_id = correlation_id or uuid.uuid4().hex
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                response = self._http.request(method, path, json=json, headers=self._headers(correlation_id))
+            except RETRY_EXCEPTIONS as e:
+                if attempt == self.max_retries:
+                    raise
+                logger.debug(f"{method} {path} failed ({e}), retrying")
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    if response.status_code >= 400:
+                        raise _error_for(response)
+                    return response.json()
+            time.sleep(_retry_delay(attempt, response, self.backoff, self.max_backoff))
+
+    def health(self) -> Dict[str, Any]:
+        return self._request("GET", "/health")
+
+    def ready(self) -> bool:
+        try:
+            self._request("GET", "/ready")
+            return True
+        except MLApiError:
+            return False
+
+    def predict(self, features: Dict[str, Any], *, exact: bool = False, uncertainty: bool = False) -> Dict[str, Any]:
+        """Score one student with /predict/single."""
+        body: Dict[str, Any] = {"features": features}
+        if exact:
+            body["exact"] = True
+        if uncertainty:
+            body["uncertainty"] = True
+        return self._request("POST", "/predict/single", json=body)
+
+    def predict_batch(self, records: Sequence[Dict[str, Any]], *, chunk_size: Optional[int] = None,
+                      student_ids: Optional[Sequence[str]] = None, scope: Optional[str] = None,
+                      uncertainty: bool = False) -> List[Dict[str, Any]]:
+        """
+        Score any number of records through /predict/batch.
+
+        Args:
+            records: Feature dictionaries, one per student
+            chunk_size: Records per request (default: the client's chunk_size)
+            student_ids: Optional ids aligned with records (delta re-scoring)
+            scope: Namespace for student_ids
+            uncertainty: Also return per-row uncertainty
+
+        Returns:
+            One prediction item per record, in input order
+        """
+        bodies = self._batch_bodies(records, chunk_size, student_ids, scope, uncertainty)
+        if not bodies:
+            return []
+        batch_id = uuid.uuid4().hex[:12]
+
+        def post(indexed):
+            index, body = indexed
+            return self._request("POST", "/predict/batch", json=body, correlation_id=f"batch-{batch_id}-{index}")
+
+        with ThreadPoolExecutor(max_workers=min(self.max_in_flight, len(bodies))) as executor:
+            responses = list(executor.map(post, enumerate(bodies)))
+        return [item for response in responses for item in response["items"]]
+
+
+class AsyncMLApiClient(_ClientBase):
+    """
+    asyncio client for the ML API, with the same behaviour as MLApiClient.
+
+    Usage::
+
+        async with AsyncMLApiClient("http://ml-api:8000") as client:
+            items = await client.predict_batch(records)
+    """
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, *, timeout: float = 60.0, chunk_size: int = 1000,
+                 max_in_flight: int = 4, max_retries: int = 5, backoff: float = 0.5, max_backoff: float = 30.0,
+                 model_version: Optional[str] = None, max_connections: Optional[int] = None,
+                 http_client: Optional[httpx.AsyncClient] = None):
+        super().__init__(base_url, timeout, chunk_size, max_in_flight, max_retries, backoff, max_backoff,
+                         model_version, max_connections)
+        self._owns_client = http_client is None
+        self._http = http_client or httpx.AsyncClient(base_url=self.base_url, timeout=timeout, limits=self.limits)
+
+    async def __aenter__(self) -> "AsyncMLApiClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        if self._owns_client:
+            await self._http.aclose()
+
+    async def _request(self, method: str, path: str, json: Any = None, correlation_id: Optional[str] = None) -> Any:
+        correlation_id = correlation_id or uuid.uuid4().hex
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                response = await self._http.request(method, path, json=json, headers=self._headers(correlation_id))
+            except RETRY_EXCEPTIONS as e:
+                if attempt == self.max_retries:
+                    raise
+                logger.debug(f"{method} {path} failed ({e}), retrying")
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    if response.status_code >= 400:
+                        raise _error_for(response)
+                    return response.json()
+            await asyncio.sleep(_retry_delay(attempt, response, self.backoff, self.max_backoff))
+
+    async def health(self) -> Dict[str, Any]:
+        return await self._request("GET", "/health")
+
+    async def ready(self) -> bool:
+        try:
+            await self._request("GET", "/ready")
+            return True
+        except MLApiError:
+            return False
+
+    async def predict(self, features: Dict[str, Any], *, exact: bool = False,
+                      uncertainty: bool = False) -> Dict[str, Any]:
+        """Score one student with /predict/single."""
+        body: Dict[str, Any] = {"features": features}
+        if exact:
+            body["exact"] = True
+        if uncertainty:
+            body["uncertainty"] = True
+        return await self._request("POST", "/predict/single", json=body)
+
+    async def predict_batch(self, records: Sequence[Dict[str, Any]], *, chunk_size: Optional[int] = None,
+                            student_ids: Optional[Sequence[str]] = None, scope: Optional[str] = None,
+                            uncertainty: bool = False) -> List[Dict[str, Any]]:
+        """Score any number of records through /predict/batch; see MLApiClient.predict_batch."""
+        bodies = self._batch_bodies(records, chunk_size, student_ids, scope, uncertainty)
+        if not bodies:
+            return []
+        batch_id = uuid.uuid4().hex[:12]
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+
+        async def post(index: int, body: Dict[str, Any]):
+            async with semaphore:
+                return await self._request(
+                    "POST", "/predict/batch", json=body, correlation_id=f"batch-{batch_id}-{index}"
+                )
+
+        responses = await asyncio.gather(*(post(index, body) for index, body in enumerate(bodies)))
+        return [item for response in responses for item in response["items"]]
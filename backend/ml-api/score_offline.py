@@ -0,0 +1,302 @@
+"""
+Offline Bulk Scoring
+====================
+
+Scores a large CSV, xlsx or Parquet file with the trained model without
+going through HTTP. The input is read in chunks and the chunks are scored by
+a pool of worker processes through the same code path as /predict/batch
+(app.services.predictor). Results are appended to the output as each chunk
+finishes, in input order. Progress is kept in a checkpoint file next to the
+output, so an interrupted run continues where it stopped when started again
+with the same arguments.
+
+The model is loaded once in this process before the workers are forked, so
+its arrays are shared copy-on-write instead of being copied into each
+worker. Where fork is unavailable (Windows) each worker loads its own copy.
+
+Output formats: .csv (appended) or .parquet (a directory of one part file
+per chunk). Parquet input or output needs pyarrow.
+
+Usage:
+    python score_offline.py history.csv scored.csv
+    python score_offline.py history.parquet scored.parquet --workers 8 --chunk-size 20000
+    python score_offline.py term.xlsx scored.csv --restart
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Workers are processes; forest inference inside each stays single-threaded
+os.environ.setdefault("INFERENCE_MAX_THREADS", "1")
+
+from app.core.config import MODEL_PATH  # noqa: E402
+from app.core.model_loader import DummyModel, get_model  # noqa: E402
+from app.services.batch_summary import risk_levels  # noqa: E402
+from app.services.feature_schema import get_feature_schema  # noqa: E402
+from app.services.predictor import (  # noqa: E402
+    RISK_THRESHOLD_HIGH,
+    RISK_THRESHOLD_MEDIUM,
+    _predict_columns,
+)
+
+CHECKPOINT_SUFFIX = ".checkpoint.json"
+# Invalid rows reported per chunk (all of them are counted)
+MAX_REPORTED_ERRORS = 5
+
+# Set in the parent before forking (inherited) or by _init_worker under spawn
+_model = None
+
+
+def _init_worker() -> None:
+    global _model
+    if _model is None:
+        _model = get_model()
+
+
+def _score_chunk(df: pd.DataFrame):
+    """
+    Worker: validate and score one chunk.
+
+    Rows that fail the API's feature validation are not scored: their risk
+    is NaN and their class -1.
+
+    Returns:
+        (risk_scores, predicted_classes, {chunk row index: {feature: message}})
+    """
+    validated = get_feature_schema().validate(df.to_dict("records"))
+    if not validated.errors:
+        risk, classes = _predict_columns(_model, validated.columns)
+        return risk, classes, {}
+    risk = np.full(validated.n_rows, np.nan)
+    classes = np.full(validated.n_rows, -1, dtype=np.int64)
+    valid = np.setdiff1d(np.arange(validated.n_rows), list(validated.errors))
+    if len(valid):
+        risk[valid], classes[valid] = _predict_columns(_model, validated.take(valid).columns)
+    return risk, classes, validated.errors
+
+
+def _require_pyarrow(path: str):
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit(f"{path}: Parquet support needs pyarrow (pip install pyarrow)")
+    return pq
+
+
+def iter_chunks(path: str, chunk_size: int, skip_rows: int):
+    """Yield DataFrames of up to chunk_size rows, after skipping the first skip_rows data rows."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        yield from pd.read_csv(path, chunksize=chunk_size, skiprows=range(1, skip_rows + 1))
+    elif extension == ".parquet":
+        pq = _require_pyarrow(path)
+        skipped = 0
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            df = batch.to_pandas()
+            if skipped < skip_rows:
+                take = min(len(df), skip_rows - skipped)
+                skipped += take
+                df = df.iloc[take:]
+            if len(df):
+                yield df.reset_index(drop=True)
+    elif extension in (".xlsx", ".xlsm"):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(c) for c in next(rows)]
+            buffer = []
+            for index, row in enumerate(rows):
+                if index < skip_rows:
+                    continue
+                buffer.append(row)
+                if len(buffer) == chunk_size:
+                    yield pd.DataFrame(buffer, columns=header)
+                    buffer = []
+            if buffer:
+                yield pd.DataFrame(buffer, columns=header)
+        finally:
+            workbook.close()
+    else:
+        raise SystemExit(f"{path}: unsupported input format (use .csv, .xlsx or .parquet)")
+
+
+class OutputWriter:
+    """Appends scored chunks to a CSV file or to a Parquet part directory."""
+
+    def __init__(self, path: str, resume_position: int):
+        self.path = path
+        self.parquet = path.lower().endswith(".parquet")
+        if self.parquet:
+            self._pq = _require_pyarrow(path)
+            os.makedirs(path, exist_ok=True)
+            # Parts written after the last checkpoint are rewritten
+            for name in os.listdir(path):
+                if name.startswith("part-") and int(name[5:10]) >= resume_position:
+                    os.remove(os.path.join(path, name))
+            self._parts = resume_position
+        else:
+            mode = "r+b" if resume_position and os.path.exists(path) else "wb"
+            self._file = open(path, mode)
+            # Drop anything written after the last checkpoint
+            self._file.truncate(resume_position)
+            self._file.seek(resume_position)
+
+    def write(self, df: pd.DataFrame) -> int:
+        """Write one chunk durably; returns the position to resume from."""
+        if self.parquet:
+            import pyarrow as pa
+
+            name = os.path.join(self.path, f"part-{self._parts:05d}.parquet")
+            self._pq.write_table(pa.Table.from_pandas(df, preserve_index=False), name)
+            self._parts += 1
+            return self._parts
+        df.to_csv(self._file, header=self._file.tell() == 0, index=False)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return self._file.tell()
+
+    def close(self) -> None:
+        if not self.parquet:
+            self._file.close()
+
+
+def _input_fingerprint(path: str) -> dict:
+    stat = os.stat(path)
+    return {"path": os.path.abspath(path), "size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def _load_checkpoint(path: str, expected: dict):
+    try:
+        with open(path) as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if {k: checkpoint.get(k) for k in expected} != expected:
+        raise SystemExit(
+            f"{path} belongs to a different input, chunk size or model. Use --restart to start over."
+        )
+    return checkpoint
+
+
+def _save_checkpoint(path: str, checkpoint: dict) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a large file with the trained model, without HTTP")
+    parser.add_argument("input", help=".csv, .xlsx or .parquet file with one student per row")
+    parser.add_argument("output", help=".csv file or .parquet directory for the scored rows")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and start over")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    global _model
+    _model = get_model()
+    if isinstance(_model, DummyModel):
+        raise SystemExit(f"No trained model at {MODEL_PATH}. Run python train_model.py first.")
+
+    checkpoint_path = args.output.rstrip("/\\") + CHECKPOINT_SUFFIX
+    identity = {
+        "input": _input_fingerprint(args.input),
+        "chunk_size": args.chunk_size,
+        "model_mtime": os.path.getmtime(MODEL_PATH),
+    }
+    checkpoint = None if args.restart else _load_checkpoint(checkpoint_path, identity)
+    if checkpoint is None:
+        checkpoint = {**identity, "rows_done": 0, "chunks_done": 0, "output_position": 0}
+    elif checkpoint.get("complete"):
+        print(f"{args.output} is already complete ({checkpoint['rows_done']} rows). Use --restart to score again.")
+        return
+    else:
+        print(f"Resuming after {checkpoint['rows_done']} rows ({checkpoint['chunks_done']} chunks)")
+
+    writer = OutputWriter(args.output, checkpoint["output_position"])
+    # fork shares the loaded model copy-on-write; spawn workers load their own
+    method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+    workers = max(1, args.workers)
+    start = time.perf_counter()
+    rows_this_run = 0
+    invalid_rows = 0
+    last_report = start
+    pending = deque()
+
+    def finish_oldest():
+        nonlocal rows_this_run, invalid_rows, last_report
+        df, future = pending.popleft()
+        risk, classes, errors = future.result()
+        for index in sorted(errors)[:MAX_REPORTED_ERRORS]:
+            print(f"  row {checkpoint['rows_done'] + index}: not scored, {errors[index]}", file=sys.stderr)
+        invalid_rows += len(errors)
+        df = df.copy()
+        df["risk_score"] = risk
+        df["risk_category"] = np.where(
+            classes < 0, "", risk_levels(risk, RISK_THRESHOLD_HIGH, RISK_THRESHOLD_MEDIUM)
+        )
+        df["predicted_label"] = np.select([classes == 1, classes == 0], ["normal", "at_risk"], default="invalid")
+        checkpoint["output_position"] = writer.write(df)
+        checkpoint["rows_done"] += len(df)
+        checkpoint["chunks_done"] += 1
+        _save_checkpoint(checkpoint_path, checkpoint)
+        rows_this_run += len(df)
+        now = time.perf_counter()
+        if now - last_report >= 5:
+            last_report = now
+            print(f"  {checkpoint['rows_done']} rows, {rows_this_run / (now - start):,.0f} rows/s", flush=True)
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context(method),
+            initializer=_init_worker,
+        ) as executor:
+            for df in iter_chunks(args.input, args.chunk_size, checkpoint["rows_done"]):
+                # Same schema as the API: aliases (assignments_completed) count, optional features may be absent
+                missing = [
+                    feature.name for feature in get_feature_schema().features
+                    if feature.required and not {feature.name, *feature.aliases} & set(df.columns)
+                ]
+                if missing:
+                    raise SystemExit(f"{args.input} is missing model features: {missing}")
+                pending.append((df, executor.submit(_score_chunk, df)))
+                # Bounded read-ahead: at most two chunks per worker in memory
+                while len(pending) >= 2 * workers:
+                    finish_oldest()
+            while pending:
+                finish_oldest()
+    except KeyboardInterrupt:
+        print(f"\nInterrupted after {checkpoint['rows_done']} rows; run again to resume.", file=sys.stderr)
+        sys.exit(130)
+    finally:
+        writer.close()
+
+    checkpoint["complete"] = True
+    _save_checkpoint(checkpoint_path, checkpoint)
+    elapsed = time.perf_counter() - start
+    print(
+        f"Scored {rows_this_run} rows in {elapsed:.1f}s ({rows_this_run / max(elapsed, 1e-9):,.0f} rows/s, "
+        f"{workers} worker(s), {method}); {checkpoint['rows_done']} rows in {args.output}"
+    )
+    if invalid_rows:
+        print(f"{invalid_rows} row(s) failed feature validation and were written unscored (predicted_label 'invalid')")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Admission lanes of the prediction routes: a full lane answers 429 with
+Retry-After at once, and only the lane that is full rejects.
+
+Each test installs its own AdmissionController with one inference thread and
+one queue slot per lane, and holds that thread with a task it releases itself.
+"""
+
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.routers.monitoring as monitoring_router
+import app.routers.predict as predict_router
+from app.core.admission import BULK, INTERACTIVE, AdmissionController
+from main import create_app
+
+RECORD = {"attendance": 80, "study_hours": 15, "assignments_submitted": 8, "activities": "medium"}
+
+
+@pytest.fixture(scope="module")
+def app():
+    return create_app("production")
+
+
+@pytest.fixture
+def controller(monkeypatch):
+    controller = AdmissionController(workers=1, interactive_queue=1, bulk_queue=1, interactive_weight=4, bulk_weight=1)
+    monkeypatch.setattr(predict_router, "get_admission_controller", lambda: controller)
+    monkeypatch.setattr(monitoring_router, "get_admission_controller", lambda: controller)
+    return controller
+
+
+@pytest.fixture
+def release():
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def _hold_worker(controller, release):
+    """Occupy the only inference thread until release is set."""
+    started = threading.Event()
+
+    def hold():
+        started.set()
+        release.wait(10)
+
+    controller.submit(BULK, hold)
+    assert started.wait(5)
+
+
+def _assert_rejected(response, lane):
+    assert response.status_code == 429
+    assert lane in response.json()["detail"]
+    assert 1 <= int(response.headers["retry-after"]) <= 30
+
+
+def test_full_bulk_lane_rejects_batches_but_admits_single_predictions(app, controller, release):
+    with TestClient(app) as http:
+        _hold_worker(controller, release)
+        controller.submit(BULK, lambda: None)
+
+        _assert_rejected(http.post("/predict/batch", json={"records": [RECORD]}), BULK)
+        _assert_rejected(http.post("/predict/top-k", json={"records": [RECORD], "k": 1}), BULK)
+
+        # The interactive lane still has room: the request waits for the thread instead of failing
+        answers = []
+        single = threading.Thread(target=lambda: answers.append(http.post("/predict/single", json={"features": RECORD})))
+        single.start()
+        release.set()
+        single.join(10)
+        lanes = http.get("/monitoring/admission").json()["lanes"]
+
+    assert [response.status_code for response in answers] == [200]
+    assert lanes[BULK]["rejected"] == 2
+    assert lanes[INTERACTIVE]["rejected"] == 0
+    assert lanes[INTERACTIVE]["admitted"] == 1
+
+
+def test_full_interactive_lane_rejects_single_predictions(app, controller, release):
+    with TestClient(app) as http:
+        _hold_worker(controller, release)
+        controller.submit(INTERACTIVE, lambda: None)
+
+        _assert_rejected(http.post("/predict/single", json={"features": RECORD}), INTERACTIVE)
+        release.set()
+        # Once the backlog drains the same request is admitted
+        assert http.post("/predict/single", json={"features": RECORD}).status_code == 200
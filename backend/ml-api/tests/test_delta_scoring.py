@@ -0,0 +1,128 @@
+"""
+Delta re-scoring of re-uploaded batches: /predict/batch with student_ids
+reports each student as new, changed, unchanged or model_updated and only
+scores the rows that need it.
+
+_predict_columns is wrapped to record how many rows actually reach the model.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.services.predictor as predictor
+import app.services.result_store as result_store
+from main import create_app
+
+SCOPE = "course-101"
+STRONG = {"attendance": 95, "study_hours": 30, "assignments_submitted": 10, "internal_marks": 85, "activities": "high"}
+WEAK = {"attendance": 20, "study_hours": 1, "assignments_submitted": 0, "internal_marks": 10, "activities": "low"}
+AVERAGE = {"attendance": 70, "study_hours": 12, "assignments_submitted": 6, "internal_marks": 60, "activities": "medium"}
+LATE_JOINER = {"attendance": 55, "study_hours": 8, "assignments_submitted": 4, "activities": "low"}
+
+
+@pytest.fixture(scope="module")
+def app():
+    return create_app("production")
+
+
+@pytest.fixture
+def store_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "results.db")
+    monkeypatch.setattr(result_store, "RESULT_STORE_PATH", path)
+    result_store.get_result_store.cache_clear()
+    yield path
+    result_store.get_result_store.cache_clear()
+
+
+@pytest.fixture
+def scored_rows(monkeypatch):
+    rows = []
+    real = predictor._predict_columns
+
+    def record(model, columns, *args, **kwargs):
+        rows.append(len(next(iter(columns.values()))))
+        return real(model, columns, *args, **kwargs)
+
+    monkeypatch.setattr(predictor, "_predict_columns", record)
+    return rows
+
+
+def _upload(http, records, student_ids):
+    response = http.post("/predict/batch", json={"records": records, "student_ids": student_ids, "scope": SCOPE})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _changes(body):
+    return [item["change"] for item in body["items"]]
+
+
+def test_reupload_scores_only_new_and_changed_students(app, store_path, scored_rows):
+    with TestClient(app) as http:
+        scored_rows.clear()
+        first = _upload(http, [STRONG, AVERAGE], ["s1", "s2"])
+        # s1 is corrected, s2 is untouched, s3 joins the course
+        second = _upload(http, [WEAK, AVERAGE, LATE_JOINER], ["s1", "s2", "s3"])
+
+    assert _changes(first) == ["new", "new"]
+    assert first["delta"]["tracked"] is True
+    assert _changes(second) == ["changed", "unchanged", "new"]
+    assert {key: second["delta"][key] for key in ("new", "changed", "unchanged", "model_updated", "rescored")} == {
+        "new": 1, "changed": 1, "unchanged": 1, "model_updated": 0, "rescored": 2,
+    }
+    assert scored_rows == [2, 2]
+
+    # The unchanged student gets the stored result back
+    assert second["items"][1]["risk_score"] == first["items"][1]["risk_score"]
+    assert second["items"][1]["previous_risk_category"] == first["items"][1]["risk_category"]
+
+    # s1 moved from the strong to the weak profile, which crosses risk categories
+    (change,) = second["delta"]["category_changes"]
+    assert change["student_id"] == "s1"
+    assert change["index"] == 0
+    assert change["previous_risk_category"] == first["items"][0]["risk_category"]
+    assert change["risk_category"] == second["items"][0]["risk_category"] != change["previous_risk_category"]
+
+
+def test_scope_separates_student_ids(app, store_path):
+    with TestClient(app) as http:
+        _upload(http, [STRONG], ["s1"])
+        other = http.post("/predict/batch", json={"records": [STRONG], "student_ids": ["s1"], "scope": "course-202"})
+    assert _changes(other.json()) == ["new"]
+
+
+def test_model_change_rescores_unchanged_students(app, store_path, scored_rows):
+    with TestClient(app) as http:
+        _upload(http, [STRONG, AVERAGE], ["s1", "s2"])
+        # Record s2 as last scored by another model, as after a retrain
+        store = result_store.get_result_store()
+        fingerprint, _, score, predicted_class, category = store.get_students(SCOPE, ["s2"])["s2"]
+        store.put_students(SCOPE, [("s2", fingerprint, "previous-model", score, predicted_class, category)])
+        scored_rows.clear()
+        body = _upload(http, [STRONG, AVERAGE], ["s1", "s2"])
+    assert _changes(body) == ["unchanged", "model_updated"]
+    assert body["delta"]["model_updated"] == 1
+    assert body["delta"]["rescored"] == 1
+    # Re-scored for the serving model, whose result for these features the result cache already holds
+    assert scored_rows == []
+
+
+def test_without_a_result_store_every_student_is_new(app, monkeypatch):
+    monkeypatch.setattr(result_store, "RESULT_STORE_PATH", "")
+    result_store.get_result_store.cache_clear()
+    try:
+        with TestClient(app) as http:
+            _upload(http, [STRONG], ["s1"])
+            body = _upload(http, [STRONG], ["s1"])
+    finally:
+        result_store.get_result_store.cache_clear()
+    assert _changes(body) == ["new"]
+    assert body["delta"]["tracked"] is False
+
+
+def test_student_ids_must_be_unique_and_aligned(app):
+    with TestClient(app) as http:
+        duplicated = http.post("/predict/batch", json={"records": [STRONG, WEAK], "student_ids": ["s1", "s1"]})
+        misaligned = http.post("/predict/batch", json={"records": [STRONG, WEAK], "student_ids": ["s1"]})
+    assert duplicated.status_code == 422
+    assert misaligned.status_code == 422
@@ -0,0 +1,84 @@
+"""
+Feature validation of the prediction routes against the schema in
+model_info.json: defaults for optional features, aliases and coercion, and
+422 reports for invalid records.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import create_app
+
+BASE = {"attendance": 85, "study_hours": 25, "assignments_submitted": 10, "activities": "medium"}
+
+
+@pytest.fixture(scope="module")
+def http():
+    with TestClient(create_app("production")) as client:
+        yield client
+
+
+def _risk(http, features):
+    response = http.post("/predict/single", json={"features": features, "exact": True})
+    assert response.status_code == 200, response.text
+    return response.json()["risk_score"]
+
+
+def _batch_risks(http, records):
+    response = http.post("/predict/batch", json={"records": records})
+    assert response.status_code == 200, response.text
+    return [item["risk_score"] for item in response.json()["items"]]
+
+
+def test_schema_lists_required_features_and_defaults(http):
+    schema = http.get("/predict/schema").json()
+    assert set(schema["required"]) == {"attendance", "study_hours", "assignments_submitted"}
+    assert schema["properties"]["internal_marks"]["default"] is None
+    assert schema["properties"]["activities"]["default"] == "low"
+    assert "assignments_completed" in schema["properties"]["assignments_submitted"]["aliases"]
+
+
+def test_missing_internal_marks_is_sent_as_missing_not_zero(http):
+    omitted = _risk(http, BASE)
+    assert _risk(http, {**BASE, "internal_marks": None}) == omitted
+    # Single and batch routes treat an omitted mark the same way
+    assert _batch_risks(http, [BASE, {**BASE, "internal_marks": None}]) == [omitted, omitted]
+    # 0 is a real (failing) mark, not a stand-in for a missing one
+    assert _risk(http, {**BASE, "internal_marks": 0}) != omitted
+
+
+def test_activities_defaults_to_low(http):
+    without = {key: value for key, value in BASE.items() if key != "activities"}
+    assert _risk(http, without) == _risk(http, {**BASE, "activities": "low"})
+
+
+def test_alias_numeric_strings_and_unknown_keys(http):
+    expected = _risk(http, BASE)
+    renamed = {key: value for key, value in BASE.items() if key != "assignments_submitted"}
+    assert _risk(http, {**renamed, "assignments_completed": 10}) == expected
+    assert _risk(http, {**BASE, "attendance": "85", "notes": "ignored"}) == expected
+
+
+@pytest.mark.parametrize("features, field", [
+    ({**BASE, "attendance": 130}, "attendance"),
+    ({**BASE, "study_hours": -1}, "study_hours"),
+    ({**BASE, "activities": "sports"}, "activities"),
+    ({**BASE, "internal_marks": "n/a"}, "internal_marks"),
+    ({key: value for key, value in BASE.items() if key != "study_hours"}, "study_hours"),
+])
+def test_invalid_single_record_is_rejected(http, features, field):
+    response = http.post("/predict/single", json={"features": features})
+    assert response.status_code == 422
+    detail = response.json()["detail"]
+    assert (detail["invalid_rows"], detail["total_rows"]) == (1, 1)
+    assert field in detail["errors"][0]["errors"]
+
+
+def test_invalid_batch_record_rejects_the_whole_batch(http):
+    records = [BASE, {**BASE, "attendance": 130}, BASE, {**BASE, "activities": "sports"}]
+    response = http.post("/predict/batch", json={"records": records})
+    assert response.status_code == 422
+    detail = response.json()["detail"]
+    assert (detail["invalid_rows"], detail["total_rows"]) == (2, 4)
+    assert [report["index"] for report in detail["errors"]] == [1, 3]
+    assert list(detail["errors"][0]["errors"]) == ["attendance"]
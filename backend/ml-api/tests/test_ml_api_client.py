@@ -0,0 +1,177 @@
+"""
+Integration tests of ml_api_client against the ML API running in-process.
+
+The sync client talks to the app through fastapi.testclient.TestClient and
+the async client through httpx.ASGITransport, both via the http_client hook.
+_Faults wraps the app to delay or reject chosen /predict/batch chunks; the
+chunk index comes from the client's batch-<id>-<index> correlation id.
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import ml_api_client.client as client_module
+from main import create_app
+from ml_api_client import AsyncMLApiClient, MLApiClient, MLApiError
+
+
+class _Faults:
+    """ASGI wrapper: answers 429 to the first `reject` posts of each chunk and delays chosen chunks."""
+
+    def __init__(self, app, reject=0, retry_after="0.01", delays=None):
+        self.app = app
+        self.reject = reject
+        self.retry_after = retry_after
+        self.delays = delays or {}
+        self.attempts = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] != "/predict/batch":
+            return await self.app(scope, receive, send)
+        headers = dict(scope["headers"])
+        chunk = int(headers.get(b"x-correlation-id", b"batch-x-0").decode().rsplit("-", 1)[1])
+        self.attempts[chunk] = self.attempts.get(chunk, 0) + 1
+        if self.attempts[chunk] <= self.reject:
+            body = json.dumps({"detail": "Server busy"}).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [(b"content-type", b"application/json"), (b"retry-after", self.retry_after.encode())],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+        await asyncio.sleep(self.delays.get(chunk, 0))
+        await self.app(scope, receive, send)
+
+
+def _records(n):
+    return [
+        {"attendance": 50 + i, "study_hours": 10 + i % 7, "assignments_submitted": i % 11, "activities": "low"}
+        for i in range(n)
+    ]
+
+
+@pytest.fixture(scope="module")
+def app():
+    return create_app("production")
+
+
+@pytest.fixture
+def recorded_delays(monkeypatch):
+    delays = []
+    real = client_module._retry_delay
+
+    def record(*args):
+        delay = real(*args)
+        delays.append(delay)
+        return delay
+
+    monkeypatch.setattr(client_module, "_retry_delay", record)
+    return delays
+
+
+def _attendance(items):
+    return [item["input_features"]["attendance"] for item in items]
+
+
+def test_sync_chunks_reassembled_in_input_order(app):
+    # The first chunk answers last
+    faults = _Faults(app, delays={0: 0.3, 1: 0.1})
+    records = _records(10)
+    with TestClient(faults) as http:
+        client = MLApiClient(http_client=http, chunk_size=3, max_in_flight=4)
+        items = client.predict_batch(records)
+    assert _attendance(items) == [r["attendance"] for r in records]
+    assert sorted(faults.attempts) == [0, 1, 2, 3]
+
+
+def test_sync_retries_429_after_retry_after(app, recorded_delays):
+    faults = _Faults(app, reject=2, retry_after="0.05")
+    with TestClient(faults) as http:
+        client = MLApiClient(http_client=http, chunk_size=5, max_retries=3)
+        items = client.predict_batch(_records(5))
+    assert len(items) == 5
+    assert faults.attempts == {0: 3}
+    assert recorded_delays == [0.05, 0.05]
+
+
+def test_sync_raises_when_retries_are_exhausted(app, recorded_delays):
+    faults = _Faults(app, reject=10)
+    with TestClient(faults) as http:
+        client = MLApiClient(http_client=http, max_retries=2)
+        with pytest.raises(MLApiError) as error:
+            client.predict_batch(_records(3))
+    assert error.value.status_code == 429
+    assert error.value.detail == "Server busy"
+    assert faults.attempts == {0: 3}
+    assert len(recorded_delays) == 2
+
+
+def test_sync_empty_batch_sends_nothing(app):
+    faults = _Faults(app)
+    with TestClient(faults) as http:
+        assert MLApiClient(http_client=http).predict_batch([]) == []
+    assert faults.attempts == {}
+
+
+def _run_async(app, faults, scenario):
+    """Run scenario(client) on the event loop of a started app, over ASGITransport."""
+
+    async def run():
+        transport = httpx.ASGITransport(app=faults)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as http:
+            return await scenario(http)
+
+    # TestClient runs the lifespan (model load) and gives us its event loop
+    with TestClient(app) as started:
+        return started.portal.call(run)
+
+
+def test_async_chunks_reassembled_in_input_order(app):
+    faults = _Faults(app, delays={0: 0.3, 1: 0.1})
+    records = _records(10)
+
+    async def scenario(http):
+        return await AsyncMLApiClient(http_client=http, chunk_size=3, max_in_flight=4).predict_batch(records)
+
+    items = _run_async(app, faults, scenario)
+    assert _attendance(items) == [r["attendance"] for r in records]
+
+
+def test_async_retries_429_after_retry_after(app, recorded_delays):
+    faults = _Faults(app, reject=1, retry_after="0.05")
+
+    async def scenario(http):
+        return await AsyncMLApiClient(http_client=http, chunk_size=2, max_retries=3).predict_batch(_records(4))
+
+    items = _run_async(app, faults, scenario)
+    assert len(items) == 4
+    assert faults.attempts == {0: 2, 1: 2}
+    assert recorded_delays == [0.05, 0.05]
+
+
+def test_async_raises_when_retries_are_exhausted(app, recorded_delays):
+    faults = _Faults(app, reject=10)
+
+    async def scenario(http):
+        with pytest.raises(MLApiError) as error:
+            await AsyncMLApiClient(http_client=http, max_retries=2).predict_batch(_records(3))
+        return error.value
+
+    error = _run_async(app, faults, scenario)
+    assert error.status_code == 429
+    assert faults.attempts == {0: 3}
+
+
+def test_async_empty_batch_sends_nothing(app):
+    faults = _Faults(app)
+
+    async def scenario(http):
+        return await AsyncMLApiClient(http_client=http).predict_batch([])
+
+    assert _run_async(app, faults, scenario) == []
+    assert faults.attempts == {}
@@ -0,0 +1,94 @@
+"""
+Result store behind /predict/batch: rows already scored for the serving model
+are answered from SQLite, and a model change or the retention policy removes them.
+
+_predict_columns is wrapped to record how many rows actually reach the model.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.services.predictor as predictor
+import app.services.result_store as result_store
+from main import create_app
+
+
+def _records(n, start=0):
+    return [
+        {"attendance": 40 + i, "study_hours": 5 + i % 9, "assignments_submitted": i % 11, "activities": "medium"}
+        for i in range(start, start + n)
+    ]
+
+
+@pytest.fixture(scope="module")
+def app():
+    return create_app("production")
+
+
+@pytest.fixture
+def store_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "results.db")
+    monkeypatch.setattr(result_store, "RESULT_STORE_PATH", path)
+    result_store.get_result_store.cache_clear()
+    yield path
+    result_store.get_result_store.cache_clear()
+
+
+@pytest.fixture
+def scored_rows(monkeypatch):
+    rows = []
+    real = predictor._predict_columns
+
+    def record(model, columns, *args, **kwargs):
+        rows.append(len(next(iter(columns.values()))))
+        return real(model, columns, *args, **kwargs)
+
+    monkeypatch.setattr(predictor, "_predict_columns", record)
+    return rows
+
+
+def _scores(response):
+    assert response.status_code == 200, response.text
+    return [item["risk_score"] for item in response.json()["items"]]
+
+
+def test_repeated_rows_are_answered_from_the_store(app, store_path, scored_rows):
+    with TestClient(app) as http:
+        scored_rows.clear()
+        first = _scores(http.post("/predict/batch", json={"records": _records(5)}))
+        again = _scores(http.post("/predict/batch", json={"records": _records(5)}))
+        # Two stored rows and three new ones: only the misses are scored
+        mixed = _scores(http.post("/predict/batch", json={"records": _records(5, start=3)}))
+    assert scored_rows == [5, 3]
+    assert again == first
+    assert mixed[:2] == first[3:]
+
+
+def test_a_replaced_model_invalidates_its_results(app, store_path, scored_rows):
+    with TestClient(app) as http:
+        scored_rows.clear()
+        first = _scores(http.post("/predict/batch", json={"records": _records(4)}))
+        # What the first worker to start with a retrained artifact does
+        assert result_store.get_result_store().set_current_model("retrained-model") == 4
+        again = _scores(http.post("/predict/batch", json={"records": _records(4)}))
+    assert scored_rows == [4, 4]
+    assert again == first
+
+
+def test_results_are_scoped_to_the_model_hash(tmp_path):
+    store = result_store.ResultStore(str(tmp_path / "results.db"))
+    store.put_many("model-a", {"key": (0.25, 1)})
+    assert store.get_many("model-a", ["key"]) == {"key": (0.25, 1)}
+    assert store.get_many("model-b", ["key"]) == {}
+
+
+def test_prune_drops_expired_then_oldest_rows(tmp_path, monkeypatch):
+    store = result_store.ResultStore(str(tmp_path / "results.db"), max_rows=1, ttl_seconds=250)
+    clock = [1000.0]
+    monkeypatch.setattr(result_store.time, "time", lambda: clock[0])
+    for key in ("a", "b", "c", "d"):
+        store.put_many("model", {key: (0.5, 1)})
+        clock[0] += 100
+    # At 1400: a (1000) and b (1100) are past the TTL, c (1200) is beyond the cap
+    assert store.prune() == {"results": 3, "student_scores": 0}
+    assert list(store.get_many("model", ["a", "b", "c", "d"])) == ["d"]
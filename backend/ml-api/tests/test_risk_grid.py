@@ -0,0 +1,92 @@
+"""
+Serving gate of the precomputed risk grid: single predictions are answered
+from the grid only if its sampled p99 error and risk-category agreement are
+within GRID_MAX_ERROR and GRID_MIN_CATEGORY_AGREEMENT.
+
+The grid is built at startup (TestClient runs the lifespan) with the settings
+patched into app.services.risk_grid.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.services.risk_grid as risk_grid
+from main import create_app
+
+RECORDS = [
+    {"attendance": 95, "study_hours": 30, "assignments_submitted": 10, "internal_marks": 85, "activities": "high"},
+    {"attendance": 20, "study_hours": 1, "assignments_submitted": 0, "internal_marks": 10, "activities": "low"},
+    {"attendance": 90, "study_hours": 25, "assignments_submitted": 9, "activities": "medium"},
+]
+
+
+@pytest.fixture(scope="module")
+def app():
+    return create_app("production")
+
+
+@pytest.fixture
+def grid_mode(monkeypatch):
+    monkeypatch.setattr(risk_grid, "GRID_MODE_ENABLED", True)
+    risk_grid._grids.clear()
+    yield monkeypatch
+    risk_grid._grids.clear()
+
+
+def _grid(http):
+    grid = http.get("/monitoring/grid").json()
+    if not grid["enabled"]:
+        pytest.skip("the grid needs a trained model.pkl")
+    return grid
+
+
+def _single(http, features, exact=False):
+    response = http.post("/predict/single", json={"features": features, "exact": exact})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_shipped_budget_is_met_and_the_grid_answers(app, grid_mode):
+    with TestClient(app) as http:
+        grid = _grid(http)
+        answers = [(_single(http, record), _single(http, record, exact=True)) for record in RECORDS]
+
+    error = grid["error"]
+    assert grid["serving"] is True
+    assert error["estimate"] == "sample"
+    assert error["p99_abs_error"] <= grid["p99_error_allowed"]
+    assert error["answered_risk_category_agreement"] >= grid["min_category_agreement"]
+
+    from_grid = [(approx, exact) for approx, exact in answers if approx["scored_by"] == "grid"]
+    assert from_grid
+    for approx, exact in from_grid:
+        assert approx["error_estimate"] == error["p99_abs_error"]
+        assert approx["risk_category"] == exact["risk_category"]
+        assert exact["scored_by"] == "model"
+        assert exact["error_estimate"] is None
+
+
+def test_grid_over_the_error_budget_does_not_answer(app, grid_mode):
+    # 8 points per feature interpolate far worse than the p99 budget allows
+    grid_mode.setattr(risk_grid, "GRID_POINTS_PER_FEATURE", 8)
+    grid_mode.setattr(risk_grid, "GRID_VALIDATION_POINTS", 2000)
+    with TestClient(app) as http:
+        grid = _grid(http)
+        answers = [_single(http, record) for record in RECORDS]
+
+    assert grid["error"]["p99_abs_error"] > grid["p99_error_allowed"]
+    assert grid["serving"] is False
+    assert {answer["scored_by"] for answer in answers} == {"model"}
+    assert {answer["error_estimate"] for answer in answers} == {None}
+
+
+@pytest.mark.parametrize("min_agreement, serving", [(0.0, True), (1.01, False)])
+def test_category_agreement_gate(app, grid_mode, min_agreement, serving):
+    # Error budget out of the way; 1.01 is an agreement no grid can reach
+    grid_mode.setattr(risk_grid, "GRID_POINTS_PER_FEATURE", 8)
+    grid_mode.setattr(risk_grid, "GRID_VALIDATION_POINTS", 2000)
+    grid_mode.setattr(risk_grid, "GRID_MAX_ERROR", 1.0)
+    grid_mode.setattr(risk_grid, "GRID_MIN_CATEGORY_AGREEMENT", min_agreement)
+    with TestClient(app) as http:
+        grid = _grid(http)
+    assert grid["serving"] is serving
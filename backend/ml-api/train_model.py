@@ -4,11 +4,18 @@ Random Forest Model Training Script
 
 Trains an ML model using MULTIPLE datasets merged together.
 
+The model and its metadata are written to the current directory, where the
+API loads them, or to TRAIN_OUTPUT_DIR when set. Write retrained candidates
+to their own directory so verify_model.py can compare them with the
+deployed model before they replace it.
+
 Usage:
     python train_model.py
+    TRAIN_OUTPUT_DIR=candidate python train_model.py
 """
 
 import pandas as pd
+import numpy as np
 import joblib
 import os
 
@@ -19,6 +26,8 @@ from sklearn.pipeline import Pipeline
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, classification_report
 
+OUTPUT_DIR = os.getenv("TRAIN_OUTPUT_DIR", ".")
+
 # -----------------------------------------------------------
 # 1. LOAD & MERGE DATASETS
 # -----------------------------------------------------------
@@ -177,11 +186,87 @@ if hasattr(clf, "feature_importances_"):
         print(f"  {name}: {imp:.4f}")
 
 # -----------------------------------------------------------
-# 9. SAVE MODEL
+# 9. REFERENCE SKETCHES (used by the drift monitor)
 # -----------------------------------------------------------
-print("\nSaving model to model.pkl...")
-joblib.dump(pipeline, "model.pkl")
-print("Saved model.pkl successfully!")
+print("\nBuilding reference feature sketches...")
+
+REFERENCE_BINS = 10
+REFERENCE_QUANTILES = [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99]
+
+reference = {"n_rows": int(X_train.shape[0]), "features": {}}
+
+for col in numeric_features:
+    values = pd.to_numeric(X_train[col], errors="coerce").to_numpy(dtype=float)
+    present = values[~np.isnan(values)]
+    # Quantile-based bins give every bin similar reference mass, which keeps PSI stable
+    edges = np.unique(np.quantile(present, np.linspace(0, 1, REFERENCE_BINS + 1)))
+    bin_index = np.searchsorted(edges[1:-1], present, side="right")
+    counts = np.bincount(bin_index, minlength=len(edges) - 1)
+    reference["features"][col] = {
+        "type": "numeric",
+        "bin_edges": [float(e) for e in edges],
+        "bin_proportions": [float(c) for c in counts / max(len(present), 1)],
+        "quantiles": {str(q): float(v) for q, v in zip(REFERENCE_QUANTILES, np.quantile(present, REFERENCE_QUANTILES))},
+        "mean": float(present.mean()),
+        "std": float(present.std()),
+        "min": float(present.min()),
+        "max": float(present.max()),
+        "missing_rate": float(1 - len(present) / max(len(values), 1)),
+    }
+
+for col in categorical_features:
+    frequencies = X_train[col].astype(str).str.strip().str.lower().value_counts(normalize=True)
+    reference["features"][col] = {
+        "type": "categorical",
+        "frequencies": {str(k): float(v) for k, v in frequencies.items()},
+    }
+
+for name, sketch in reference["features"].items():
+    if sketch["type"] == "numeric":
+        print(f"  {name}: {len(sketch['bin_proportions'])} bins, median={sketch['quantiles']['0.5']:.2f}")
+    else:
+        print(f"  {name}: {sketch['frequencies']}")
+
+# -----------------------------------------------------------
+# 10. FEATURE SCHEMA (validated by the API before inference)
+# -----------------------------------------------------------
+# Valid input ranges; (low, high) with None for an open end
+FEATURE_BOUNDS = {
+    "attendance": (0, 100),
+    "study_hours": (0, 168),
+    "internal_marks": (0, 100),
+    "assignments_submitted": (0, None),
+}
+# Features a request may omit, and the value used then (None = missing; the forest handles NaN)
+OPTIONAL_FEATURES = {"internal_marks": None, "activities": "low"}
+# Other names accepted for a feature in requests
+FEATURE_ALIASES = {"assignments_submitted": ["assignments_completed"]}
+
+print("\nBuilding feature schema...")
+feature_schema = {}
+for col in numeric_features:
+    low, high = FEATURE_BOUNDS.get(col, (None, None))
+    feature_schema[col] = {"type": "number", "minimum": low, "maximum": high}
+
+cat_categories = pipeline.named_steps['prep'].named_transformers_['cat'].categories_
+for col, categories in zip(categorical_features, cat_categories):
+    feature_schema[col] = {"type": "category", "categories": [str(c) for c in categories]}
+
+for col, spec in feature_schema.items():
+    spec["required"] = col not in OPTIONAL_FEATURES
+    if not spec["required"]:
+        spec["default"] = OPTIONAL_FEATURES[col]
+    spec["aliases"] = FEATURE_ALIASES.get(col, [])
+    print(f"  {col}: {spec}")
+
+# -----------------------------------------------------------
+# 11. SAVE MODEL
+# -----------------------------------------------------------
+os.makedirs(OUTPUT_DIR, exist_ok=True)
+model_path = os.path.join(OUTPUT_DIR, "model.pkl")
+print(f"\nSaving model to {model_path}...")
+joblib.dump(pipeline, model_path)
+print(f"Saved {model_path} successfully!")
 
 # Save metadata
 model_info = {
@@ -190,12 +275,22 @@ model_info = {
         "numeric": numeric_features,
         "categorical": categorical_features
     },
-    "accuracy": float(accuracy)
+    "schema": feature_schema,
+    "accuracy": float(accuracy),
+    "reference": reference
 }
 
 import json
-with open("model_info.json", "w") as f:
+info_path = os.path.join(OUTPUT_DIR, "model_info.json")
+with open(info_path, "w") as f:
     json.dump(model_info, f, indent=2)
 
-print("Saved model_info.json")
+print(f"Saved {info_path}")
+
+# Held-out rows (never seen in training) used by the API's model report
+holdout = X_test.copy()
+holdout["performance"] = y_test.map({0: "Fail", 1: "Pass"})
+holdout_path = os.path.join(OUTPUT_DIR, "model_holdout.csv")
+holdout.to_csv(holdout_path, index=False)
+print(f"Saved {holdout_path} ({len(holdout)} held-out rows)")
 print("\n🎉 Training complete!")
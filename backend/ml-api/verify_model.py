@@ -1,210 +1,330 @@
 """
-Model Verification Script
-========================
-This script verifies that the trained model is working correctly
-and diagnoses any issues with predictions.
+Model Acceptance Gate
+=====================
+
+Decides whether a trained model.pkl may be deployed. The candidate model is
+measured on this host:
+
+- held-out accuracy on the model_holdout.csv train_model.py wrote next to it;
+- single-row latency (p50/p99) and batch throughput, through the same
+  validation and columnar inference code as /predict (app.services.predictor);
+- load time (median of --load-runs joblib loads) and artifact size.
+
+Each metric is checked against an absolute budget and, when a currently
+deployed model is found, against the same measurement of that model on the
+same host. A candidate that is more than --tolerance slower, larger or
+slower to load than the deployed model, or whose accuracy drops by more than
+--max-accuracy-drop, is rejected just like one over a budget.
+
+The deployed model is the registry's MODEL_DEFAULT_VERSION when
+MODEL_REGISTRY_DIR is set, otherwise MODEL_PATH. The candidate must be a
+different file (train it with TRAIN_OUTPUT_DIR=candidate); checking the
+deployed model against itself is rejected. Latency and throughput of both
+models use the candidate's holdout rows. Accuracy is not: those rows may
+have been in the deployed model's training set, so the deployed model is
+scored on its own holdout (next to its artifact, or --deployed-holdout),
+and without one the accuracy comparison is skipped.
+
+The report is printed (or written with --report) as JSON; any failed check
+makes the exit code 1.
+
+Usage:
+    TRAIN_OUTPUT_DIR=candidate python train_model.py && python verify_model.py
+    python verify_model.py --candidate retrained/model.pkl --report gate.json
+    python verify_model.py --max-p99-ms 25 --min-throughput 20000 --json
 """
 
-import pandas as pd
-import joblib
+import argparse
+import json
 import os
-from app.core.model_loader import get_model, DummyModel
-
-print("=" * 60)
-print("MODEL VERIFICATION SCRIPT")
-print("=" * 60)
-
-# 1. Check if model exists
-print("\n1. Checking model file...")
-model_path = "model.pkl"
-if not os.path.exists(model_path):
-    print(f"[ERROR] Model file not found at {model_path}")
-    print("   Please run train_model.py first!")
-    exit(1)
-else:
-    file_info = os.stat(model_path)
-    print(f"[OK] Model file exists ({file_info.st_size} bytes)")
-
-# 2. Load model
-print("\n2. Loading model...")
-try:
-    model = get_model()
-    is_dummy = isinstance(model, DummyModel)
-    if is_dummy:
-        print("[WARNING] Using dummy model!")
-        print("   The trained model was not found. Please run train_model.py")
-        exit(1)
-    else:
-        print("[OK] Trained model loaded successfully")
-except Exception as e:
-    print(f"❌ Error loading model: {e}")
-    exit(1)
-
-# 3. Check model structure
-print("\n3. Checking model structure...")
-try:
-    preprocessor = model.named_steps['prep']
-    classifier = model.named_steps['clf']
-    
-    # Get feature names
-    numeric_features = list(preprocessor.named_transformers_['num'].feature_names_in_)
-    cat_transformer = preprocessor.named_transformers_['cat']
-    if hasattr(cat_transformer, 'categories_'):
-        cat_categories = list(cat_transformer.categories_[0]) if len(cat_transformer.categories_) > 0 else []
-    else:
-        cat_categories = []
-    
-    print(f"[OK] Numeric features: {numeric_features}")
-    print(f"[OK] Categorical categories: {cat_categories}")
-    
-    # Check class order
-    if hasattr(classifier, 'classes_'):
-        class_order = list(classifier.classes_)
-        print(f"[OK] Class order: {class_order} (0=Fail, 1=Pass)")
-    else:
-        print("[WARNING] Could not determine class order")
-        class_order = [0, 1]
-    
-except Exception as e:
-    print(f"❌ Error checking model structure: {e}")
-    import traceback
-    traceback.print_exc()
-    exit(1)
-
-# 4. Check training data
-print("\n4. Checking training data...")
-dataset_path = "student_performance_balanced.xlsx"
-if not os.path.exists(dataset_path):
-    print(f"⚠️  Dataset not found at {dataset_path}")
-    print("   Cannot verify training data distribution")
-else:
-    try:
-        df = pd.read_excel(dataset_path)
-        print(f"[OK] Dataset loaded: {df.shape[0]} rows, {df.shape[1]} columns")
-        
-        # Check target distribution
-        if 'performance' in df.columns:
-            perf_dist = df['performance'].value_counts()
-            print(f"[OK] Performance distribution:")
-            for label, count in perf_dist.items():
-                pct = (count / len(df)) * 100
-                print(f"   {label}: {count} ({pct:.1f}%)")
-            
-            # Check for very low performance examples
-            if 'attendance' in df.columns:
-                low_attendance = df[df['attendance'] < 20]
-                print(f"\n[OK] Students with <20% attendance: {len(low_attendance)}")
-                if len(low_attendance) > 0:
-                    low_attendance_perf = low_attendance['performance'].value_counts()
-                    print(f"   Performance distribution for low attendance:")
-                    for label, count in low_attendance_perf.items():
-                        print(f"   {label}: {count}")
-        else:
-            print("[WARNING] 'performance' column not found in dataset")
-    except Exception as e:
-        print(f"⚠️  Error reading dataset: {e}")
-
-# 5. Test predictions with extreme cases
-print("\n5. Testing predictions with extreme cases...")
-test_cases = [
-    {
-        "name": "Very Low Performance",
-        "features": {
-            "attendance": 5,
-            "study_hours": 5,
-            "assignments_submitted": 2,
-            "internal_marks": 30,
-            "activities": "low"
-        },
-        "expected": "Fail with high risk (>70%)"
-    },
-    {
-        "name": "Very High Performance",
-        "features": {
-            "attendance": 95,
-            "study_hours": 35,
-            "assignments_submitted": 15,
-            "internal_marks": 90,
-            "activities": "high"
-        },
-        "expected": "Pass with low risk (<30%)"
-    },
-    {
-        "name": "Medium Performance",
-        "features": {
-            "attendance": 75,
-            "study_hours": 20,
-            "assignments_submitted": 8,
-            "internal_marks": 70,
-            "activities": "medium"
-        },
-        "expected": "Pass with moderate risk (30-70%)"
-    },
-    {
-        "name": "Your Problem Case",
-        "features": {
-            "attendance": 7,
-            "study_hours": 9,
-            "assignments_submitted": 4,
-            "internal_marks": 67,
-            "activities": "high"
+import platform
+import statistics
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+
+from app.core.config import (
+    MODEL_DEFAULT_VERSION,
+    MODEL_HOLDOUT_PATH,
+    MODEL_INFO_PATH,
+    MODEL_PATH,
+    MODEL_REGISTRY_DIR,
+)
+from app.services.feature_schema import get_feature_schema
+from app.services.inference import inference_backend
+from app.services.predictor import _predict_columns
+
+LABEL = "performance"
+
+# Absolute budgets; every one can be overridden on the command line
+DEFAULT_MIN_ACCURACY = 0.85
+DEFAULT_MAX_P99_MS = 100.0
+DEFAULT_MIN_THROUGHPUT = 5000.0  # rows/s
+DEFAULT_MAX_LOAD_SECONDS = 5.0
+DEFAULT_MAX_SIZE_MB = 100.0
+# Relative change against the deployed model that counts as a regression
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_MAX_ACCURACY_DROP = 0.01
+
+
+def deployed_model_path() -> str:
+    """Artifact the API serves by default (registry default version or MODEL_PATH)."""
+    if MODEL_REGISTRY_DIR and MODEL_DEFAULT_VERSION:
+        return os.path.join(MODEL_REGISTRY_DIR, MODEL_DEFAULT_VERSION, "model.pkl")
+    return MODEL_PATH
+
+
+def deployed_holdout_path(deployed_path: str) -> str:
+    """The deployed model's own held-out rows: next to its artifact, else MODEL_HOLDOUT_PATH for MODEL_PATH."""
+    path = os.path.join(os.path.dirname(os.path.abspath(deployed_path)), "model_holdout.csv")
+    if not os.path.exists(path) and os.path.abspath(deployed_path) == os.path.abspath(MODEL_PATH):
+        return MODEL_HOLDOUT_PATH
+    return path
+
+
+def info_path_for(artifact_path: str) -> str:
+    """model_info.json next to an artifact, else MODEL_INFO_PATH."""
+    path = os.path.join(os.path.dirname(os.path.abspath(artifact_path)), "model_info.json")
+    return path if os.path.exists(path) else MODEL_INFO_PATH
+
+
+def load_holdout(path: str, info_path: str):
+    """Validated holdout features and their labels (1 = Pass); invalid rows are dropped."""
+    if not os.path.exists(path):
+        raise SystemExit(f"Holdout file {path} not found. Run python train_model.py (it writes model_holdout.csv).")
+    df = pd.read_csv(path)
+    if LABEL not in df.columns:
+        raise SystemExit(f"{path} has no '{LABEL}' column")
+    features = get_feature_schema(info_path).validate(df.drop(columns=[LABEL]).to_dict("records"))
+    valid = np.setdiff1d(np.arange(features.n_rows), list(features.errors))
+    if not len(valid):
+        raise SystemExit(f"No row of {path} passes feature validation")
+    labels = (df[LABEL].astype(str).str.strip().str.lower() == "pass").to_numpy(dtype=np.int64)
+    return features.take(valid), labels[valid], len(features.errors)
+
+
+def measure(path: str, holdout, args, accuracy_holdout=None) -> dict:
+    """
+    Size, load time, accuracy, single-row latency and batch throughput of one artifact.
+
+    Latency and throughput are measured on `holdout`; accuracy on
+    `accuracy_holdout` (validated features, labels) and None without one.
+    """
+    result = {"path": os.path.abspath(path), "size_mb": round(os.path.getsize(path) / (1024 * 1024), 3)}
+
+    load_seconds = []
+    for _ in range(max(1, args.load_runs)):
+        start = time.perf_counter()
+        model = joblib.load(path)
+        load_seconds.append(time.perf_counter() - start)
+    result["load_seconds"] = round(statistics.median(load_seconds), 4)
+
+    backend = inference_backend(model)
+    missing = [name for name in backend.features if name not in holdout.columns]
+    if missing:
+        raise ValueError(f"model reads features the schema does not provide: {missing}")
+
+    result["accuracy"] = None
+    if accuracy_holdout is not None:
+        features, labels = accuracy_holdout
+        _, classes = _predict_columns(model, features.columns)
+        result["accuracy"] = round(float(np.mean(classes == labels)), 4)
+        result["accuracy_rows"] = int(features.n_rows)
+    result["holdout_rows"] = int(holdout.n_rows)
+
+    # Single rows cycle through the holdout, as interactive requests would
+    rows = [holdout.take([i % holdout.n_rows]).columns for i in range(args.single_runs + args.warmup_runs)]
+    latencies = []
+    for i, columns in enumerate(rows):
+        start = time.perf_counter()
+        _predict_columns(model, columns)
+        if i >= args.warmup_runs:
+            latencies.append(time.perf_counter() - start)
+    latencies_ms = np.array(latencies) * 1000
+    result["single_p50_ms"] = round(float(np.percentile(latencies_ms, 50)), 3)
+    result["single_p99_ms"] = round(float(np.percentile(latencies_ms, 99)), 3)
+
+    batch = holdout.take(np.arange(args.batch_size) % holdout.n_rows).columns
+    batch_seconds = []
+    for _ in range(max(1, args.batch_runs)):
+        start = time.perf_counter()
+        _predict_columns(model, batch)
+        batch_seconds.append(time.perf_counter() - start)
+    result["batch_rows_per_second"] = round(args.batch_size / statistics.median(batch_seconds), 1)
+    return result
+
+
+def _check(name: str, value, limit, passed: bool, against: str) -> dict:
+    return {"check": name, "against": against, "value": value, "limit": limit, "passed": bool(passed)}
+
+
+def check_budgets(candidate: dict, args) -> list:
+    return [
+        _check("accuracy", candidate["accuracy"], args.min_accuracy,
+               candidate["accuracy"] >= args.min_accuracy, "budget"),
+        _check("single_p99_ms", candidate["single_p99_ms"], args.max_p99_ms,
+               candidate["single_p99_ms"] <= args.max_p99_ms, "budget"),
+        _check("batch_rows_per_second", candidate["batch_rows_per_second"], args.min_throughput,
+               candidate["batch_rows_per_second"] >= args.min_throughput, "budget"),
+        _check("load_seconds", candidate["load_seconds"], args.max_load_seconds,
+               candidate["load_seconds"] <= args.max_load_seconds, "budget"),
+        _check("size_mb", candidate["size_mb"], args.max_size_mb,
+               candidate["size_mb"] <= args.max_size_mb, "budget"),
+    ]
+
+
+def check_baseline(candidate: dict, deployed: dict, args) -> list:
+    """The candidate may be at most --tolerance worse than the deployed model on each metric."""
+    checks = []
+    # Each accuracy is measured on that model's own holdout (see the module docstring)
+    if deployed["accuracy"] is not None:
+        limit = round(deployed["accuracy"] - args.max_accuracy_drop, 4)
+        checks.append(_check("accuracy", candidate["accuracy"], limit, candidate["accuracy"] >= limit, "deployed"))
+    for metric in ("single_p99_ms", "load_seconds", "size_mb"):
+        limit = round(deployed[metric] * (1 + args.tolerance), 4)
+        checks.append(_check(metric, candidate[metric], limit, candidate[metric] <= limit, "deployed"))
+    limit = round(deployed["batch_rows_per_second"] * (1 - args.tolerance), 1)
+    checks.append(_check(
+        "batch_rows_per_second", candidate["batch_rows_per_second"], limit,
+        candidate["batch_rows_per_second"] >= limit, "deployed",
+    ))
+    return checks
+
+
+def print_report(report: dict) -> None:
+    models = [("candidate", report["candidate"])]
+    if report["deployed"]:
+        models.append(("deployed", report["deployed"]))
+    print(f"{'model':<11}{'acc':>8}{'p50 ms':>9}{'p99 ms':>9}{'rows/s':>11}{'load s':>9}{'MB':>9}")
+    for name, m in models:
+        accuracy = "n/a" if m["accuracy"] is None else f"{m['accuracy']:.4f}"
+        print(
+            f"{name:<11}{accuracy:>8}{m['single_p50_ms']:>9.2f}{m['single_p99_ms']:>9.2f}"
+            f"{m['batch_rows_per_second']:>11,.0f}{m['load_seconds']:>9.3f}{m['size_mb']:>9.2f}"
+        )
+    print(f"holdout: {report['candidate']['holdout_rows']} rows ({report['holdout_invalid_rows']} invalid, skipped)")
+    if report["deployed_skipped"]:
+        print(f"deployed model not compared: {report['deployed_skipped']}")
+    elif report["deployed_accuracy_skipped"]:
+        print(f"deployed accuracy not compared: {report['deployed_accuracy_skipped']}")
+    for check in report["checks"]:
+        status = "ok" if check["passed"] else "FAIL"
+        print(f"  [{status:>4}] {check['check']} vs {check['against']}: {check['value']} (limit {check['limit']})")
+    for error in report["errors"]:
+        print(f"[ERROR] {error}")
+    print("ACCEPTED" if report["passed"] else "REJECTED")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accept or reject a trained model against latency, size and accuracy budgets")
+    parser.add_argument("--candidate", default=os.path.join("candidate", "model.pkl"),
+                        help="Model to check (TRAIN_OUTPUT_DIR=candidate python train_model.py writes it)")
+    parser.add_argument("--deployed", default=None,
+                        help="Currently deployed model to compare with (default: the API's default model)")
+    parser.add_argument("--no-deployed", action="store_true", help="Only check the absolute budgets")
+    parser.add_argument("--holdout", default=None,
+                        help="Candidate's held-out rows (default: model_holdout.csv next to the candidate)")
+    parser.add_argument("--deployed-holdout", default=None,
+                        help="Deployed model's held-out rows, for its accuracy (default: next to the deployed model)")
+    parser.add_argument("--model-info", default=None,
+                        help="model_info.json with the feature schema (default: next to the candidate)")
+    parser.add_argument("--min-accuracy", type=float, default=DEFAULT_MIN_ACCURACY)
+    parser.add_argument("--max-p99-ms", type=float, default=DEFAULT_MAX_P99_MS, help="Single-row p99 latency")
+    parser.add_argument("--min-throughput", type=float, default=DEFAULT_MIN_THROUGHPUT, help="Batch rows/s")
+    parser.add_argument("--max-load-seconds", type=float, default=DEFAULT_MAX_LOAD_SECONDS)
+    parser.add_argument("--max-size-mb", type=float, default=DEFAULT_MAX_SIZE_MB)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed relative regression against the deployed model")
+    parser.add_argument("--max-accuracy-drop", type=float, default=DEFAULT_MAX_ACCURACY_DROP)
+    parser.add_argument("--single-runs", type=int, default=1000)
+    parser.add_argument("--warmup-runs", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--batch-runs", type=int, default=5)
+    parser.add_argument("--load-runs", type=int, default=3)
+    parser.add_argument("--report", default=None, help="Also write the JSON report to this file")
+    parser.add_argument("--json", action="store_true", help="Print the JSON report instead of a table")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.candidate):
+        raise SystemExit(f"Model file not found at {args.candidate}. Run python train_model.py first.")
+    info_path = args.model_info or info_path_for(args.candidate)
+    holdout_path = args.holdout or os.path.join(os.path.dirname(os.path.abspath(args.candidate)), "model_holdout.csv")
+    holdout, labels, invalid_rows = load_holdout(holdout_path, info_path)
+
+    report = {
+        "generated_at": time.time(),
+        "environment": {
+            "python": platform.python_version(),
+            "sklearn": sklearn.__version__,
+            "cpus": os.cpu_count(),
+            "machine": platform.machine(),
         },
-        "expected": "Should predict Fail with high risk (>70%)"
+        "holdout": os.path.abspath(holdout_path),
+        "holdout_invalid_rows": invalid_rows,
+        "deployed_holdout": None,
+        "candidate": None,
+        "deployed": None,
+        "deployed_skipped": None,
+        "deployed_accuracy_skipped": None,
+        "checks": [],
+        "errors": [],
     }
-]
-
-print("\n" + "-" * 60)
-for test_case in test_cases:
     try:
-        # Create DataFrame with correct column order
-        features_df = pd.DataFrame([test_case["features"]], columns=numeric_features + ['activities'])
-        
-        # Get predictions
-        probs = model.predict_proba(features_df)[0]
-        predicted_class = model.predict(features_df)[0]
-        
-        prob_fail = float(probs[0])  # Class 0 (Fail)
-        prob_pass = float(probs[1])  # Class 1 (Pass)
-        risk_percent = prob_fail * 100
-        predicted_label = "Pass" if predicted_class == 1 else "Fail"
-        
-        # Determine if prediction is correct
-        is_correct = True
-        if test_case["name"] == "Very Low Performance":
-            is_correct = predicted_class == 0 and risk_percent > 70
-        elif test_case["name"] == "Very High Performance":
-            is_correct = predicted_class == 1 and risk_percent < 30
-        elif test_case["name"] == "Your Problem Case":
-            is_correct = predicted_class == 0 and risk_percent > 70
-        
-        status = "[OK]" if is_correct else "[FAIL]"
-        
-        print(f"\n{status} {test_case['name']}:")
-        print(f"   Features: Attendance={test_case['features']['attendance']}%, "
-              f"Study Hours={test_case['features']['study_hours']}, "
-              f"Assignments={test_case['features']['assignments_submitted']}, "
-              f"Internal Marks={test_case['features']['internal_marks']}, "
-              f"Activities={test_case['features']['activities']}")
-        print(f"   Prediction: {predicted_label}")
-        print(f"   Risk Score: {risk_percent:.2f}%")
-        print(f"   Probabilities: Fail={prob_fail:.4f}, Pass={prob_pass:.4f}")
-        print(f"   Expected: {test_case['expected']}")
-        if not is_correct:
-            print(f"   [WARNING] Prediction does not match expected behavior!")
-        
+        report["candidate"] = measure(args.candidate, holdout, args, accuracy_holdout=(holdout, labels))
     except Exception as e:
-        print(f"\n[ERROR] Error testing {test_case['name']}: {e}")
-        import traceback
-        traceback.print_exc()
+        report["errors"].append(f"candidate: {e}")
+
+    deployed_path = args.deployed or deployed_model_path()
+    if args.no_deployed:
+        report["deployed_skipped"] = "--no-deployed"
+    elif not os.path.exists(deployed_path):
+        report["deployed_skipped"] = f"{deployed_path} not found"
+    elif os.path.samefile(deployed_path, args.candidate):
+        report["deployed_skipped"] = f"{deployed_path} is the candidate"
+        report["errors"].append(
+            f"candidate {args.candidate} is the deployed model; train it with TRAIN_OUTPUT_DIR=candidate "
+            f"(or pass --no-deployed to check the budgets only)"
+        )
+    else:
+        deployed_holdout = args.deployed_holdout or deployed_holdout_path(deployed_path)
+        accuracy_holdout = None
+        try:
+            deployed_features, deployed_labels, _ = load_holdout(deployed_holdout, info_path_for(deployed_path))
+            accuracy_holdout = (deployed_features, deployed_labels)
+            report["deployed_holdout"] = os.path.abspath(deployed_holdout)
+        except SystemExit as e:
+            # load_holdout's messages for a missing or unusable file
+            report["deployed_accuracy_skipped"] = str(e)
+        try:
+            report["deployed"] = measure(deployed_path, holdout, args, accuracy_holdout=accuracy_holdout)
+        except Exception as e:
+            # An unreadable deployed model does not block replacing it
+            report["deployed_skipped"] = f"{deployed_path} could not be measured: {e}"
+
+    if report["candidate"] is not None:
+        report["checks"] = check_budgets(report["candidate"], args)
+        if report["deployed"] is not None:
+            report["checks"] += check_baseline(report["candidate"], report["deployed"], args)
+    report["passed"] = not report["errors"] and all(check["passed"] for check in report["checks"])
 
-print("\n" + "=" * 60)
-print("VERIFICATION COMPLETE")
-print("=" * 60)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    elif report["candidate"] is None:
+        for error in report["errors"]:
+            print(f"[ERROR] {error}")
+        print("REJECTED")
+    else:
+        print_report(report)
+    if not report["passed"]:
+        sys.exit(1)
 
-print("\nRECOMMENDATIONS:")
-print("1. If predictions are incorrect, the model may need retraining")
-print("2. Check that the training data has enough examples of low-performance students")
-print("3. Consider adjusting model hyperparameters in train_model.py")
-print("4. Verify that student_performance_balanced.xlsx has the correct format")
-print("\nTo retrain the model, run: python train_model.py")
 
+if __name__ == "__main__":
+    main()
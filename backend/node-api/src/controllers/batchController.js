@@ -11,10 +11,14 @@ export const listBatches = async (req, res, next) => {
       .limit(100)
       .populate('uploadedBy', 'name email');
     
-    // Calculate stats for each batch
+    // Use the summary stored at scoring time; only older batches fall back to counting predictions
     const batchesWithStats = await Promise.all(
       batches.map(async (batch) => {
-        const predictions = await Prediction.find({ batch: batch._id });
+        if (batch.totalStudents != null) {
+          return batch.toObject();
+        }
+
+        const predictions = await Prediction.find({ batch: batch._id }, 'riskCategory');
         const safeCount = predictions.filter((p) => p.riskCategory === 'Safe' || p.riskCategory === 'low').length;
         const atRiskCount = predictions.filter((p) => p.riskCategory === 'At-Risk' || p.riskCategory === 'medium').length;
         const criticalCount = predictions.filter((p) => p.riskCategory === 'Critical' || p.riskCategory === 'high').length;
@@ -10,6 +10,12 @@ const batchSchema = new mongoose.Schema(
       enum: ['pending', 'processing', 'completed', 'failed'],
       default: 'pending',
     },
+    // Aggregates returned by the ML API alongside scoring (summary: true)
+    totalStudents: Number,
+    safeCount: Number,
+    atRiskCount: Number,
+    criticalCount: Number,
+    summary: { type: Object },
   },
   { timestamps: true }
 );
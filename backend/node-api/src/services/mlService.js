@@ -1,24 +1,37 @@
 import axios from 'axios';
+import { randomUUID } from 'crypto';
 
 const baseURL = process.env.ML_API_BASE_URL || 'http://127.0.0.1:8000';
 
+// Every call carries a correlation id so a slow request can be found in the
+// ML API's trace file; the ML API echoes it back with per-stage Server-Timing.
+const tracedHeaders = (correlationId) => ({ 'X-Correlation-Id': correlationId || randomUUID() });
+
 export const mlService = {
-  singlePredict: async (payload) => {
+  singlePredict: async (payload, { correlationId } = {}) => {
+    const headers = tracedHeaders(correlationId);
     try {
-      const { data } = await axios.post(`${baseURL}/predict/single`, payload);
+      const { data } = await axios.post(`${baseURL}/predict/single`, payload, { headers });
       return data;
     } catch (error) {
-      console.error('ML API single predict error:', error.response?.data || error.message);
+      console.error('ML API single predict error:', {
+        correlationId: headers['X-Correlation-Id'],
+        response: error.response?.data || error.message,
+      });
       throw error;
     }
   },
-  batchPredict: async (payload) => {
+  batchPredict: async (payload, { correlationId } = {}) => {
+    const headers = tracedHeaders(correlationId);
     try {
       console.log('Calling ML API batch predict with', payload.records?.length || 0, 'records');
-      const { data } = await axios.post(`${baseURL}/predict/batch`, payload, {
+      const { data, headers: responseHeaders } = await axios.post(`${baseURL}/predict/batch`, payload, {
+        headers,
         timeout: 60000, // 60 second timeout for batch predictions
       });
       console.log('ML API batch predict response:', {
+        correlationId: headers['X-Correlation-Id'],
+        serverTiming: responseHeaders['server-timing'],
         hasItems: !!data.items,
         itemsLength: data.items?.length || 0,
         dataKeys: Object.keys(data || {}),
@@ -26,6 +39,7 @@ export const mlService = {
       return data;
     } catch (error) {
       console.error('ML API batch predict error:', {
+        correlationId: headers['X-Correlation-Id'],
         message: error.message,
         response: error.response?.data,
         status: error.response?.status,
@@ -40,7 +40,11 @@ export const predictionService = {
         activities: record.activities || 'low',
       }));
 
-      const mlResponse = await mlService.batchPredict({ records: featuresOnly });
+      // Ask for the aggregate summary too, so batch lists never re-aggregate raw predictions
+      const mlResponse = await mlService.batchPredict(
+        { records: featuresOnly, summary: true },
+        { correlationId: `batch-${batch._id}` }
+      );
       
       // ML API returns { items: [...] }, so extract the items array
       const mlResults = mlResponse.items || mlResponse || [];
@@ -80,7 +84,17 @@ export const predictionService = {
 
       await Prediction.insertMany(docs);
 
-      await Batch.findByIdAndUpdate(batch._id, { status: 'completed' });
+      const summary = mlResponse.summary;
+      await Batch.findByIdAndUpdate(batch._id, {
+        status: 'completed',
+        ...(summary && {
+          totalStudents: summary.total,
+          safeCount: summary.category_counts?.low ?? 0,
+          atRiskCount: summary.category_counts?.medium ?? 0,
+          criticalCount: summary.category_counts?.high ?? 0,
+          summary,
+        }),
+      });
 
       await ActivityLog.create({
         user: user._id,
@@ -1,5 +1,5 @@
 import { motion } from 'framer-motion';
-import { useState, useEffect, useCallback } from 'react';
+import { useState, useEffect, useCallback, useRef } from 'react';
 import { Card, CardContent, CardHeader, CardTitle } from './ui/card';
 import { Spotlight } from './ui/spotlight';
 import DashboardLayout from './layouts/DashboardLayout';
@@ -19,6 +19,12 @@ const WhatIfSimulator = ({ role = 'student' }) => {
 
   const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:5000/api';
   const ML_API_URL = import.meta.env.VITE_ML_API_URL || 'http://localhost:8000';
+  const ML_WS_URL = `${ML_API_URL.replace(/^http/, 'ws')}/predict/ws`;
+
+  // Live prediction channel: the server scores only the latest slider position
+  const socketRef = useRef(null);
+  const lastSentIdRef = useRef(0);
+  const lastShownIdRef = useRef(0);
 
   const calculateRiskLevel = (riskScore) => {
     if (riskScore <= 30) return { level: 'Safe', color: '#10b981', emoji: '✅' };
@@ -26,6 +32,45 @@ const WhatIfSimulator = ({ role = 'student' }) => {
     return { level: 'Critical', color: '#ef4444', emoji: '🚨' };
   };
 
+  const applyPrediction = useCallback((data, { addToHistory = true } = {}) => {
+    // Backend returns: predicted_label, risk_category, risk_score
+    const predictionResult = data.predicted_label === 'at_risk' ? 'Fail' : 'Pass';
+    // Convert 0-1 to 0-100, ensuring very small values (> 0) don't show as 0%
+    const rawRiskPercent = (data.risk_score || 0) * 100;
+    let riskScorePercent = Math.round(rawRiskPercent);
+    // If value is > 0 but rounds to 0, show as 1% (minimum visible value)
+    if (rawRiskPercent > 0 && riskScorePercent === 0) {
+      riskScorePercent = 1;
+    }
+    
+    // Map backend risk_category to frontend risk level
+    let riskLevel;
+    if (data.risk_category === 'high') {
+      riskLevel = { level: 'Critical', color: '#ef4444', emoji: '🚨' };
+    } else if (data.risk_category === 'medium') {
+      riskLevel = { level: 'At-Risk', color: '#f59e0b', emoji: '⚠️' };
+    } else {
+      riskLevel = { level: 'Safe', color: '#10b981', emoji: '✅' };
+    }
+
+    const predictionData = {
+      result: predictionResult,
+      riskScore: riskScorePercent,
+      riskLevel: riskLevel,
+      timestamp: Date.now(),
+    };
+
+    setPrediction(predictionData);
+    
+    // Add to history for chart
+    if (addToHistory) {
+      setHistory((prev) => {
+        const newHistory = [...prev, { ...predictionData, index: prev.length }].slice(-10);
+        return newHistory;
+      });
+    }
+  }, []);
+
   const fetchPrediction = useCallback(async () => {
     setLoading(true);
     try {
@@ -66,50 +111,59 @@ const WhatIfSimulator = ({ role = 'student' }) => {
         return;
       }
 
-      const data = await response.json();
-      // Backend returns: predicted_label, risk_category, risk_score
-      const predictionResult = data.predicted_label === 'at_risk' ? 'Fail' : 'Pass';
-      // Convert 0-1 to 0-100, ensuring very small values (> 0) don't show as 0%
-      const rawRiskPercent = (data.risk_score || 0) * 100;
-      let riskScorePercent = Math.round(rawRiskPercent);
-      // If value is > 0 but rounds to 0, show as 1% (minimum visible value)
-      if (rawRiskPercent > 0 && riskScorePercent === 0) {
-        riskScorePercent = 1;
-      }
-      
-      // Map backend risk_category to frontend risk level
-      let riskLevel;
-      if (data.risk_category === 'high') {
-        riskLevel = { level: 'Critical', color: '#ef4444', emoji: '🚨' };
-      } else if (data.risk_category === 'medium') {
-        riskLevel = { level: 'At-Risk', color: '#f59e0b', emoji: '⚠️' };
-      } else {
-        riskLevel = { level: 'Safe', color: '#10b981', emoji: '✅' };
-      }
-
-      const predictionData = {
-        result: predictionResult,
-        riskScore: riskScorePercent,
-        riskLevel: riskLevel,
-        timestamp: Date.now(),
-      };
-
-      setPrediction(predictionData);
-      
-      // Add to history for chart
-      setHistory((prev) => {
-        const newHistory = [...prev, { ...predictionData, index: prev.length }].slice(-10);
-        return newHistory;
-      });
+      applyPrediction(await response.json());
     } catch (error) {
       console.error('Prediction error:', error);
     } finally {
       setLoading(false);
     }
-  }, [inputs, ML_API_URL]);
+  }, [inputs, ML_API_URL, applyPrediction]);
 
-  // Debounced prediction fetch
+  // Open the prediction WebSocket once; fall back to HTTP while it is not connected
   useEffect(() => {
+    const socket = new WebSocket(ML_WS_URL);
+    socketRef.current = socket;
+
+    socket.onmessage = (event) => {
+      const data = JSON.parse(event.data);
+      // Ignore answers for positions the user has already moved past
+      if (typeof data.id !== 'number' || data.id < lastShownIdRef.current) return;
+      lastShownIdRef.current = data.id;
+      const isLatest = data.id === lastSentIdRef.current;
+      if (data.error) {
+        console.error('ML API Error:', data.error);
+        return;
+      }
+      applyPrediction(data, { addToHistory: isLatest });
+    };
+    socket.onerror = () => {
+      console.error(`Cannot open prediction WebSocket at ${ML_WS_URL}. Falling back to HTTP.`);
+    };
+
+    return () => {
+      socketRef.current = null;
+      socket.close();
+    };
+  }, [ML_WS_URL, applyPrediction]);
+
+  // Stream every change over the WebSocket (the server drops superseded ones);
+  // otherwise use the debounced HTTP request
+  useEffect(() => {
+    const socket = socketRef.current;
+    if (socket && socket.readyState === WebSocket.OPEN) {
+      const id = lastSentIdRef.current + 1;
+      lastSentIdRef.current = id;
+      socket.send(JSON.stringify({
+        id,
+        features: {
+          attendance: inputs.attendance,
+          study_hours: inputs.studyHours,
+          assignments_completed: inputs.assignmentsCompleted,
+        },
+      }));
+      return undefined;
+    }
+
     const timer = setTimeout(() => {
       fetchPrediction();
     }, 500);